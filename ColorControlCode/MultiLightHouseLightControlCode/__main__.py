@@ -23,7 +23,7 @@ def main():
     config = LightConfig()
     try:
         light_system = initialize_lights(config)
-        gui = LightGUI(light_system)
+        gui = LightGUI(light_system, config)
         gui.run()
     except Exception as e:
         print(f"Error: {e}")
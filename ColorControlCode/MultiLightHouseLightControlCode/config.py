@@ -9,4 +9,6 @@ class LightConfig:
     MAX_SATURATION: int = 254
     MAX_HUE: int = 65535
     TRANSITION_TIME: int = 1  # seconds
-    CYCLE_TIME: int = 15  # seconds
\ No newline at end of file
+    CYCLE_TIME: int = 15  # seconds
+    BACKEND_TIMEOUT: float = 1.0  # seconds to wait for each backend per update (at most TRANSITION_TIME)
+    MAX_WORKERS: int = 16  # concurrent device requests (Philips bulbs are one each)
\ No newline at end of file
@@ -1,11 +1,16 @@
 import sys
-from time import sleep
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from enum import Enum
+from functools import partial
+from time import monotonic
 from phue import Bridge
 from lifxlan import LifxLAN
 import requests
 from math import fabs, fmod, floor
 from random import uniform
-from typing import Tuple, List, Dict, Any, Optional
+from typing import Tuple, List, Dict, Any, Callable, Optional
 from dataclasses import dataclass
 from .config import LightConfig
 
@@ -52,29 +57,76 @@ class GoveeLights:
     endLine: 104
     ```
 
+class Command(Enum):
+    """Commands accepted by the controller's worker thread"""
+    START = 'start'
+    CYCLE = 'cycle'
+    STOP = 'stop'
+    DIM = 'dim'
+    MAX = 'max'
+    SHUTDOWN = 'shutdown'
+
 class LightController:
-    """Core light control functionality"""
+    """Core light control functionality
+
+    Light updates run on a worker thread fed by a command queue, so callers
+    (such as the Tk main loop) never block on the color cycle or on network
+    calls. Between cycle ticks the worker waits on the queue, so a command
+    takes effect as soon as the current light update finishes. Failed
+    commands are reported through the `errors` queue as (command, exception).
+
+    Each update fans out to the vendor backends (and to every Philips bulb,
+    since each bulb is its own HTTP round-trip) on a thread pool, so a step
+    takes as long as the slowest backend rather than the sum of all of them.
+    A failing backend does not abort the command or the cycle; it is reported
+    once when it starts failing, and again only after it has recovered.
+
+    A backend still busy with an earlier update skips cycle ticks (the next
+    tick supersedes them), but a stop, dim or maximum-brightness state is
+    kept in a per-backend slot and sent as soon as the earlier update ends,
+    so the lights always end up in the last requested state.
+    """
     def __init__(self, lights: LightSystem, config: LightConfig):
         self.lights = lights
         self.config = config
-        self._running = False
+        self._running = False  # True while the color cycle is active
         self._cached_brightness: Optional[int] = None
         self._cached_hue: Optional[int] = None
+        self._commands: 'queue.Queue[Tuple[Command, float]]' = queue.Queue()
+        self.errors: 'queue.Queue[Tuple[Command, Exception]]' = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Dict[str, Future] = {}  # backend -> its latest update
+        self._queued: Dict[str, Tuple[Callable[[], Any], Command]] = {}  # backend -> state waiting for it
+        self._failing: Dict[str, str] = {}  # backend -> error of its last update
+        self._new_failures: List[str] = []  # not yet reported to `errors`
+        self._command = Command.CYCLE  # command the worker is executing
+        # Guards the backend bookkeeping above, which executor callbacks also update
+        self._backend_lock = threading.RLock()
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the color cycle is active"""
+        return self._running
     
     def set_max_brightness(self) -> None:
         """Set all lights to maximum brightness - O(n) where n is number of lights"""
         # Batch operations where possible
-        self.lights.govee.turn(signal='on')
-        self.lights.lifx.set_power_all_lights("on")
+        jobs = {
+            'govee': partial(self.lights.govee.turn, signal='on'),
+            'lifx': partial(self.lights.lifx.set_power_all_lights, "on"),
+        }
         
         # Cache the max brightness settings
         if self._cached_brightness != self.config.MAX_BRIGHTNESS:
+            jobs.update(self._philips_jobs({
+                'bri': self.config.MAX_BRIGHTNESS,
+                'sat': self.config.MAX_SATURATION,
+                'on': True,
+            }))
+        if not self._fan_out(jobs, keep_latest=True):
             self._cached_brightness = self.config.MAX_BRIGHTNESS
-            for light in self.lights.philips:
-                light.transitiontime = self.config.TRANSITION_TIME * 10
-                light.brightness = self.config.MAX_BRIGHTNESS
-                light.saturation = self.config.MAX_SATURATION
-                light.on = True
 
     def dim_lights(self) -> None:
         """Set all lights to minimum brightness - O(n)"""
@@ -82,61 +134,254 @@ class LightController:
         MIN_BRIGHTNESS = 1
         MIN_SATURATION = 0
         
-        self.lights.govee.set_color((MIN_BRIGHTNESS, MIN_BRIGHTNESS, MIN_BRIGHTNESS))
-        self.lights.lifx.set_color_all_lights([40000, 0, MIN_BRIGHTNESS, 4000])
+        jobs = {
+            'govee': partial(self.lights.govee.set_color, (MIN_BRIGHTNESS, MIN_BRIGHTNESS, MIN_BRIGHTNESS)),
+            'lifx': partial(self.lights.lifx.set_color_all_lights, [40000, 0, MIN_BRIGHTNESS, 4000]),
+        }
         
         # Cache the minimum brightness settings
         if self._cached_brightness != MIN_BRIGHTNESS:
+            jobs.update(self._philips_jobs({'bri': MIN_BRIGHTNESS, 'sat': MIN_SATURATION}))
+        if not self._fan_out(jobs, keep_latest=True):
             self._cached_brightness = MIN_BRIGHTNESS
-            for light in self.lights.philips:
-                light.brightness = MIN_BRIGHTNESS
-                light.saturation = MIN_SATURATION
 
     def cycle_colors(self, brightness_delta: float = 0.0) -> None:
-        """Cycle all lights through the color spectrum - O(n) per cycle"""
-        hue = 0
-        hue_increment = self.config.MAX_HUE / self.config.CYCLE_TIME
-        
-        while self._running:
-            # Calculate new values only if they've changed
-            if self._cached_hue != hue:
-                self._cached_hue = hue
-                brightness = int(self.config.MAX_BRIGHTNESS * (1 - brightness_delta))
-                brightness_hsv = int(self.config.MAX_HUE * (1 - brightness_delta))
+        """Start cycling all lights through the color spectrum on the worker thread"""
+        self._send(Command.CYCLE, brightness_delta)
+
+    def _cycle_step(self, hue: float, brightness_delta: float) -> float:
+        """Show one step of the color cycle and return the next hue - O(n)"""
+        # Calculate new values only if they've changed
+        if self._cached_hue != hue:
+            self._cached_hue = hue
+            brightness = int(self.config.MAX_BRIGHTNESS * (1 - brightness_delta))
+            brightness_hsv = int(self.config.MAX_HUE * (1 - brightness_delta))
 
-                # Batch update all lights simultaneously
-                self._update_all_lights(hue, brightness, brightness_hsv)
+            # Batch update all lights simultaneously
+            self._update_all_lights(int(hue), brightness, brightness_hsv)
 
-            hue = (hue + hue_increment) % self.config.MAX_HUE
-            sleep(self.config.TRANSITION_TIME)
+        return (hue + self.config.MAX_HUE / self.config.CYCLE_TIME) % self.config.MAX_HUE
 
     def _update_all_lights(self, hue: int, brightness: int, brightness_hsv: int) -> None:
-        """Update all light systems simultaneously - O(n)"""
-        # Update LIFX lights (batch operation)
-        self.lights.lifx.set_color_all_lights(
-            color=[hue, self.config.MAX_HUE, brightness_hsv, 3500],
-            duration=self.config.TRANSITION_TIME * 1000,
-            rapid=True
-        )
-        
-        # Update Govee lights
-        self.lights.govee.set_hue(hue)
-        
+        """Update all light systems simultaneously - latency of the slowest backend"""
+        jobs = {
+            # Update LIFX lights (batch operation)
+            'lifx': partial(
+                self.lights.lifx.set_color_all_lights,
+                color=[hue, self.config.MAX_HUE, brightness_hsv, 3500],
+                duration=self.config.TRANSITION_TIME * 1000,
+                rapid=True
+            ),
+            # Update Govee lights
+            'govee': partial(self.lights.govee.set_hue, hue),
+        }
         # Update Philips lights
-        for light in self.lights.philips:
-            light.hue = hue
-            light.brightness = brightness
+        jobs.update(self._philips_jobs({'hue': hue, 'bri': brightness}))
+        self._fan_out(jobs)
+
+    def turn_off(self) -> None:
+        """Turn off all lights - O(n)"""
+        self._cached_brightness = None
+        jobs = {
+            'govee': partial(self.lights.govee.turn, signal='off'),
+            'lifx': partial(self.lights.lifx.set_power_all_lights, "off"),
+        }
+        jobs.update(self._philips_jobs({'on': False}))
+        self._fan_out(jobs, keep_latest=True)
+
+    def _philips_jobs(self, state: Dict[str, Any]) -> Dict[str, Callable[[], Any]]:
+        """One job per Philips bulb, each setting the whole state in a single request"""
+        # Setting light.hue, light.brightness, ... separately costs one
+        # round-trip per attribute
+        state = dict(state, transitiontime=self.config.TRANSITION_TIME * 10)
+        return {f'philips:{light.light_id}': partial(light.bridge.set_light, light.light_id, state)
+                for light in self.lights.philips}
+
+    def _fan_out(self, jobs: Dict[str, Callable[[], Any]], keep_latest: bool = False) -> Dict[str, str]:
+        """Run one job per backend concurrently and return {backend: error} for jobs not applied in time
+
+        Waits at most BACKEND_TIMEOUT, capped at TRANSITION_TIME so a hung
+        backend cannot delay the next command by more than one tick. A backend
+        whose previous job is still running gets no second request, so a hung
+        device cannot pile up requests or starve the others of workers: its
+        job is dropped, or with keep_latest (state commands) kept in its slot,
+        replacing any older one, and sent when the previous job ends. Backends
+        that start failing are queued for reporting (see _report_failures).
+        """
+        timeout = min(self.config.BACKEND_TIMEOUT, self.config.TRANSITION_TIME)
+        failures = {}
+        futures = {}
+        with self._backend_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.config.MAX_WORKERS,
+                                                    thread_name_prefix='light-backend')
+            for backend, job in jobs.items():
+                pending = self._pending.get(backend)
+                if pending is not None and not pending.done():
+                    if keep_latest:
+                        failures[backend] = "queued behind a running update"
+                        first_queued = backend not in self._queued
+                        self._queued[backend] = (job, self._command)
+                        if first_queued:
+                            pending.add_done_callback(partial(self._send_queued, backend))
+                    else:
+                        failures[backend] = "previous update still running"
+                        self._record(backend, failures[backend])
+                    continue
+                # A newer job supersedes a state still waiting in the slot
+                self._queued.pop(backend, None)
+                futures[backend] = self._pending[backend] = self._executor.submit(job)
+
+        done, _ = wait(futures.values(), timeout=timeout)
+        with self._backend_lock:
+            for backend, future in futures.items():
+                if future not in done:
+                    failures[backend] = f"timed out after {timeout}s"
+                elif future.exception() is not None:
+                    failures[backend] = str(future.exception())
+                self._record(backend, failures.get(backend))
+        return failures
 
-    def start(self) -> None:
-        """Start the light control system"""
-        self._running = True
-        self.set_max_brightness()
-        self.cycle_colors()
+    def _send_queued(self, backend: str, _previous: Future) -> None:
+        """Submit the state waiting in backend's slot (runs when its previous job ends)"""
+        with self._backend_lock:
+            if backend not in self._queued or self._executor is None:
+                return
+            job, command = self._queued.pop(backend)
+            future = self._pending[backend] = self._executor.submit(job)
+        future.add_done_callback(partial(self._report_queued, backend, command))
+
+    def _report_queued(self, backend: str, command: Command, future: Future) -> None:
+        """Report a queued state job that failed; no later tick will check it"""
+        error = None
+        if future.cancelled():
+            error = "cancelled at shutdown"
+        elif future.exception() is not None:
+            error = str(future.exception())
+        with self._backend_lock:
+            self._record(backend, error)
+            if self._new_failures:
+                self.errors.put((command, RuntimeError("; ".join(self._new_failures))))
+                self._new_failures = []
+
+    def _record(self, backend: str, error: Optional[str]) -> None:
+        """Track backend health; queue a report when a backend starts failing"""
+        if error is None:
+            self._failing.pop(backend, None)
+            return
+        if backend not in self._failing:
+            self._new_failures.append(f"{backend}: {error}")
+        self._failing[backend] = error
+
+    def _report_failures(self, command: Command) -> None:
+        """Put backends that started failing during command on the errors queue as one error"""
+        with self._backend_lock:
+            if self._new_failures:
+                self.errors.put((command, RuntimeError("; ".join(self._new_failures))))
+                self._new_failures = []
+
+    def start(self, brightness_delta: float = 0.0) -> None:
+        """Set maximum brightness and start the color cycle (non-blocking)"""
+        self._send(Command.START, brightness_delta)
 
     def stop(self) -> None:
-        """Stop the light control system and turn off all lights"""
-        self._running = False
-        self.lights.govee.turn(signal='off')
-        self.lights.lifx.set_power_all_lights("off")
-        for light in self.lights.philips:
-            light.on = False
\ No newline at end of file
+        """Stop the color cycle and turn off all lights (non-blocking)"""
+        self._send(Command.STOP)
+
+    def dim(self) -> None:
+        """Pause the color cycle and dim all lights (non-blocking)"""
+        self._send(Command.DIM)
+
+    def max_brightness(self) -> None:
+        """Pause the color cycle and set maximum brightness (non-blocking)"""
+        self._send(Command.MAX)
+
+    def shutdown(self, timeout: Optional[float] = None) -> None:
+        """Finish queued commands and the last update of every backend, then end the worker thread
+
+        timeout bounds the whole shutdown; requests still stuck on a hung
+        device after it are abandoned, not waited for.
+        """
+        deadline = None if timeout is None else monotonic() + timeout
+        with self._worker_lock:
+            worker = self._worker
+            if worker is not None:
+                self._commands.put((Command.SHUTDOWN, 0.0))
+                self._worker = None
+        if worker is not None:
+            worker.join(timeout)
+
+        # States queued behind a busy backend are only submitted once it is
+        # done, so keep waiting until no slot is left
+        while True:
+            with self._backend_lock:
+                running = [future for future in self._pending.values() if not future.done()]
+                if not running and not self._queued:
+                    break
+            remaining = None if deadline is None else deadline - monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            wait(running, timeout=remaining)
+
+        with self._backend_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+            self._pending.clear()
+            self._queued.clear()
+            self._failing.clear()
+
+    def _send(self, command: Command, brightness_delta: float = 0.0) -> None:
+        """Queue a command, starting the worker thread on first use"""
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="light-controller", daemon=True)
+                self._worker.start()
+            self._commands.put((command, brightness_delta))
+
+    def _run(self) -> None:
+        """Worker loop: execute queued commands and advance the color cycle every tick"""
+        hue = 0.0
+        brightness_delta = 0.0
+        next_tick = monotonic()
+        while True:
+            # Sleep until the next cycle tick, but wake up for any command
+            timeout = max(0.0, next_tick - monotonic()) if self._running else None
+            try:
+                command, delta = self._commands.get(timeout=timeout)
+            except queue.Empty:
+                command = None
+
+            if command is Command.SHUTDOWN:
+                self._running = False
+                return
+            self._command = command or Command.CYCLE
+            try:
+                if command is None:
+                    hue = self._cycle_step(hue, brightness_delta)
+                    # Skip ticks that a slow update overran instead of bursting to catch up
+                    next_tick = max(next_tick + self.config.TRANSITION_TIME, monotonic())
+                elif command in (Command.START, Command.CYCLE):
+                    if command is Command.START:
+                        self.set_max_brightness()
+                    hue, brightness_delta = 0.0, delta
+                    # The cycle changes the lights behind the brightness cache
+                    self._cached_hue = self._cached_brightness = None
+                    self._running = True
+                    next_tick = monotonic()
+                elif command is Command.STOP:
+                    self._running = False
+                    self.turn_off()
+                elif command is Command.DIM:
+                    self._running = False
+                    self.dim_lights()
+                elif command is Command.MAX:
+                    self._running = False
+                    self.set_max_brightness()
+                self._report_failures(command or Command.CYCLE)
+            except Exception as e:
+                self.errors.put((command or Command.CYCLE, e))
+                self._report_failures(command or Command.CYCLE)
+                if command is None:
+                    # Retry the failed step on the next tick instead of spinning
+                    next_tick = monotonic() + self.config.TRANSITION_TIME
\ No newline at end of file
@@ -1,12 +1,19 @@
+import queue
 from tkinter import Tk, Label, Button, messagebox
 from typing import Optional
 from .light_control import LightSystem, LightController
 from .config import LightConfig
 
+ERROR_POLL_MS = 100
+
 class LightGUI:
-    """GUI interface for light control system"""
-    def __init__(self, light_system: LightSystem):
-        self.controller = LightController(light_system)
+    """GUI interface for light control system
+
+    Buttons only queue commands for the controller's worker thread, so the
+    window stays responsive while the lights cycle.
+    """
+    def __init__(self, light_system: LightSystem, config: Optional[LightConfig] = None):
+        self.controller = LightController(light_system, config or LightConfig())
         self.root: Optional[Tk] = None
         self.setup_gui()
 
@@ -24,6 +31,7 @@ class LightGUI:
             Button(self.root, text="Dim", command=self.safe_dim).pack(pady=10)
             Button(self.root, text="Max Brightness", 
                    command=self.safe_max_brightness).pack(pady=10)
+            self.root.after(ERROR_POLL_MS, self.poll_errors)
         except Exception as e:
             messagebox.showerror("Setup Error", f"Failed to setup GUI: {e}")
             raise
@@ -45,21 +53,33 @@ class LightGUI:
     def safe_dim(self) -> None:
         """Safely execute dim command with error handling"""
         try:
-            self.controller.dim_lights()
+            self.controller.dim()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to dim lights: {e}")
 
     def safe_max_brightness(self) -> None:
         """Safely execute max brightness command with error handling"""
         try:
-            self.controller.set_max_brightness()
+            self.controller.max_brightness()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to set max brightness: {e}")
 
+    def poll_errors(self) -> None:
+        """Show errors reported by the controller thread (Tk calls must stay on this thread)"""
+        try:
+            while True:
+                command, error = self.controller.errors.get_nowait()
+                messagebox.showerror("Error", f"Failed to {command.value}: {error}")
+        except queue.Empty:
+            pass
+        if self.root:
+            self.root.after(ERROR_POLL_MS, self.poll_errors)
+
     def on_closing(self) -> None:
         """Handle window closing event"""
+        if self.root:
+            self.root.quit()
         self.cleanup()
-        self.root.quit()
 
     def run(self) -> None:
         """Start the GUI event loop"""
@@ -69,10 +89,13 @@ class LightGUI:
     def cleanup(self) -> None:
         """Cleanup resources before closing"""
         try:
-            if self.controller._running:
+            if self.controller.is_running:
                 self.controller.stop()
+            # Let the stop command reach the lights before the process exits
+            self.controller.shutdown(timeout=5)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to stop controller: {e}")
         finally:
             if self.root:
-                self.root.destroy()
\ No newline at end of file
+                self.root.destroy()
+                self.root = None
\ No newline at end of file
@@ -11,35 +11,60 @@ The sample strategy implemented is a Moving Average Crossover:
 - Sell signal: When fast MA crosses below slow MA
 
 Dependencies:
-- yfinance: For downloading historical market data
+- yfinance: For downloading historical market data (cached locally by price_store.py)
 - vectorbt: For vectorized backtesting
 - quantstats: For performance metrics and visualizations
 - pandas: For data manipulation
 - matplotlib: For plotting
 
 Install dependencies with:
-pip install yfinance vectorbt quantstats pandas matplotlib
+pip install yfinance vectorbt quantstats pandas matplotlib pyarrow
+
+Usage:
+python backtesting.py                                  # AAPL, full report
+python backtesting.py MSFT --fast 10 --slow 30 --level charts
+python backtesting.py AAPL --level metrics             # reuses a stored identical run
+
+Set BACKTEST_PROFILE=1 to print per-stage timings and export them as JSON and
+Chrome trace files (BACKTEST_PROFILE=cprofile also dumps cProfile stats per
+stage, see instrumentation.py).
 """
 
 # Set matplotlib to use a non-interactive backend to avoid Tkinter errors
 import matplotlib
 matplotlib.use('Agg')  # Use non-interactive backend
 
-import yfinance as yf
-import vectorbt as vbt
-import quantstats as qs
-import matplotlib.pyplot as plt
+import argparse
+import contextlib
 import pandas as pd
 import numpy as np
+import os
 from datetime import datetime
 
-# Configure VectorBT settings - fixed for compatibility with current version
-vbt.settings.array_wrapper['freq'] = '1d'
+from instrumentation import Profiler
+from metrics_kernel import compute_stats
+from price_store import get_default_store
+
+# VectorBT, QuantStats and pyplot each take seconds to import, so they are
+# imported inside the functions that need them (see benchmarks.py --imports)
+BACKTEST_LEVELS = ('metrics', 'charts', 'report')
+
+def import_vectorbt():
+    """
+    Import VectorBT with this module's settings applied.
+    """
+    import vectorbt as vbt
+    # Configure VectorBT settings - fixed for compatibility with current version
+    vbt.settings.array_wrapper['freq'] = '1d'
+    return vbt
 
-def load_data(symbol, start_date, end_date):
+def load_data(symbol, start_date, end_date, store=None):
     """
     Load historical price data for the specified symbol and date range.
     
+    Data is served from the local price store (see price_store.py), so only
+    date ranges that are not cached yet are downloaded.
+    
     Parameters:
     -----------
     symbol : str
@@ -48,6 +73,9 @@ def load_data(symbol, start_date, end_date):
         Start date in 'YYYY-MM-DD' format
     end_date : str
         End date in 'YYYY-MM-DD' format
+    store : PriceStore or MmapArchive, optional
+        Price store to load from (default: the shared store from get_default_store);
+        an MmapArchive returns memory-mapped views for histories larger than RAM
         
     Returns:
     --------
@@ -55,16 +83,16 @@ def load_data(symbol, start_date, end_date):
         DataFrame containing the historical OHLCV data
     """
     print(f"Loading data for {symbol} from {start_date} to {end_date}...")
-    data = yf.download(symbol, start=start_date, end=end_date)
+    store = store or get_default_store()
     
-    # Check if data was successfully downloaded
-    if data.empty:
-        raise ValueError(f"No data found for {symbol} in the specified date range")
+    # The store raises price_store.NoDataError (a ValueError) when the symbol has
+    # no bars in the requested range, and OSError when a download fails
+    data = store.load(symbol, start_date, end_date)
         
     print(f"Successfully loaded {len(data)} data points")
     return data
 
-def moving_average_crossover(close_prices, fast_window, slow_window):
+def moving_average_crossover(close_prices, fast_window, slow_window, engine='pandas'):
     """
     Generate entry and exit signals based on moving average crossover strategy.
     
@@ -76,12 +104,27 @@ def moving_average_crossover(close_prices, fast_window, slow_window):
         Window size for the fast moving average
     slow_window : int
         Window size for the slow moving average
+    engine : str
+        'pandas' for this reference implementation, or 'kernel' for the
+        single-pass compiled kernel in signal_kernels.py (same signals)
         
     Returns:
     --------
     tuple
         (entries, exits) - Boolean Series indicating buy and sell signals
     """
+    if engine == 'kernel':
+        from signal_kernels import crossover_kernel
+        outputs = crossover_kernel(close_prices.to_numpy(), fast_window, slow_window)
+        # Wrap the raw arrays once at the end so callers keep the pandas API
+        if isinstance(close_prices, pd.DataFrame):
+            return tuple(pd.DataFrame(output, index=close_prices.index, columns=close_prices.columns)
+                         for output in outputs)
+        return tuple(pd.Series(output, index=close_prices.index, name=close_prices.name)
+                     for output in outputs)
+    if engine != 'pandas':
+        raise ValueError(f"Unknown signal engine: {engine}")
+    
     # Calculate moving averages
     fast_ma = close_prices.rolling(window=fast_window).mean()
     slow_ma = close_prices.rolling(window=slow_window).mean()
@@ -95,7 +138,7 @@ def moving_average_crossover(close_prices, fast_window, slow_window):
     
     return entries, exits, fast_ma, slow_ma
 
-def run_backtest(close_prices, entries, exits, initial_cash=10000):
+def run_backtest(close_prices, entries, exits, initial_cash=10000, fees=0.001):
     """
     Run backtest using the provided signals.
     
@@ -109,6 +152,8 @@ def run_backtest(close_prices, entries, exits, initial_cash=10000):
         Boolean Series indicating sell signals
     initial_cash : float
         Initial capital for the backtest
+    fees : float
+        Trading fee per order as a fraction of its value (default: 0.1%)
         
     Returns:
     --------
@@ -116,6 +161,7 @@ def run_backtest(close_prices, entries, exits, initial_cash=10000):
         Portfolio object containing backtest results
     """
     print("Running backtest...")
+    vbt = import_vectorbt()
     
     # Create portfolio object with the generated signals
     portfolio = vbt.Portfolio.from_signals(
@@ -123,15 +169,45 @@ def run_backtest(close_prices, entries, exits, initial_cash=10000):
         entries,
         exits,
         init_cash=initial_cash,
-        fees=0.001,  # 0.1% trading fee
+        fees=fees,
         freq='1D'
     )
     
     return portfolio
 
-def calculate_metrics(portfolio, symbol):
+def extract_metrics(portfolio):
     """
-    Calculate and display key performance metrics.
+    Extract the key performance metrics of a single-symbol portfolio as scalars.
+    
+    Parameters:
+    -----------
+    portfolio : vbt.Portfolio
+        Portfolio object from backtest
+        
+    Returns:
+    --------
+    dict
+        Total return, Sharpe ratio, max drawdown, win rate, trade count and
+        average trade duration (in days)
+    """
+    metrics = {
+        'total_return': portfolio.total_return(),
+        'sharpe_ratio': portfolio.sharpe_ratio(),
+        'max_drawdown': portfolio.max_drawdown(),
+        'win_rate': portfolio.trades.win_rate(),
+        'trade_count': portfolio.trades.count(),
+        'avg_trade_duration': portfolio.trades.duration.mean(),
+    }
+    
+    # Handle Series objects by converting to scalar values if needed
+    for name, value in metrics.items():
+        if isinstance(value, pd.Series):
+            metrics[name] = value.iloc[0] if len(value) > 0 else 0
+    return metrics
+
+def extract_returns(portfolio, symbol):
+    """
+    Extract the strategy returns of a single-symbol portfolio for QuantStats.
     
     Parameters:
     -----------
@@ -143,7 +219,7 @@ def calculate_metrics(portfolio, symbol):
     Returns:
     --------
     pd.Series
-        Returns series for further analysis
+        Daily returns named 'Strategy' with a DatetimeIndex
     """
     # Extract portfolio returns
     returns = portfolio.returns()
@@ -155,48 +231,48 @@ def calculate_metrics(portfolio, symbol):
     # Prepare returns for QuantStats (ensure it's a Series with proper index)
     # Make sure we have a flattened 1D array for the values
     flat_values = returns.values.flatten() if hasattr(returns.values, 'flatten') else returns.values
-    returns = pd.Series(flat_values, index=pd.to_datetime(returns.index), name='Strategy')
-    
-    # Calculate key metrics
-    total_return = portfolio.total_return()
-    sharpe_ratio = portfolio.sharpe_ratio()
-    max_drawdown = portfolio.max_drawdown()
-    win_rate = portfolio.trades.win_rate()
-    
-    # Handle Series objects by converting to scalar values if needed
-    if isinstance(total_return, pd.Series):
-        total_return = total_return.iloc[0] if len(total_return) > 0 else 0
-    if isinstance(sharpe_ratio, pd.Series):
-        sharpe_ratio = sharpe_ratio.iloc[0] if len(sharpe_ratio) > 0 else 0
-    if isinstance(max_drawdown, pd.Series):
-        max_drawdown = max_drawdown.iloc[0] if len(max_drawdown) > 0 else 0
-    if isinstance(win_rate, pd.Series):
-        win_rate = win_rate.iloc[0] if len(win_rate) > 0 else 0
-    
-    # Print performance metrics
-    print("\n==== Performance Metrics ====")
-    print(f"Total Return: {total_return:.2%}")
-    print(f"Sharpe Ratio: {sharpe_ratio:.4f}")
-    print(f"Maximum Drawdown: {max_drawdown:.2%}")
-    print(f"Win Rate: {win_rate:.2%}")
-    
-    # Handle trade count and duration as Series if needed
-    trade_count = portfolio.trades.count()
-    if isinstance(trade_count, pd.Series):
-        trade_count = trade_count.iloc[0] if len(trade_count) > 0 else 0
-    
-    avg_duration = portfolio.trades.duration.mean()
-    if isinstance(avg_duration, pd.Series):
-        avg_duration = avg_duration.iloc[0] if len(avg_duration) > 0 else 0
-    
-    print(f"Number of Trades: {trade_count}")
-    print(f"Average Trade Duration: {avg_duration:.2f} days")
+    return pd.Series(flat_values, index=pd.to_datetime(returns.index), name='Strategy')
+
+def calculate_metrics(portfolio, symbol):
+    """
+    Calculate and display key performance metrics.
     
+    Parameters:
+    -----------
+    portfolio : vbt.Portfolio
+        Portfolio object from backtest
+    symbol : str
+        The ticker symbol
+        
+    Returns:
+    --------
+    pd.Series
+        Returns series for further analysis
+    """
+    returns = extract_returns(portfolio, symbol)
+    print_metrics(extract_metrics(portfolio))
     return returns
 
-def visualize_results(portfolio, close_prices, fast_ma, slow_ma, symbol):
+def print_metrics(metrics):
     """
-    Create visualizations of the backtest results and save them to files.
+    Print the metrics returned by extract_metrics (or stored by result_store.py).
+    """
+    # Stored metrics use None for undefined values (e.g. Sharpe without trades)
+    metrics = {name: np.nan if value is None else value for name, value in metrics.items()}
+    print("\n==== Performance Metrics ====")
+    print(f"Total Return: {metrics['total_return']:.2%}")
+    print(f"Sharpe Ratio: {metrics['sharpe_ratio']:.4f}")
+    print(f"Maximum Drawdown: {metrics['max_drawdown']:.2%}")
+    print(f"Win Rate: {metrics['win_rate']:.2%}")
+    print(f"Number of Trades: {metrics['trade_count']:.0f}")
+    print(f"Average Trade Duration: {metrics['avg_trade_duration']:.2f} days")
+
+def extract_chart_data(portfolio, close_prices, fast_ma, slow_ma, symbol):
+    """
+    Collect everything the result charts need as plain pandas/NumPy data.
+    
+    Unlike the portfolio object, the result is cheap to pickle, so charts can
+    be rendered in a worker process (see report_pipeline.py).
     
     Parameters:
     -----------
@@ -210,8 +286,58 @@ def visualize_results(portfolio, close_prices, fast_ma, slow_ma, symbol):
         Slow moving average values
     symbol : str
         The ticker symbol
+        
+    Returns:
+    --------
+    dict
+        Price, moving average, trade marker, value and drawdown data
     """
-    print("Generating visualizations...")
+    chart_data = {
+        'symbol': symbol,
+        'close_prices': close_prices,
+        'fast_ma': fast_ma,
+        'slow_ma': slow_ma,
+        'portfolio_value': portfolio.value(),
+        'drawdown': portfolio.drawdown(),
+        'trades': None,
+    }
+    
+    try:
+        entries = portfolio.trades.records['entry_idx']
+        exits = portfolio.trades.records['exit_idx']
+        chart_data['trades'] = {
+            'entry_dates': [close_prices.index[i] for i in entries],
+            'exit_dates': [close_prices.index[i] if i < len(close_prices.index) else close_prices.index[-1] for i in exits],
+            'entry_prices': portfolio.trades.records['entry_price'].values,
+            'exit_prices': portfolio.trades.records['exit_price'].values,
+        }
+    except Exception as e:
+        print(f"Warning: Could not plot trade markers: {str(e)}")
+    
+    return chart_data
+
+def render_result_charts(chart_data, output_dir='.'):
+    """
+    Render the price/MA/portfolio and drawdown charts to PNG files.
+    
+    Parameters:
+    -----------
+    chart_data : dict
+        Output of extract_chart_data
+    output_dir : str
+        Directory to write the PNG files to
+        
+    Returns:
+    --------
+    list of str
+        Paths of the saved charts
+    """
+    import matplotlib.pyplot as plt
+    
+    symbol = chart_data['symbol']
+    close_prices = chart_data['close_prices']
+    fast_ma = chart_data['fast_ma']
+    slow_ma = chart_data['slow_ma']
     
     # Create a figure for price and MA
     plt.figure(figsize=(12, 8))
@@ -221,19 +347,10 @@ def visualize_results(portfolio, close_prices, fast_ma, slow_ma, symbol):
     plt.plot(slow_ma.index, slow_ma.values, label='Slow MA', alpha=0.7)
     
     # Plot entry and exit points
-    try:
-        entries = portfolio.trades.records['entry_idx']
-        exits = portfolio.trades.records['exit_idx']
-        entry_prices = portfolio.trades.records['entry_price']
-        exit_prices = portfolio.trades.records['exit_price']
-        
-        entry_dates = [close_prices.index[i] for i in entries]
-        exit_dates = [close_prices.index[i] if i < len(close_prices.index) else close_prices.index[-1] for i in exits]
-        
-        plt.scatter(entry_dates, entry_prices, color='green', marker='^', s=100, label='Buy Signal')
-        plt.scatter(exit_dates, exit_prices, color='red', marker='v', s=100, label='Sell Signal')
-    except Exception as e:
-        print(f"Warning: Could not plot trade markers: {str(e)}")
+    trades = chart_data['trades']
+    if trades is not None:
+        plt.scatter(trades['entry_dates'], trades['entry_prices'], color='green', marker='^', s=100, label='Buy Signal')
+        plt.scatter(trades['exit_dates'], trades['exit_prices'], color='red', marker='v', s=100, label='Sell Signal')
     
     plt.title(f'{symbol} Price with Moving Averages')
     plt.xlabel('Date')
@@ -243,7 +360,7 @@ def visualize_results(portfolio, close_prices, fast_ma, slow_ma, symbol):
     
     # Plot portfolio value - direct matplotlib plotting instead of VectorBT
     plt.subplot(2, 1, 2)
-    portfolio_value = portfolio.value()
+    portfolio_value = chart_data['portfolio_value']
     
     # Check if it's a Series or DataFrame and handle accordingly
     if isinstance(portfolio_value, pd.DataFrame):
@@ -263,14 +380,14 @@ def visualize_results(portfolio, close_prices, fast_ma, slow_ma, symbol):
     plt.tight_layout()
     
     # Save figure to file
-    price_ma_file = f"{symbol}_price_ma_portfolio_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
+    price_ma_file = os.path.join(output_dir, f"{symbol}_price_ma_portfolio_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
     plt.savefig(price_ma_file)
     plt.close()
     print(f"Price and MA chart saved to: {price_ma_file}")
     
     # Plot drawdowns - direct matplotlib plotting instead of VectorBT
     plt.figure(figsize=(12, 6))
-    drawdown_series = portfolio.drawdown()
+    drawdown_series = chart_data['drawdown']
     
     # Check if it's a Series or DataFrame and handle accordingly
     if isinstance(drawdown_series, pd.DataFrame):
@@ -304,12 +421,123 @@ def visualize_results(portfolio, close_prices, fast_ma, slow_ma, symbol):
     plt.tight_layout()
     
     # Save drawdowns to file
-    drawdowns_file = f"{symbol}_drawdowns_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
+    drawdowns_file = os.path.join(output_dir, f"{symbol}_drawdowns_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
     plt.savefig(drawdowns_file)
     plt.close()
     print(f"Drawdowns chart saved to: {drawdowns_file}")
+    
+    return [price_ma_file, drawdowns_file]
 
-def generate_quantstats_report(returns, benchmark_symbol='SPY', start_date=None, end_date=None):
+def visualize_results(portfolio, close_prices, fast_ma, slow_ma, symbol, output_dir='.'):
+    """
+    Create visualizations of the backtest results and save them to files.
+    
+    Parameters:
+    -----------
+    portfolio : vbt.Portfolio
+        Portfolio object from backtest
+    close_prices : pd.Series
+        Series of closing prices
+    fast_ma : pd.Series
+        Fast moving average values
+    slow_ma : pd.Series
+        Slow moving average values
+    symbol : str
+        The ticker symbol
+    output_dir : str
+        Directory to write the PNG files to
+        
+    Returns:
+    --------
+    list of str
+        Paths of the saved charts
+    """
+    print("Generating visualizations...")
+    return render_result_charts(
+        extract_chart_data(portfolio, close_prices, fast_ma, slow_ma, symbol),
+        output_dir
+    )
+
+def load_benchmark_returns(benchmark_symbol, start_date, end_date):
+    """
+    Load daily benchmark returns (cached across runs by the price store).
+    
+    Returns:
+    --------
+    pd.Series
+        Benchmark returns named after the benchmark symbol
+    """
+    benchmark_data = get_default_store().load(benchmark_symbol, start_date, end_date)
+    
+    # Calculate benchmark returns
+    benchmark_returns = benchmark_data['Close'].pct_change().dropna()
+    
+    # Prepare the benchmark returns as a Series
+    return pd.Series(
+        benchmark_returns.values,
+        index=benchmark_returns.index,
+        name=benchmark_symbol
+    )
+
+def render_quantstats_html(returns, benchmark_returns, output_dir='.'):
+    """
+    Write the full QuantStats HTML tearsheet.
+    
+    Returns:
+    --------
+    str
+        Path of the saved report
+    """
+    import quantstats as qs
+    
+    report_filename = os.path.join(output_dir, f"quantstats_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html")
+    qs.reports.html(
+        returns, 
+        benchmark_returns,
+        output=report_filename,
+        title=f'Trading Strategy Performance Report'
+    )
+    print(f"Report successfully generated: {report_filename}")
+    return report_filename
+
+def render_quantstats_charts(returns, output_dir='.'):
+    """
+    Render the monthly returns heatmap and strategy drawdowns to PNG files.
+    
+    Returns:
+    --------
+    list of str
+        Paths of the saved charts
+    """
+    import matplotlib.pyplot as plt
+    import quantstats as qs
+    
+    # Create monthly returns heatmap
+    plt.figure(figsize=(12, 8))
+    qs.plots.monthly_heatmap(returns)
+    plt.title('Monthly Returns')
+    plt.tight_layout()
+    
+    # Save heatmap to file
+    heatmap_file = os.path.join(output_dir, f"monthly_returns_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
+    plt.savefig(heatmap_file)
+    plt.close()
+    print(f"Monthly returns heatmap saved to: {heatmap_file}")
+    
+    # Create drawdowns plot
+    plt.figure(figsize=(12, 8))
+    qs.plots.drawdown(returns)
+    plt.title('Drawdowns')
+    plt.tight_layout()
+    
+    # Save drawdowns to file
+    drawdowns_file = os.path.join(output_dir, f"strategy_drawdowns_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
+    plt.savefig(drawdowns_file)
+    plt.close()
+    print(f"Strategy drawdowns chart saved to: {drawdowns_file}")
+    return [heatmap_file, drawdowns_file]
+
+def generate_quantstats_report(returns, benchmark_symbol='SPY', start_date=None, end_date=None, output_dir='.'):
     """
     Generate a QuantStats performance report.
     
@@ -323,6 +551,8 @@ def generate_quantstats_report(returns, benchmark_symbol='SPY', start_date=None,
         Start date for benchmark data
     end_date : str
         End date for benchmark data
+    output_dir : str
+        Directory to write the report and charts to
     """
     try:
         print(f"Generating QuantStats report with {benchmark_symbol} as benchmark...")
@@ -331,121 +561,129 @@ def generate_quantstats_report(returns, benchmark_symbol='SPY', start_date=None,
         if not isinstance(returns, pd.Series):
             raise ValueError("Returns must be a pandas Series")
             
-        # Download benchmark data
-        benchmark_data = yf.download(
-            benchmark_symbol, 
-            start=start_date,
-            end=end_date
-        )
+        benchmark_returns = load_benchmark_returns(benchmark_symbol, start_date, end_date)
         
-        # Calculate benchmark returns
-        benchmark_returns = benchmark_data['Close'].pct_change().dropna()
-        
-        # Prepare the benchmark returns as a Series
-        benchmark_returns = pd.Series(
-            benchmark_returns.values,
-            index=benchmark_returns.index,
-            name=benchmark_symbol
-        )
+        # Strategy and benchmark metrics in one vectorized pass (same
+        # definitions as QuantStats, see metrics_kernel.py)
+        stats = compute_stats(pd.concat([returns.rename('Strategy'), benchmark_returns.rename('Benchmark')],
+                                        axis=1))
+        strategy, benchmark = stats.loc['Strategy'], stats.loc['Benchmark']
         
         # Print key comparative metrics even if the HTML report fails
         print("\n=== Strategy vs Benchmark ===")
-        strategy_cagr = qs.stats.cagr(returns)
-        benchmark_cagr = qs.stats.cagr(benchmark_returns)
-        print(f"CAGR: Strategy: {strategy_cagr:.2%}, Benchmark: {benchmark_cagr:.2%}")
-        
-        strategy_sharpe = qs.stats.sharpe(returns)
-        benchmark_sharpe = qs.stats.sharpe(benchmark_returns)
-        print(f"Sharpe Ratio: Strategy: {strategy_sharpe:.2f}, Benchmark: {benchmark_sharpe:.2f}")
-        
-        strategy_maxdd = qs.stats.max_drawdown(returns)
-        benchmark_maxdd = qs.stats.max_drawdown(benchmark_returns)
-        print(f"Max Drawdown: Strategy: {strategy_maxdd:.2%}, Benchmark: {benchmark_maxdd:.2%}")
+        print(f"CAGR: Strategy: {strategy['cagr']:.2%}, Benchmark: {benchmark['cagr']:.2%}")
+        print(f"Sharpe Ratio: Strategy: {strategy['sharpe_ratio']:.2f}, Benchmark: {benchmark['sharpe_ratio']:.2f}")
+        print(f"Max Drawdown: Strategy: {strategy['max_drawdown']:.2%}, Benchmark: {benchmark['max_drawdown']:.2%}")
         
         # Basic tearsheet
-        print("\nDetailed metrics for strategy:")
-        qs.reports.metrics(returns, mode='basic')
+        print("\nDetailed metrics:")
+        print(stats.T.to_string(float_format='{:.4f}'.format))
         
         # Generate HTML report
         try:
-            report_filename = f"quantstats_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html"
-            qs.reports.html(
-                returns, 
-                benchmark_returns,
-                output=report_filename,
-                title=f'Trading Strategy Performance Report'
-            )
-            print(f"Report successfully generated: {report_filename}")
+            render_quantstats_html(returns, benchmark_returns, output_dir)
         except Exception as e:
             print(f"HTML report generation failed: {str(e)}")
         
-        # Create monthly returns heatmap
-        plt.figure(figsize=(12, 8))
-        qs.plots.monthly_heatmap(returns)
-        plt.title('Monthly Returns')
-        plt.tight_layout()
-        
-        # Save heatmap to file
-        heatmap_file = f"monthly_returns_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-        plt.savefig(heatmap_file)
-        plt.close()
-        print(f"Monthly returns heatmap saved to: {heatmap_file}")
-        
-        # Create drawdowns plot
-        plt.figure(figsize=(12, 8))
-        qs.plots.drawdown(returns)
-        plt.title('Drawdowns')
-        plt.tight_layout()
-        
-        # Save drawdowns to file
-        drawdowns_file = f"strategy_drawdowns_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-        plt.savefig(drawdowns_file)
-        plt.close()
-        print(f"Strategy drawdowns chart saved to: {drawdowns_file}")
+        render_quantstats_charts(returns, output_dir)
         
     except Exception as e:
         print(f"Error generating QuantStats report: {str(e)}")
         print("Displaying basic metrics without benchmark comparison:")
-        qs.reports.metrics(returns, mode='basic')
+        print(compute_stats(returns.rename('Strategy')).T.to_string(float_format='{:.4f}'.format))
 
 
-def main():
+def run_pipeline(symbol='AAPL', start_date='2019-01-01', end_date='2022-01-01', initial_cash=10000,
+                 fast_window=20, slow_window=50, level='report', use_stored=True, profiler=None):
     """
-    Main function to run the backtesting framework.
+    Run the backtest steps up to the requested level.
+    
+    Parameters:
+    -----------
+    symbol : str
+        The ticker symbol
+    start_date, end_date : str
+        Date range in 'YYYY-MM-DD' format
+    initial_cash : float
+        Initial capital for the backtest
+    fast_window, slow_window : int
+        Moving average windows
+    level : str
+        'metrics' stops after the metrics, 'charts' also saves the result
+        charts and 'report' adds the QuantStats report
+    use_stored : bool
+        At level 'metrics', print the stored result of an identical earlier
+        run (see result_store.py) instead of importing VectorBT and rerunning
+    profiler : Profiler, optional
+        Records per-stage timings (default: configured from BACKTEST_PROFILE,
+        see instrumentation.py)
     """
-    # Define trading parameters
-    symbol = 'AAPL'
-    start_date = '2019-01-01'
-    end_date = '2022-01-01'
-    initial_cash = 10000
-    fast_window = 20
-    slow_window = 50
+    if level not in BACKTEST_LEVELS:
+        raise ValueError(f"Unknown level {level!r}, expected one of {BACKTEST_LEVELS}")
+    profiler = profiler or Profiler.from_env()
+    params = {'fast_window': fast_window, 'slow_window': slow_window,
+              'start_date': start_date, 'end_date': end_date, 'initial_cash': initial_cash}
     
     try:
         # Step 1: Load data
-        data = load_data(symbol, start_date, end_date)
-        close_prices = data['Close']
-        
-        # Step 2: Generate trading signals
-        entries, exits, fast_ma, slow_ma = moving_average_crossover(close_prices, fast_window, slow_window)
-        
-        # Step 3: Run backtest
-        portfolio = run_backtest(close_prices, entries, exits, initial_cash)
+        with profiler.stage('load_data') as stage:
+            data = load_data(symbol, start_date, end_date)
+            close_prices = data['Close']
+            stage['rows'] = len(data)
         
-        # Step 4: Calculate performance metrics
-        returns = calculate_metrics(portfolio, symbol)
+        # One store connection and one data hash serve the lookup and the record
+        with _open_result_store() as result_store:
+            if result_store is not None:
+                from result_store import data_hash
+                data_key = data_hash(data)
+            
+            if level == 'metrics' and use_stored and result_store is not None:
+                with profiler.stage('result_store_lookup'):
+                    try:
+                        stored = result_store.get('ma_crossover', params, symbol, data_key)
+                    except Exception as e:
+                        print(f"Could not read the result store: {str(e)}")
+                        stored = None
+                if stored is not None:
+                    print(f"Using the stored result for {symbol} (see result_store.py)")
+                    print_metrics(stored)
+                    return
+            
+            # Step 2: Generate trading signals
+            with profiler.stage('signals', rows=len(close_prices)):
+                entries, exits, fast_ma, slow_ma = moving_average_crossover(close_prices, fast_window, slow_window)
+            
+            # Step 3: Run backtest
+            with profiler.stage('backtest', rows=len(close_prices)):
+                portfolio = run_backtest(close_prices, entries, exits, initial_cash)
+            
+            # Step 4: Calculate performance metrics
+            with profiler.stage('metrics', rows=len(close_prices)):
+                returns = calculate_metrics(portfolio, symbol)
+            
+            # Record the run so it can be queried later (see result_store.py)
+            if result_store is not None:
+                with profiler.stage('result_store'):
+                    try:
+                        result_store.put('ma_crossover', params, symbol, data_key, extract_metrics(portfolio))
+                    except Exception as e:
+                        print(f"Could not record the run in the result store: {str(e)}")
         
         # Step 5: Visualize results
-        visualize_results(portfolio, close_prices, fast_ma, slow_ma, symbol)
+        if level in ('charts', 'report'):
+            with profiler.stage('visualize', rows=len(close_prices)):
+                visualize_results(portfolio, close_prices, fast_ma, slow_ma, symbol)
         
         # Step 6: Try to generate QuantStats report (but continue if it fails)
-        try:
-            generate_quantstats_report(returns, 'SPY', start_date, end_date)
-        except Exception as e:
-            print(f"QuantStats report generation failed: {str(e)}")
-            print("Continuing with basic metrics display...")
-            # Display basic metrics without comparison
-            qs.reports.metrics(returns, mode='basic')
+        if level == 'report':
+            with profiler.stage('quantstats_report', rows=len(returns)):
+                try:
+                    generate_quantstats_report(returns, 'SPY', start_date, end_date)
+                except Exception as e:
+                    print(f"QuantStats report generation failed: {str(e)}")
+                    print("Continuing with basic metrics display...")
+                    # Display basic metrics without comparison
+                    print(compute_stats(returns).T.to_string(float_format='{:.4f}'.format))
         
         print("\nBacktesting completed successfully!")
         
@@ -453,10 +691,47 @@ def main():
         print(f"Error running backtest: {str(e)}")
         import traceback
         traceback.print_exc()
+    finally:
+        profiler.print_summary()
+        profiler.export()
+
+
+def _open_result_store():
+    """The default result store, or a null context yielding None if it cannot be opened."""
+    try:
+        from result_store import get_default_result_store
+        return get_default_result_store()
+    except Exception as e:
+        print(f"Could not open the result store: {str(e)}")
+        return contextlib.nullcontext()
+
+
+def main(argv=None):
+    """
+    Main function to run the backtesting framework.
+    
+    Parsing the arguments imports nothing heavy, so --help and stored
+    metrics-only runs return without loading VectorBT or QuantStats.
+    """
+    parser = argparse.ArgumentParser(description="Backtest a moving average crossover strategy")
+    parser.add_argument('symbol', nargs='?', default='AAPL')
+    parser.add_argument('--start-date', default='2019-01-01')
+    parser.add_argument('--end-date', default='2022-01-01')
+    parser.add_argument('--initial-cash', type=float, default=10000)
+    parser.add_argument('--fast', type=int, default=20, help="Fast moving average window")
+    parser.add_argument('--slow', type=int, default=50, help="Slow moving average window")
+    parser.add_argument('--level', choices=BACKTEST_LEVELS, default='report',
+                        help="Stop after the metrics, the charts or the full QuantStats report")
+    parser.add_argument('--recompute', action='store_true',
+                        help="Rerun even if the result store already holds this run")
+    args = parser.parse_args(argv)
+    
+    run_pipeline(args.symbol, args.start_date, args.end_date, args.initial_cash, args.fast, args.slow,
+                 args.level, use_stored=not args.recompute)
 
 
 if __name__ == "__main__":
     try:
         main()
     except Exception as e:
-        print(f"Error running backtest: {str(e)}")
\ No newline at end of file
+        print(f"Error running backtest: {str(e)}")
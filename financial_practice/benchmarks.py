@@ -0,0 +1,315 @@
+#!/usr/bin/env python
+"""
+Benchmark Suite for the Backtesting Hot Paths
+
+Measures moving_average_crossover (pandas and kernel engines), run_backtest
+and the metrics step on synthetic geometric-Brownian-motion prices generated
+from a fixed seed, so results are reproducible and the suite runs fully
+offline.
+
+For every (bars, columns) case and stage it records wall time, peak traced
+memory and throughput in bars per second (bars x columns / wall time). Results
+are written to JSON together with the git commit and library versions, and
+two result files can be compared to spot regressions between commits.
+
+Import times of the script entry points are measured in fresh interpreters
+and checked against IMPORT_BUDGETS; the heavy libraries are imported lazily,
+so exceeding a budget usually means a new top-level import.
+
+Usage:
+python benchmarks.py                       # quick preset
+python benchmarks.py --preset full         # 1k..10M bars, 1..5,000 columns
+python benchmarks.py --compare old.json new.json
+python benchmarks.py --imports             # import-time budgets only
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+PRESETS = {
+    'quick': {'bars': [1_000, 100_000], 'columns': [1, 100]},
+    'full': {'bars': [1_000, 100_000, 1_000_000, 10_000_000], 'columns': [1, 100, 1_000, 5_000]},
+}
+# Cases above this many price cells are skipped; 10M bars x 5,000 columns
+# would need ~400 GB per float matrix
+DEFAULT_MAX_CELLS = 50_000_000
+SEED = 42
+# Seconds to import each entry point in a fresh interpreter; VectorBT alone
+# takes several seconds, so these only hold while it is imported lazily
+IMPORT_BUDGETS = {'backtesting': 1.0, 'financial_analysis': 1.0, 'portfolio_backtest': 1.0}
+
+
+def synthetic_prices(n_bars, n_columns, seed=SEED):
+    """
+    Generate reproducible geometric-Brownian-motion closing prices.
+
+    Returns:
+    --------
+    pd.DataFrame or pd.Series
+        Minute-indexed prices; a Series when n_columns is 1
+    """
+    rng = np.random.default_rng(seed)
+    log_returns = rng.normal(0.0002, 0.01, size=(n_bars, n_columns))
+    prices = 100 * np.exp(np.cumsum(log_returns, axis=0))
+    # Minute-like spacing keeps 10M-bar indexes inside the Timestamp range
+    index = pd.date_range('2000-01-01', periods=n_bars, freq='min')
+    if n_columns == 1:
+        return pd.Series(prices[:, 0], index=index, name='SYN')
+    return pd.DataFrame(prices, index=index, columns=[f'SYN{i}' for i in range(n_columns)])
+
+
+def measure(func, *args):
+    """
+    Run func once for wall time and once under tracemalloc for peak memory.
+
+    The two runs are separate because tracing slows Python-level allocation
+    down and would distort the timing.
+
+    Returns:
+    --------
+    tuple
+        (result, wall_seconds, peak_bytes)
+    """
+    # Stage functions print progress lines; keep benchmark output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = func(*args)
+        wall_seconds = time.perf_counter() - start
+
+        tracemalloc.start()
+        func(*args)
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, wall_seconds, peak_bytes
+
+
+def benchmark_case(n_bars, n_columns, fast_window=20, slow_window=50):
+    """
+    Benchmark every stage for one (bars, columns) case.
+
+    Returns:
+    --------
+    list of dict
+        One record per stage
+    """
+    from backtesting import moving_average_crossover, run_backtest
+    from parameter_sweep import summarize_portfolio
+
+    close_prices = synthetic_prices(n_bars, n_columns)
+    stages = [
+        ('signals_pandas', lambda: moving_average_crossover(close_prices, fast_window, slow_window)),
+        ('signals_kernel', lambda: moving_average_crossover(close_prices, fast_window, slow_window, engine='kernel')),
+    ]
+    records = []
+    signals = None
+    for name, stage in stages:
+        signals, wall_seconds, peak_bytes = measure(stage)
+        records.append((name, wall_seconds, peak_bytes))
+
+    entries, exits = signals[0], signals[1]
+    portfolio, wall_seconds, peak_bytes = measure(run_backtest, close_prices, entries, exits)
+    records.append(('run_backtest', wall_seconds, peak_bytes))
+
+    _, wall_seconds, peak_bytes = measure(summarize_portfolio, portfolio)
+    records.append(('metrics', wall_seconds, peak_bytes))
+
+    return [{
+        'stage': name,
+        'bars': n_bars,
+        'columns': n_columns,
+        'wall_seconds': wall_seconds,
+        'peak_memory_mb': peak_bytes / 1024 ** 2,
+        'bars_per_second': n_bars * n_columns / wall_seconds if wall_seconds > 0 else float('inf'),
+    } for name, wall_seconds, peak_bytes in records]
+
+
+def environment_info():
+    """Collect the commit and library versions the results belong to."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = 'unknown'
+    import vectorbt as vbt
+    return {
+        'commit': commit,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'vectorbt': vbt.__version__,
+        'seed': SEED,
+    }
+
+
+def measure_import_time(module, repeats=3):
+    """
+    Time importing a module of this directory in fresh interpreters.
+
+    Returns:
+    --------
+    tuple
+        (best wall seconds over repeats, slowest direct imports of the
+        module as [(name, seconds), ...] from python -X importtime)
+    """
+    code = f"import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+    env = dict(os.environ, MPLBACKEND='Agg')
+    best, stderr = float('inf'), ''
+    for _ in range(repeats):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True,
+                                check=True, cwd=os.path.dirname(os.path.abspath(__file__)), env=env)
+        seconds = float(result.stdout.strip().splitlines()[-1])
+        if seconds < best:
+            best, stderr = seconds, result.stderr
+
+    # Lines look like "import time:  self [us] | cumulative | name" with the
+    # name indented by two spaces per nesting level
+    direct = []
+    for line in stderr.splitlines():
+        fields = line.split('|')
+        if len(fields) == 3 and fields[1].strip().isdigit():
+            depth = (len(fields[2]) - len(fields[2].lstrip()) - 1) // 2
+            if depth == 1:
+                direct.append((fields[2].strip(), int(fields[1]) / 1e6))
+    return best, sorted(direct, key=lambda item: item[1], reverse=True)[:5]
+
+
+def check_import_budgets(budgets=IMPORT_BUDGETS, repeats=3):
+    """
+    Measure every budgeted import and print the slowest dependencies of those over budget.
+
+    Returns:
+    --------
+    list of dict
+        One record per module with its time, budget and whether it passed
+    """
+    records = []
+    for module, budget in budgets.items():
+        seconds, slowest = measure_import_time(module, repeats)
+        passed = seconds <= budget
+        print(f"  import {module:<20} {seconds * 1000:8.0f} ms (budget {budget * 1000:.0f} ms)"
+              f"{'' if passed else ' OVER BUDGET'}")
+        if not passed:
+            for name, cumulative in slowest:
+                print(f"      {name:<30} {cumulative * 1000:8.0f} ms")
+        records.append({'module': module, 'import_seconds': seconds, 'budget_seconds': budget, 'passed': passed})
+    return records
+
+
+def run_suite(bars, columns, max_cells=DEFAULT_MAX_CELLS):
+    """
+    Run every (bars, columns) case within the cell budget.
+
+    Returns:
+    --------
+    dict
+        {'environment': ..., 'imports': [...], 'results': [...]}
+    """
+    print("Measuring import times...")
+    imports = check_import_budgets()
+
+    import vectorbt as vbt
+    # Portfolio methods are cached by VectorBT; the memory run would only
+    # measure a cache hit
+    vbt.settings.caching['enabled'] = False
+
+    # Compile Numba/VectorBT kernels for the 1-D and 2-D code paths up front
+    # so the first cases are not charged for JIT compilation
+    benchmark_case(1_000, 1)
+    benchmark_case(1_000, 2)
+
+    results = []
+    for n_bars in bars:
+        for n_columns in columns:
+            if n_bars * n_columns > max_cells:
+                print(f"Skipping {n_bars:,} bars x {n_columns:,} columns (over {max_cells:,} cells)")
+                continue
+            print(f"Benchmarking {n_bars:,} bars x {n_columns:,} columns...")
+            for record in benchmark_case(n_bars, n_columns):
+                results.append(record)
+                print(f"  {record['stage']:<15} {record['wall_seconds'] * 1000:10.1f} ms "
+                      f"{record['peak_memory_mb']:10.1f} MB {record['bars_per_second']:14,.0f} bars/s")
+    return {'environment': environment_info(), 'imports': imports, 'results': results}
+
+
+def compare_results(baseline_file, candidate_file, threshold=1.10):
+    """
+    Print wall-time ratios between two result files and flag regressions.
+
+    Returns:
+    --------
+    int
+        Number of stages slower than threshold x baseline
+    """
+    with open(baseline_file) as f:
+        baseline = json.load(f)
+    with open(candidate_file) as f:
+        candidate = json.load(f)
+
+    key = lambda record: (record['stage'], record['bars'], record['columns'])
+    baseline_times = {key(record): record['wall_seconds'] for record in baseline['results']}
+    print(f"Comparing {baseline['environment']['commit']} -> {candidate['environment']['commit']}")
+
+    regressions = 0
+    for record in candidate['results']:
+        if key(record) not in baseline_times:
+            continue
+        ratio = record['wall_seconds'] / baseline_times[key(record)]
+        flag = ' REGRESSION' if ratio > threshold else ''
+        regressions += bool(flag)
+        print(f"  {record['stage']:<15} {record['bars']:>10,} x {record['columns']:<6,} {ratio:6.2f}x{flag}")
+
+    baseline_imports = {record['module']: record['import_seconds'] for record in baseline.get('imports', [])}
+    for record in candidate.get('imports', []):
+        if record['module'] not in baseline_imports:
+            continue
+        ratio = record['import_seconds'] / baseline_imports[record['module']]
+        flag = ' REGRESSION' if ratio > threshold or not record['passed'] else ''
+        regressions += bool(flag)
+        print(f"  import {record['module']:<28} {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def main():
+    """
+    Run the benchmark suite or compare two result files.
+    """
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the backtesting hot paths")
+    parser.add_argument('--preset', choices=PRESETS, default='quick')
+    parser.add_argument('--max-cells', type=int, default=DEFAULT_MAX_CELLS)
+    parser.add_argument('--output', help="JSON result file (default: timestamped)")
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CANDIDATE'),
+                        help="Compare two result files instead of running")
+    parser.add_argument('--imports', action='store_true',
+                        help="Only check the import-time budgets (exit code 1 if one is exceeded)")
+    args = parser.parse_args()
+
+    if args.compare:
+        raise SystemExit(1 if compare_results(*args.compare) else 0)
+    if args.imports:
+        records = check_import_budgets()
+        raise SystemExit(0 if all(record['passed'] for record in records) else 1)
+
+    preset = PRESETS[args.preset]
+    report = run_suite(preset['bars'], preset['columns'], args.max_cells)
+    output = args.output or f"benchmark_{report['environment']['commit']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Benchmark results saved to: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Fast Chart Rendering for the Stock Analysis Tool
+
+visualize_data in financial_analysis.py builds a new seaborn figure for every
+analysis and draws every daily point, so multi-decade histories open and
+resize slowly. ChartRenderer is the 'fast' render mode instead:
+
+- One Figure and its line artists are created once and reused across analyses;
+  a new analysis only swaps the line data.
+- Each line is downsampled to the pixel width of its axes, keeping the first,
+  last, minimum and maximum point of every pixel column. The drawn line looks
+  the same as the full series, but costs O(width) instead of O(bars) to draw.
+- Lines are animated artists drawn by blitting over a cached background.
+  When the axis limits stay the same, an update only restores the background
+  and redraws the lines. Resizing re-downsamples to the new width.
+"""
+
+import matplotlib.dates as mdates
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+
+# Column -> (axes, line style) of every line the renderer owns
+LINE_STYLES = {
+    'Close': ('price', dict(linewidth=1.5, color='#1f77b4', label='Close Price')),
+    'MA_20': ('price', dict(linewidth=1.5, color='#2ca02c', label='20-Day MA')),
+    'P/E Ratio': ('pe', dict(linewidth=2.5, color='#ff7f0e', label='P/E Ratio')),
+    'epsActual': ('eps', dict(linewidth=1.5, color='#0047AB', linestyle='--', alpha=0.8, label='EPS')),
+}
+
+
+def min_max_downsample(x, y, n_buckets):
+    """
+    Reduce a line to the first, last, minimum and maximum point of each bucket.
+
+    NaN points are dropped first, as visualize_data does with dropna.
+
+    Parameters:
+        x (ndarray): Monotonic x values.
+        y (ndarray): y values aligned with x.
+        n_buckets (int): Number of buckets, normally the axes width in pixels.
+
+    Returns:
+        tuple: (x, y) of at most 4 * n_buckets points in their original order.
+    """
+    valid = ~np.isnan(y)
+    x, y = x[valid], y[valid]
+    n_buckets = max(int(n_buckets), 1)
+    if len(y) <= 4 * n_buckets:
+        return x, y
+
+    bucket_size = -(-len(y) // n_buckets)
+    n_buckets = -(-len(y) // bucket_size)
+    padded = np.full(n_buckets * bucket_size, np.nan)
+    padded[:len(y)] = y
+    buckets = padded.reshape(n_buckets, bucket_size)
+
+    starts = np.arange(n_buckets) * bucket_size
+    ends = np.minimum(starts + bucket_size, len(y)) - 1
+    picks = np.column_stack([starts,
+                             starts + np.nanargmin(buckets, axis=1),
+                             starts + np.nanargmax(buckets, axis=1),
+                             ends])
+    index = np.unique(picks)
+    return x[index], y[index]
+
+
+class ChartRenderer:
+    """
+    Reusable price and P/E/EPS figure with downsampled, blitted lines.
+
+    Parameters:
+        figsize (tuple): Figure size in inches, as in visualize_data.
+    """
+
+    def __init__(self, figsize=(14, 12)):
+        self.figure = Figure(figsize=figsize)
+        price_ax, pe_ax = self.figure.subplots(2, 1)
+        eps_ax = pe_ax.twinx()
+        self.axes = {'price': price_ax, 'pe': pe_ax, 'eps': eps_ax}
+        self.lines = {column: self.axes[ax_name].plot([], [], animated=True, **style)[0]
+                      for column, (ax_name, style) in LINE_STYLES.items()}
+        self._data = {}
+        self._width = None
+        self._background = None
+        self._canvas = None
+
+        price_ax.set_title('Stock Close Price Over Time', pad=20, fontsize=12)
+        price_ax.set_xlabel('Date', fontsize=10)
+        price_ax.set_ylabel('Price', fontsize=10)
+        price_ax.legend(fontsize=9, loc='upper right')
+        price_ax.grid(True, alpha=0.3)
+
+        pe_ax.set_title('Dynamic P/E Ratio and EPS Over Time', pad=20, fontsize=12)
+        pe_ax.set_xlabel('Date', fontsize=10)
+        pe_ax.set_ylabel('P/E Ratio', color='#ff7f0e', fontsize=10)
+        pe_ax.tick_params(axis='y', labelcolor='#ff7f0e')
+        pe_ax.grid(True, alpha=0.2)
+        eps_ax.set_ylabel('EPS', color='#0047AB', fontsize=10)
+        eps_ax.tick_params(axis='y', labelcolor='#0047AB')
+        pe_ax.legend([self.lines['P/E Ratio'], self.lines['epsActual']], ['P/E Ratio', 'EPS'],
+                     loc='upper right', fontsize=9, framealpha=0.9)
+        for ax in self.axes.values():
+            ax.xaxis_date()
+        # Fixed margins instead of tight_layout, which re-measures every label
+        self.figure.subplots_adjust(left=0.06, right=0.94, bottom=0.06, top=0.94, hspace=0.3)
+
+        # Callbacks live on the figure, so they survive attaching new canvases
+        self.figure.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def update(self, df):
+        """
+        Show a new analysis result, redrawing only what changed.
+
+        Parameters:
+            df (DataFrame): Output of the analysis with a 'Date' column and any
+                of the LINE_STYLES columns; missing columns leave their line empty.
+        """
+        x = mdates.date2num(pd.to_datetime(df['Date']).dt.tz_localize(None))
+        self._data = {column: (x, df[column].to_numpy(dtype=float)) for column in LINE_STYLES
+                      if column in df.columns}
+        limits_changed = self._set_limits()
+        self._width = None
+
+        canvas = self.figure.canvas
+        if limits_changed or self._background is None or canvas is not self._canvas:
+            # New ticks and labels: full draw, which blits the lines in _on_draw
+            canvas.draw()
+        else:
+            self._resample()
+            canvas.restore_region(self._background)
+            self._blit_lines()
+
+    def _set_limits(self):
+        """Fit each axes to the full (not downsampled) data; True if any limit changed."""
+        changed = False
+        for ax_name, ax in self.axes.items():
+            series = [self._data[column] for column, (name, _) in LINE_STYLES.items()
+                      if name == ax_name and column in self._data]
+            xs = np.concatenate([x for x, _ in series]) if series else np.array([])
+            ys = np.concatenate([y for _, y in series]) if series else np.array([])
+            finite = np.isfinite(ys)
+            if not finite.any():
+                continue
+            y_min, y_max = ys[finite].min(), ys[finite].max()
+            margin = (y_max - y_min) * 0.05 or abs(y_max) * 0.05 or 1.0
+            limits = ((xs.min(), xs.max()), (y_min - margin, y_max + margin))
+            if limits != (ax.get_xlim(), ax.get_ylim()):
+                ax.set_xlim(*limits[0])
+                ax.set_ylim(*limits[1])
+                changed = True
+        return changed
+
+    def _resample(self):
+        """Downsample every line to the current pixel width of its axes."""
+        width = int(self.axes['price'].bbox.width)
+        if width == self._width:
+            return
+        self._width = width
+        for column, line in self.lines.items():
+            if column in self._data:
+                line.set_data(*min_max_downsample(*self._data[column], width))
+            else:
+                line.set_data([], [])
+
+    def _blit_lines(self):
+        for line in self.lines.values():
+            line.axes.draw_artist(line)
+        self.figure.canvas.blit(self.figure.bbox)
+
+    def _on_draw(self, event):
+        """After a full draw (first paint or resize): cache the background and blit the lines."""
+        canvas = self._canvas = self.figure.canvas
+        self._resample()
+        self._background = canvas.copy_from_bbox(self.figure.bbox)
+        self._blit_lines()
+
+
+_RENDERER = None
+
+
+def get_chart_renderer():
+    """Return the process-wide renderer, creating its figure on first use."""
+    global _RENDERER
+    if _RENDERER is None:
+        _RENDERER = ChartRenderer()
+    return _RENDERER
@@ -0,0 +1,332 @@
+#!/usr/bin/env python
+"""
+Event-Driven Bar Simulation Engine
+
+The vectorized backtester in backtesting.py trades close-to-close on signals,
+so it cannot express stop-losses, limit orders or fills inside a bar's range.
+This engine walks the OHLCV bars one at a time:
+
+1. Resting orders in the order book are matched against the bar's range.
+   Stops are checked before limits (the conservative assumption when both
+   could have filled), and a gap through the price fills at the open.
+2. The strategy's signals act at the bar's close: an exit is a market sell,
+   and an entry is a market buy or a limit buy below the close that rests
+   for limit_ttl bars.
+3. A filled buy places its protective stop-loss and take-profit orders
+   (one-cancels-other), and the position ledger records cash, position and
+   equity.
+
+The order book, fill log and ledger are preallocated NumPy arrays, so the
+loop compiles with Numba (>1M bars per second on one core). Without Numba,
+the same function runs as plain Python.
+
+Strategies only produce entry/exit signals plus order parameters, so
+CrossoverStrategy reuses moving_average_crossover. Without stops and limits
+its results match the vectorized run_backtest, which main() checks.
+
+Dependencies:
+- numpy, pandas
+- numba (optional, for the compiled loop)
+"""
+
+import abc
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Order kinds and sides used in the order book and fill log
+MARKET, LIMIT, STOP = 0, 1, 2
+BUY, SELL = 1, -1
+ORDER_KIND_NAMES = {MARKET: 'market', LIMIT: 'limit', STOP: 'stop'}
+
+
+# Column layout of the order book and fill log arrays
+BOOK_KIND, BOOK_SIDE, BOOK_PRICE, BOOK_CREATED, BOOK_EXPIRY = range(5)
+FILL_BAR, FILL_SIDE, FILL_KIND, FILL_PRICE, FILL_SIZE, FILL_FEE = range(6)
+
+
+def _place_order(book, active, kind, side, price, created, expiry):
+    """Put an order into the first free book slot (dropped if the book is full)."""
+    for slot in range(len(active)):
+        if not active[slot]:
+            active[slot] = True
+            book[slot, BOOK_KIND] = kind
+            book[slot, BOOK_SIDE] = side
+            book[slot, BOOK_PRICE] = price
+            book[slot, BOOK_CREATED] = created
+            book[slot, BOOK_EXPIRY] = expiry
+            return
+
+
+def _record_fill(fills, n_fills, bar, side, kind, price, size, fee):
+    fills[n_fills, FILL_BAR] = bar
+    fills[n_fills, FILL_SIDE] = side
+    fills[n_fills, FILL_KIND] = kind
+    fills[n_fills, FILL_PRICE] = price
+    fills[n_fills, FILL_SIZE] = size
+    fills[n_fills, FILL_FEE] = fee
+    return n_fills + 1
+
+
+if NUMBA_AVAILABLE:
+    _place_order = njit(cache=True)(_place_order)
+    _record_fill = njit(cache=True)(_record_fill)
+
+
+def _simulate(open_, high, low, close, entries, exits, stop_loss, take_profit, limit_offset, limit_ttl,
+              init_cash, fees, book_capacity):
+    """
+    Bar-by-bar simulation of one long-only symbol.
+
+    Returns the ledger as a (bars, 3) array of cash, position and equity, and
+    the fill log as a (fills, 6) array with the FILL_* columns.
+    """
+    n_bars = len(close)
+    ledger = np.empty((n_bars, 3))
+    # At most a buy and a sell fill per bar
+    fills = np.empty((2 * n_bars, 6))
+    n_fills = 0
+    book = np.zeros((book_capacity, 5))
+    active = np.zeros(book_capacity, dtype=np.bool_)
+
+    cash = init_cash
+    position = 0.0
+    for t in range(n_bars):
+        # 1. Match resting orders against this bar; stops first, and never
+        # orders placed on this bar (their intrabar timing is unknown)
+        for kind in (STOP, LIMIT):
+            for slot in range(book_capacity):
+                if not active[slot] or book[slot, BOOK_KIND] != kind or book[slot, BOOK_CREATED] == t:
+                    continue
+                if book[slot, BOOK_EXPIRY] < t:
+                    active[slot] = False
+                    continue
+                side = book[slot, BOOK_SIDE]
+                order_price = book[slot, BOOK_PRICE]
+                price = np.nan
+                if side == SELL and position > 0:
+                    if kind == STOP and low[t] <= order_price:
+                        price = min(open_[t], order_price)
+                    elif kind == LIMIT and high[t] >= order_price:
+                        price = max(open_[t], order_price)
+                elif side == BUY and position == 0 and kind == LIMIT and low[t] <= order_price:
+                    price = min(open_[t], order_price)
+                if np.isnan(price):
+                    continue
+
+                active[slot] = False
+                if side == SELL:
+                    fee = position * price * fees
+                    cash += position * price - fee
+                    n_fills = _record_fill(fills, n_fills, t, SELL, kind, price, position, fee)
+                    position = 0.0
+                    # One-cancels-other: the remaining protective order goes too
+                    active[:] = False
+                else:
+                    position = cash / (price * (1 + fees))
+                    fee = position * price * fees
+                    cash -= position * price + fee
+                    n_fills = _record_fill(fills, n_fills, t, BUY, kind, price, position, fee)
+                    if stop_loss > 0:
+                        _place_order(book, active, STOP, SELL, price * (1 - stop_loss), t, n_bars)
+                    if take_profit > 0:
+                        _place_order(book, active, LIMIT, SELL, price * (1 + take_profit), t, n_bars)
+
+        # 2. Signals act at the close
+        if exits[t]:
+            if position > 0:
+                fee = position * close[t] * fees
+                cash += position * close[t] - fee
+                n_fills = _record_fill(fills, n_fills, t, SELL, MARKET, close[t], position, fee)
+                position = 0.0
+            # Protective orders and pending limit entries are withdrawn
+            active[:] = False
+        elif position == 0 and entries[t]:
+            if limit_offset > 0:
+                _place_order(book, active, LIMIT, BUY, close[t] * (1 - limit_offset), t, t + limit_ttl)
+            else:
+                position = cash / (close[t] * (1 + fees))
+                fee = position * close[t] * fees
+                cash -= position * close[t] + fee
+                n_fills = _record_fill(fills, n_fills, t, BUY, MARKET, close[t], position, fee)
+                if stop_loss > 0:
+                    _place_order(book, active, STOP, SELL, close[t] * (1 - stop_loss), t, n_bars)
+                if take_profit > 0:
+                    _place_order(book, active, LIMIT, SELL, close[t] * (1 + take_profit), t, n_bars)
+
+        # 3. Position ledger
+        ledger[t, 0] = cash
+        ledger[t, 1] = position
+        ledger[t, 2] = cash + position * close[t]
+
+    return ledger, fills[:n_fills]
+
+
+if NUMBA_AVAILABLE:
+    _simulate_compiled = njit(cache=True)(_simulate)
+else:
+    _simulate_compiled = _simulate
+
+
+class Strategy(abc.ABC):
+    """
+    Interface between a signal generator and the event engine.
+
+    Subclasses implement signals(bars); the order parameters apply to every
+    position the signals open.
+
+    Parameters:
+    -----------
+    stop_loss : float
+        Stop-loss distance below the entry fill (0 disables)
+    take_profit : float
+        Take-profit distance above the entry fill (0 disables)
+    limit_offset : float
+        Enter with a limit buy this far below the signal close instead of a
+        market buy at the close (0 disables)
+    limit_ttl : int
+        Bars a limit entry rests in the book before it expires
+    """
+
+    def __init__(self, stop_loss=0.0, take_profit=0.0, limit_offset=0.0, limit_ttl=1):
+        self.stop_loss = stop_loss
+        self.take_profit = take_profit
+        self.limit_offset = limit_offset
+        self.limit_ttl = limit_ttl
+
+    @abc.abstractmethod
+    def signals(self, bars):
+        """
+        Return (entries, exits) boolean arrays aligned with the bars.
+        """
+
+
+class CrossoverStrategy(Strategy):
+    """Moving average crossover signals from backtesting.moving_average_crossover."""
+
+    def __init__(self, fast_window=20, slow_window=50, engine='pandas', **order_params):
+        super().__init__(**order_params)
+        self.fast_window = fast_window
+        self.slow_window = slow_window
+        self.engine = engine
+
+    def signals(self, bars):
+        from backtesting import moving_average_crossover
+
+        entries, exits, _, _ = moving_average_crossover(bars['Close'], self.fast_window, self.slow_window,
+                                                        engine=self.engine)
+        return entries.to_numpy(), exits.to_numpy()
+
+
+def run_event_backtest(bars, strategy, initial_cash=10000, fees=0.001, book_capacity=8):
+    """
+    Simulate a strategy bar by bar with intrabar order matching.
+
+    Parameters:
+    -----------
+    bars : pd.DataFrame
+        OHLCV bars as returned by backtesting.load_data
+    strategy : Strategy
+        Signal generator and order parameters
+    initial_cash : float
+        Initial capital
+    fees : float
+        Trading fee per fill as a fraction of its value
+    book_capacity : int
+        Slots in the order book
+
+    Returns:
+    --------
+    dict
+        'ledger' (cash, position, equity per bar), 'fills' (one row per fill)
+        and 'returns' (equity returns, for calculate_metrics-style analysis)
+    """
+    entries, exits = strategy.signals(bars)
+    columns = [bars[column].to_numpy(dtype=np.float64) for column in ('Open', 'High', 'Low', 'Close')]
+    outputs = _simulate_compiled(*columns, np.asarray(entries, dtype=np.bool_), np.asarray(exits, dtype=np.bool_),
+                                 float(strategy.stop_loss), float(strategy.take_profit),
+                                 float(strategy.limit_offset), int(strategy.limit_ttl),
+                                 float(initial_cash), float(fees), int(book_capacity))
+    ledger, fills = outputs
+
+    ledger = pd.DataFrame(ledger, index=bars.index, columns=['cash', 'position', 'equity'])
+    fills = pd.DataFrame({
+        'date': bars.index[fills[:, FILL_BAR].astype(np.int64)],
+        'side': np.where(fills[:, FILL_SIDE] == BUY, 'buy', 'sell'),
+        'kind': [ORDER_KIND_NAMES[int(kind)] for kind in fills[:, FILL_KIND]],
+        'price': fills[:, FILL_PRICE],
+        'size': fills[:, FILL_SIZE],
+        'fee': fills[:, FILL_FEE],
+    })
+    returns = ledger['equity'].pct_change().fillna(ledger['equity'].iloc[0] / initial_cash - 1)
+    return {'ledger': ledger, 'fills': fills, 'returns': returns.rename('Strategy')}
+
+
+def synthetic_bars(n_bars, seed=42):
+    """Seeded random-walk OHLC bars for throughput measurements."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, n_bars)))
+    open_ = np.r_[close[0], close[:-1]]
+    spread = np.abs(rng.normal(0, 0.0005, n_bars)) * close
+    return pd.DataFrame({'Open': open_, 'High': np.maximum(open_, close) + spread,
+                         'Low': np.minimum(open_, close) - spread, 'Close': close},
+                        index=pd.date_range('2000-01-01', periods=n_bars, freq='min'))
+
+
+def main():
+    """
+    Check the engine against the vectorized backtest, then run it with stops and limits.
+    """
+    from backtesting import load_data, run_backtest
+    from metrics_kernel import compute_stats
+
+    symbol = 'AAPL'
+    start_date = '2019-01-01'
+    end_date = '2022-01-01'
+    initial_cash = 10000
+
+    try:
+        bars = load_data(symbol, start_date, end_date)
+        print(f"Engine backend: {'numba' if NUMBA_AVAILABLE else 'python'}")
+
+        strategy = CrossoverStrategy(20, 50)
+        result = run_event_backtest(bars, strategy, initial_cash)
+        entries, exits = strategy.signals(bars)
+        vectorized = run_backtest(bars['Close'], pd.Series(entries, index=bars.index),
+                                  pd.Series(exits, index=bars.index), initial_cash)
+        matches = np.allclose(result['ledger']['equity'].to_numpy(), vectorized.value().to_numpy())
+        print(f"Market orders only: equity {'matches' if matches else 'DIFFERS FROM'} the vectorized backtest")
+
+        protected = run_event_backtest(bars, CrossoverStrategy(20, 50, stop_loss=0.05, take_profit=0.15,
+                                                               limit_offset=0.01, limit_ttl=3), initial_cash)
+        print("\n==== Fills with stops and limit entries ====")
+        print(protected['fills'].to_string(index=False))
+        stats = compute_stats(pd.concat([result['returns'].rename('market'),
+                                         protected['returns'].rename('stops_and_limits')], axis=1))
+        print(stats.T.to_string(float_format='{:.4f}'.format))
+
+        synthetic = synthetic_bars(5_000_000)
+        synthetic_strategy = CrossoverStrategy(20, 50, engine='kernel', stop_loss=0.01, take_profit=0.02)
+        run_event_backtest(synthetic.iloc[:1000], synthetic_strategy)  # compile before timing
+        entries, exits = synthetic_strategy.signals(synthetic)
+        columns = [synthetic[column].to_numpy() for column in ('Open', 'High', 'Low', 'Close')]
+        start = time.perf_counter()
+        _simulate_compiled(*columns, entries, exits, 0.01, 0.02, 0.0, 1, 10000.0, 0.001, 8)
+        seconds = time.perf_counter() - start
+        print(f"\nEvent loop: {len(synthetic):,} bars in {seconds:.2f} s "
+              f"({len(synthetic) / seconds:,.0f} bar-events per second)")
+    except Exception as e:
+        print(f"Error running event-driven backtest: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,138 @@
-import yfinance as yf
+import argparse
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import numpy as np
 import datetime
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox
-from tkcalendar import DateEntry
 import threading
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from collections import OrderedDict
+# yfinance, matplotlib, seaborn and the chart renderer are imported where
+# they are first needed, so the window (or a headless run) starts without them
+from price_store import NoDataError, get_default_store
 
-def fetch_stock_data(ticker_symbol, period="1y"):
+# Offsets for the period strings offered in the GUI, so period requests can be
+# served from the date-keyed price store
+PERIOD_OFFSETS = {
+    '1mo': pd.DateOffset(months=1),
+    '3mo': pd.DateOffset(months=3),
+    '6mo': pd.DateOffset(months=6),
+    '1y': pd.DateOffset(years=1),
+    '2y': pd.DateOffset(years=2),
+    '5y': pd.DateOffset(years=5),
+    '10y': pd.DateOffset(years=10),
+    'max': pd.DateOffset(years=100),
+}
+
+class TickerCache:
+    """
+    Per-session LRU cache of yf.Ticker objects, ticker validity and EPS history, with a TTL.
+    
+    yf.Ticker objects memoize what they download (earnings dates, history
+    metadata), so handing the same object to validation, fetch_stock_data and
+    fetch_eps_history avoids repeating those requests within a session.
+    """
+    
+    def __init__(self, max_size=256, ttl_seconds=900):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # symbol -> {'created', 'ticker', 'valid', 'eps'}
+        self._lock = threading.Lock()
+    
+    def _entry(self, symbol):
+        """Return the live entry for symbol, creating it if missing or expired."""
+        import yfinance as yf
+        
+        symbol = symbol.upper().strip()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(symbol)
+            if entry is None or now - entry['created'] > self.ttl_seconds:
+                entry = {'created': now, 'ticker': yf.Ticker(symbol), 'valid': None, 'eps': None}
+                self._entries[symbol] = entry
+            self._entries.move_to_end(symbol)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            return entry
+    
+    def get(self, symbol):
+        """Return the cached yf.Ticker for symbol."""
+        return self._entry(symbol)['ticker']
+    
+    def is_valid(self, symbol):
+        """Return the cached validation verdict (True/False), or None if unknown."""
+        return self._entry(symbol)['valid']
+    
+    def set_valid(self, symbol, valid):
+        """Remember whether symbol passed validation until the entry expires."""
+        self._entry(symbol)['valid'] = valid
+    
+    def eps(self, symbol):
+        """Return the cached EPS history of symbol, or None if not fetched yet."""
+        return self._entry(symbol)['eps']
+    
+    def set_eps(self, symbol, eps_df):
+        """Remember the EPS history of symbol until the entry expires."""
+        self._entry(symbol)['eps'] = eps_df
+
+TICKER_CACHE = TickerCache()
+
+def fetch_stock_data(ticker_symbol, period="1y", before_request=None):
     """
     Fetch daily stock data for a given ticker using yfinance.
     
     Parameters:
         ticker_symbol (str): The stock ticker (e.g., 'AAPL').
         period (str): Time period to fetch data (e.g., '1y', '6mo').
+        before_request (callable): Optional hook called before each download
+            (e.g. a rate limiter); data served from the price store skips it.
     
     Returns:
         DataFrame: Historical stock data with a 'Date' column.
+    
+    Raises:
+        NoDataError: If there is no data for the ticker in the period; other
+            failures (network errors, rate limits) raise a plain Exception.
     """
     try:
-        ticker = yf.Ticker(ticker_symbol)
-        df = ticker.history(period=period)
-        if df.empty:
-            raise Exception("No data returned for the ticker. Check the ticker symbol and period.")
+        if period not in PERIOD_OFFSETS:
+            raise Exception(f"Unsupported period: {period}")
+        ticker = TICKER_CACHE.get(ticker_symbol)
+        # End is exclusive, so tomorrow includes today's bar
+        end = pd.Timestamp.now().normalize() + pd.Timedelta(days=1)
+        start = end - pd.Timedelta(days=1) - PERIOD_OFFSETS[period]
+        try:
+            df = get_default_store().load(ticker_symbol, start, end, before_fetch=before_request)
+        except NoDataError:
+            raise NoDataError("No data returned for the ticker. Check the ticker symbol and period.")
         df.reset_index(inplace=True)  # Make sure 'Date' is a column
         return df, ticker
+    except NoDataError:
+        raise
     except Exception as e:
         raise Exception(f"Error fetching stock data: {e}")
 
-def fetch_eps_history(ticker_symbol):
+def fetch_eps_history(ticker_symbol, before_request=None):
     """
     Fetch historical EPS data using yfinance methods for more complete coverage.
     
+    The result is kept in TICKER_CACHE, so repeated lookups within the TTL
+    make no request.
+    
     Parameters:
         ticker_symbol (str): The stock ticker symbol
+        before_request (callable): Optional hook called before the download
+            (e.g. a rate limiter); cached results skip it.
     Returns:
         DataFrame: Historical EPS data with 'Date' and 'epsActual' columns
     """
+    cached = TICKER_CACHE.eps(ticker_symbol)
+    if cached is not None:
+        return cached.copy()
     try:
-        ticker = yf.Ticker(ticker_symbol)
+        ticker = TICKER_CACHE.get(ticker_symbol)
+        if before_request is not None:
+            before_request()
         
         # Try earnings_dates first (historical data)
         earnings_dates = ticker.earnings_dates
@@ -73,42 +164,69 @@ def fetch_eps_history(ticker_symbol):
         
         if eps_df.empty:
             raise Exception("No valid historical EPS data found")
-            
-        return eps_df
+        
+        TICKER_CACHE.set_eps(ticker_symbol, eps_df)
+        return eps_df.copy()
             
     except Exception as e:
         raise Exception(f"Error fetching EPS data: {e}")
 
-def compute_dynamic_pe_ratio(stock_df, eps_df):
+def compute_dynamic_pe_ratio(stock_df, eps_df, ttm=False):
     """
     Merge the EPS history with the stock data and compute a dynamic P/E ratio.
     
+    Every step is columnar: EPS is forward-filled onto the trading days with
+    merge_asof and the ratio is a masked division, so decades of daily data
+    for many tickers are handled without a Python-level loop per row.
+    
     Parameters:
         stock_df (DataFrame): Daily stock data with a 'Date' and 'Close' column.
         eps_df (DataFrame): Quarterly EPS events with 'Date' and 'epsActual'.
+        ttm (bool): Use trailing-twelve-month EPS (sum of the last four reported
+            quarters) instead of the latest quarter's EPS.
+        
+    If both DataFrames have a 'Ticker' column, EPS is matched per ticker, so
+    many tickers can be processed in one call.
         
     Returns:
-        DataFrame: The stock data with additional 'epsActual' and 'P/E Ratio' columns.
+        DataFrame: The stock data with additional 'epsActual' (and 'epsTTM' if
+        ttm is set) and 'P/E Ratio' columns. The ratio is NaN where EPS is
+        missing or zero.
     """
-    # Ensure both DataFrames have timezone-naive datetime
+    by = 'Ticker' if 'Ticker' in stock_df.columns and 'Ticker' in eps_df.columns else None
+    
+    # Ensure both DataFrames have timezone-naive datetimes of the same unit,
+    # which merge_asof requires; the small EPS frame is the one converted
     stock_df = stock_df.copy()
     stock_df['Date'] = pd.to_datetime(stock_df['Date']).dt.tz_localize(None)
+    if not stock_df['Date'].is_monotonic_increasing:
+        stock_df = stock_df.sort_values('Date')
+    eps_df = eps_df[[col for col in ('Date', 'Ticker', 'epsActual') if col in eps_df.columns]].copy()
+    eps_df['Date'] = pd.to_datetime(eps_df['Date']).dt.tz_localize(None).astype(stock_df['Date'].dtype)
+    eps_df = eps_df.sort_values('Date')
     
-    # Filter eps_df to include one entry before start_date (if exists) plus all entries during the period
-    mask = (eps_df['Date'] <= eps_df['Date'].max())
-    filtered_eps = eps_df[mask].copy()
+    eps_column = 'epsActual'
+    if ttm:
+        # Sum of the current and three previous quarters; grouped shifts stay
+        # vectorized, and a missing quarter (or fewer than four) yields NaN
+        quarters = eps_df.groupby(by)['epsActual'] if by else eps_df['epsActual']
+        eps_df['epsTTM'] = eps_df['epsActual'] + sum(quarters.shift(lag) for lag in (1, 2, 3))
+        eps_column = 'epsTTM'
     
-    # Merge stock data with EPS events
-    merged_df = pd.merge_asof(stock_df.sort_values('Date'),
-                             filtered_eps.sort_values('Date'),
-                             on='Date',
-                             direction='backward')
+    # Carry each EPS event forward onto the following trading days
+    merged_df = pd.merge_asof(stock_df,
+                              eps_df,
+                              on='Date',
+                              by=by,
+                              direction='backward')
     
-    # Compute P/E ratio where epsActual is valid and non-zero
-    merged_df['P/E Ratio'] = merged_df.apply(
-        lambda row: row['Close'] / row['epsActual'] if pd.notnull(row['epsActual']) and row['epsActual'] != 0 else None,
-        axis=1
-    )
+    # Masked division: NaN wherever EPS is missing or zero
+    close = merged_df['Close'].to_numpy(dtype=float)
+    eps = merged_df[eps_column].to_numpy(dtype=float)
+    valid = np.isfinite(eps) & (eps != 0)
+    pe_ratio = np.full(len(merged_df), np.nan)
+    np.divide(close, eps, out=pe_ratio, where=valid)
+    merged_df['P/E Ratio'] = pe_ratio
     
     return merged_df
 
@@ -145,24 +263,12 @@ def compute_moving_average(df, window=20):
     df[f'MA_{window}'] = df['Close'].rolling(window=window).mean()
     return df
 
-def visualize_data(df, root_window):
+def build_full_figure(df):
     """
-    Generate visualizations in a maximized window with control buttons.
+    Build the price and P/E/EPS figure with seaborn, drawing every data point.
     """
-    # Create a new window for the plot
-    plot_window = tk.Toplevel(root_window)
-    plot_window.title("Stock Analysis Results")
-    
-    # Add protocol handler for window close button
-    plot_window.protocol("WM_DELETE_WINDOW", lambda: [plot_window.destroy(), root_window.quit()])
-    
-    # Make window maximized
-    plot_window.state('zoomed')  # Windows
-    # plot_window.attributes('-zoomed', True)  # Linux
-    
-    # Create main frame
-    main_frame = ttk.Frame(plot_window)
-    main_frame.pack(fill='both', expand=True)
+    import matplotlib.pyplot as plt
+    import seaborn as sns
     
     # Create matplotlib figure
     fig = plt.figure(figsize=(14, 12))
@@ -233,11 +339,70 @@ def visualize_data(df, root_window):
     
     # Adjust layout
     plt.tight_layout()
+    return fig
+
+# Plot window of the 'fast' render mode and its Tk canvas. The window is hidden
+# between analyses instead of destroyed, so the canvas and the renderer's cached
+# background are reused and an update can blit instead of redrawing everything.
+_fast_plot = None
+
+def visualize_data(df, root_window, render_mode='full'):
+    """
+    Generate visualizations in a maximized window with control buttons.
     
-    # Create canvas
-    canvas = FigureCanvasTkAgg(fig, master=main_frame)
+    render_mode 'full' draws every point with seaborn; 'fast' reuses one
+    downsampled, blitted figure (see chart_renderer.py) in one window, so
+    multi-decade histories open and resize quickly.
+    """
+    global _fast_plot
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    
+    if render_mode == 'fast':
+        from chart_renderer import get_chart_renderer
+        renderer = get_chart_renderer()
+        if _fast_plot is None or not _fast_plot.winfo_exists():
+            _fast_plot, main_frame = create_plot_window(root_window)
+            canvas = FigureCanvasTkAgg(renderer.figure, master=main_frame)
+            canvas.get_tk_widget().pack(fill='both', expand=True)
+            add_plot_controls(_fast_plot, main_frame, root_window, keep=True)
+        else:
+            _fast_plot.deiconify()
+            _fast_plot.state('zoomed')
+        renderer.update(df)
+        return
+    
+    plot_window, main_frame = create_plot_window(root_window)
+    canvas = FigureCanvasTkAgg(build_full_figure(df), master=main_frame)
     canvas.draw()
     canvas.get_tk_widget().pack(fill='both', expand=True)
+    add_plot_controls(plot_window, main_frame, root_window)
+
+def create_plot_window(root_window):
+    """
+    Create the maximized results window and its main frame.
+    """
+    plot_window = tk.Toplevel(root_window)
+    plot_window.title("Stock Analysis Results")
+    
+    # Add protocol handler for window close button
+    plot_window.protocol("WM_DELETE_WINDOW", lambda: [plot_window.destroy(), root_window.quit()])
+    
+    # Make window maximized
+    plot_window.state('zoomed')  # Windows
+    # plot_window.attributes('-zoomed', True)  # Linux
+    
+    # Create main frame
+    main_frame = ttk.Frame(plot_window)
+    main_frame.pack(fill='both', expand=True)
+    return plot_window, main_frame
+
+def add_plot_controls(plot_window, main_frame, root_window, keep=False):
+    """
+    Add the control buttons below the chart and center the window.
+    
+    With keep, "Analyze Another Stock" hides the window instead of destroying it.
+    """
+    close_window = plot_window.withdraw if keep else plot_window.destroy
     
     # Create button frame
     button_frame = ttk.Frame(main_frame)
@@ -247,7 +412,7 @@ def visualize_data(df, root_window):
     ttk.Button(
         button_frame,
         text="Analyze Another Stock",
-        command=lambda: [plot_window.destroy(), root_window.deiconify()],
+        command=lambda: [close_window(), root_window.deiconify()],
         style='Accent.TButton'
     ).pack(side='left', padx=5)
     
@@ -272,6 +437,8 @@ class StockAnalysisGUI:
         self.root.title("Stock Analysis Tool")
         self.root.geometry("400x500")
         self.root.configure(bg='#f0f0f0')
+        # 'fast' reuses one downsampled figure; 'full' redraws every point with seaborn
+        self.render_mode = 'fast'
         
         # Center the main window
         self.center_window(self.root)
@@ -374,7 +541,15 @@ class StockAnalysisGUI:
             text="Analyze Stock",
             command=self.validate_and_analyze,
             style='Accent.TButton'
-        ).pack(pady=20)
+        ).pack(pady=(20, 5))
+
+        # Screener Button (comma-separated tickers in the entry)
+        ttk.Button(
+            self.root,
+            text="Screen Watchlist",
+            command=self.open_screener,
+            style='Accent.TButton'
+        ).pack(pady=5)
 
     def setup_loading_window(self):
         self.loading_window = tk.Toplevel(self.root)
@@ -419,26 +594,38 @@ class StockAnalysisGUI:
         self.progress.pack(pady=20)
         self.progress.start(10)
 
-    def validate_ticker(self, ticker):
-        try:
-            ticker = ticker.upper().strip()
-            stock = yf.Ticker(ticker)
-            # Try to get info to validate ticker
-            info = stock.info
-            return True, ticker
-        except:
+    def validate_ticker(self, ticker, period="1y"):
+        """
+        Validate a ticker by loading the price history the analysis needs.
+        
+        Runs on the analysis thread. The history lands in the price store and
+        the verdict in TICKER_CACHE, so the analysis itself and repeated
+        lookups of the same ticker need no further network round-trip.
+        
+        Only a definite "no data" answer is cached as invalid. Connection
+        errors, timeouts and rate limits propagate to the caller (and from
+        there to show_error), so a retry checks the ticker again.
+        """
+        ticker = ticker.upper().strip()
+        if not ticker:
             return False, None
+        is_valid = TICKER_CACHE.is_valid(ticker)
+        if is_valid is None:
+            try:
+                fetch_stock_data(ticker, period)
+                is_valid = True
+            except NoDataError:
+                is_valid = False
+            TICKER_CACHE.set_valid(ticker, is_valid)
+        return is_valid, (ticker if is_valid else None)
 
     def validate_and_analyze(self):
         ticker = self.ticker_entry.get().strip()
         
-        # Validate ticker
-        is_valid, validated_ticker = self.validate_ticker(ticker)
-        if not is_valid:
-            messagebox.showerror(
-                "Invalid Ticker",
-                "Please enter a valid stock ticker symbol."
-            )
+        # Only the cheap check happens on the Tk thread; network validation
+        # is deferred to the analysis thread so the UI never freezes
+        if not ticker:
+            self.show_invalid_ticker()
             return
 
         # Show loading window
@@ -447,13 +634,39 @@ class StockAnalysisGUI:
         # Start analysis in a separate thread
         thread = threading.Thread(
             target=self.run_analysis,
-            args=(validated_ticker, self.period_var.get())
+            args=(ticker, self.period_var.get())
         )
         thread.daemon = True
         thread.start()
 
+    def show_invalid_ticker(self):
+        if hasattr(self, 'loading_window') and self.loading_window.winfo_exists():
+            self.loading_window.destroy()
+        messagebox.showerror(
+            "Invalid Ticker",
+            "Please enter a valid stock ticker symbol."
+        )
+
+    def open_screener(self):
+        tickers = [t for t in self.ticker_entry.get().replace(',', ' ').split() if t]
+        if not tickers:
+            messagebox.showerror(
+                "No Tickers",
+                "Enter one or more ticker symbols separated by commas."
+            )
+            return
+
+        # Imported here because stock_screener itself imports this module
+        from stock_screener import ScreenerWindow
+        ScreenerWindow(self.root, tickers, self.period_var.get())
+
     def run_analysis(self, ticker, period):
         try:
+            is_valid, ticker = self.validate_ticker(ticker, period)
+            if not is_valid:
+                self.root.after(0, self.show_invalid_ticker)
+                return
+            
             # Run the existing analysis code
             stock_df, ticker_obj = fetch_stock_data(ticker, period)
             eps_df = fetch_eps_history(ticker)
@@ -467,12 +680,13 @@ class StockAnalysisGUI:
             self.root.after(0, self.show_results, stock_df)
             
         except Exception as e:
-            self.root.after(0, lambda: self.show_error(str(e)))
+            # Pass the message now: e is unbound once the except block ends
+            self.root.after(0, self.show_error, str(e))
 
     def show_results(self, stock_df):
         self.loading_window.destroy()
         self.root.withdraw()  # Hide main window while showing plot
-        visualize_data(stock_df, self.root)
+        visualize_data(stock_df, self.root, self.render_mode)
 
     def show_error(self, error_message):
         self.loading_window.destroy()
@@ -518,7 +732,35 @@ class StockAnalysisGUI:
     def run(self):
         self.root.mainloop()
 
-def main():
+def print_summary(ticker, period):
+    """
+    Print the analysis of one ticker without opening the GUI or importing any plotting library.
+    """
+    stock_df, _ = fetch_stock_data(ticker, period)
+    stock_df = compute_moving_average(stock_df, window=20)
+    print(f"{ticker.upper()} over {period} ({len(stock_df)} trading days)")
+    print(f"Last Close: {stock_df['Close'].iloc[-1]:.2f}")
+    print(f"20-day MA: {stock_df['MA_20'].iloc[-1]:.2f}")
+    print(f"ROI: {compute_roi(stock_df):.2%}")
+    print(f"Volatility (annualized): {compute_volatility(stock_df):.2%}")
+    try:
+        stock_df = compute_dynamic_pe_ratio(stock_df, fetch_eps_history(ticker))
+        print(f"P/E Ratio: {stock_df['P/E Ratio'].dropna().iloc[-1]:.2f}")
+    except Exception as e:
+        print(f"P/E Ratio unavailable: {str(e)}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stock analysis tool; opens the GUI unless a ticker is given")
+    parser.add_argument('ticker', nargs='?', help="Print this ticker's analysis instead of opening the GUI")
+    parser.add_argument('--period', choices=PERIOD_OFFSETS, default='1y')
+    args = parser.parse_args(argv)
+    
+    if args.ticker:
+        try:
+            print_summary(args.ticker, args.period)
+        except Exception as e:
+            print(f"Error analyzing {args.ticker}: {str(e)}")
+        return
     app = StockAnalysisGUI()
     app.run()
 
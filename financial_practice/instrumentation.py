@@ -0,0 +1,247 @@
+"""
+Stage-Level Instrumentation for the Backtest Pipeline
+
+Wrap each pipeline stage in a profiler context manager (or decorate a
+function) to record:
+
+- wall time and CPU time (process-wide, so time spent in worker threads
+  counts too)
+- rows processed, when the stage reports them
+- peak resident memory of the process after the stage, and how much the stage
+  raised it
+
+Optionally, each stage is run under cProfile and its stats are dumped to
+<output_dir>/<stage>.prof (view them with `python -m pstats` or snakeviz).
+Records can be printed, exported as JSON, or exported in Chrome trace format
+(open in chrome://tracing or https://ui.perfetto.dev).
+
+A disabled profiler returns one shared no-op context manager, so leaving the
+stages instrumented costs a method call per stage.
+
+Usage:
+profiler = Profiler.from_env()   # BACKTEST_PROFILE=1 or BACKTEST_PROFILE=cprofile
+with profiler.stage('load') as stage:
+    data = load_data(...)
+    stage['rows'] = len(data)
+profiler.print_summary()
+
+Environment variables:
+- BACKTEST_PROFILE: '1' records timings, 'cprofile' also dumps cProfile stats
+- BACKTEST_PROFILE_DIR: directory for the exports and .prof files (default: .)
+"""
+
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None if unavailable."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        return peak / 1024 ** 2 if os.uname().sysname == 'Darwin' else peak / 1024
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 1024 ** 2
+    except (ImportError, AttributeError):
+        return None
+
+
+class _NullStage:
+    """Shared no-op stage used while profiling is disabled."""
+
+    def __init__(self):
+        self._record = {}
+
+    def __enter__(self):
+        return self._record
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    """Context manager measuring one stage and appending its record to the profiler."""
+
+    def __init__(self, profiler, name, rows):
+        self.profiler = profiler
+        self.record = {'stage': name, 'rows': rows}
+        self._profile = None
+
+    def __enter__(self):
+        self.record['depth'] = self.profiler._enter()
+        self._rss_before = peak_rss_mb()
+        if self.profiler.cprofile:
+            self._profile = cProfile.Profile()
+            try:
+                self._profile.enable()
+            except ValueError:
+                # Another profiler (e.g. an enclosing stage) is already active
+                self._profile = None
+        self._cpu_start = time.process_time()
+        self._wall_start = time.perf_counter()
+        return self.record
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        wall_end = time.perf_counter()
+        cpu_end = time.process_time()
+        if self._profile is not None:
+            self._profile.disable()
+            path = os.path.join(self.profiler.output_dir, f"{self.record['stage']}.prof")
+            self._profile.dump_stats(path)
+            self.record['profile'] = path
+        rss_after = peak_rss_mb()
+        self.record.update({
+            'start_seconds': self._wall_start - self.profiler.origin,
+            'wall_seconds': wall_end - self._wall_start,
+            'cpu_seconds': cpu_end - self._cpu_start,
+            'peak_rss_mb': rss_after,
+            'rss_growth_mb': None if rss_after is None else rss_after - self._rss_before,
+            'thread': threading.get_ident(),
+            'status': 'error' if exc_type else 'ok',
+        })
+        self.profiler._exit(self.record)
+        return False
+
+
+class Profiler:
+    """
+    Collects per-stage timing and memory records.
+
+    Parameters:
+    -----------
+    enabled : bool
+        False makes every stage a no-op
+    cprofile : bool
+        Run each stage under cProfile and dump its stats
+    output_dir : str
+        Directory for .prof files and exports
+    """
+
+    def __init__(self, enabled=True, cprofile=False, output_dir='.'):
+        self.enabled = enabled
+        self.cprofile = enabled and cprofile
+        self.output_dir = output_dir
+        self.origin = time.perf_counter()
+        self.records = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        if self.cprofile:
+            os.makedirs(output_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls):
+        """Profiler configured from BACKTEST_PROFILE and BACKTEST_PROFILE_DIR."""
+        mode = os.environ.get('BACKTEST_PROFILE', '').lower()
+        return cls(enabled=mode not in ('', '0', 'false'), cprofile=mode == 'cprofile',
+                   output_dir=os.environ.get('BACKTEST_PROFILE_DIR', '.'))
+
+    def stage(self, name, rows=None):
+        """
+        Context manager measuring one stage; set record['rows'] inside it if
+        the row count is only known afterwards.
+        """
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name, rows)
+
+    def timed(self, name=None):
+        """Decorator recording every call of a function as a stage."""
+        def decorator(func):
+            stage_name = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(stage_name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _enter(self):
+        depth = getattr(self._local, 'depth', 0)
+        self._local.depth = depth + 1
+        return depth
+
+    def _exit(self, record):
+        self._local.depth -= 1
+        with self._lock:
+            self.records.append(record)
+
+    def summary(self):
+        """
+        Returns:
+        --------
+        pd.DataFrame
+            One row per finished stage, in start order
+        """
+        columns = ['stage', 'depth', 'wall_seconds', 'cpu_seconds', 'rows', 'peak_rss_mb', 'rss_growth_mb',
+                   'status']
+        if not self.records:
+            return pd.DataFrame(columns=columns)
+        summary = pd.DataFrame(self.records).sort_values('start_seconds')[columns].reset_index(drop=True)
+        summary['rows'] = summary['rows'].astype('Int64')
+        return summary
+
+    def print_summary(self):
+        if not self.enabled:
+            return
+        summary = self.summary()
+        summary['stage'] = ['  ' * depth + stage for stage, depth in zip(summary['stage'], summary['depth'])]
+        print("\n==== Stage Timings ====")
+        print(summary.drop(columns='depth').to_string(index=False, float_format='{:.3f}'.format))
+
+    def to_json(self, path):
+        """Write every record plus run metadata as JSON."""
+        with open(path, 'w') as f:
+            json.dump({'created_at': datetime.now().isoformat(timespec='seconds'), 'pid': os.getpid(),
+                       'stages': sorted(self.records, key=lambda record: record['start_seconds'])},
+                      f, indent=2, default=str)
+        return path
+
+    def to_chrome_trace(self, path):
+        """Write the stages as complete ('X') events of the Chrome trace format."""
+        events = [{
+            'name': record['stage'],
+            'ph': 'X',
+            'ts': record['start_seconds'] * 1e6,
+            'dur': record['wall_seconds'] * 1e6,
+            'pid': os.getpid(),
+            'tid': record['thread'],
+            'args': {key: record[key] for key in ('cpu_seconds', 'rows', 'peak_rss_mb', 'rss_growth_mb', 'status')},
+        } for record in self.records]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        return path
+
+    def export(self):
+        """
+        Write the JSON and Chrome trace files to output_dir with a timestamp.
+
+        Returns:
+        --------
+        list of str
+            Written paths (empty while disabled)
+        """
+        if not self.enabled:
+            return []
+        os.makedirs(self.output_dir, exist_ok=True)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        paths = [self.to_json(os.path.join(self.output_dir, f"profile_{timestamp}.json")),
+                 self.to_chrome_trace(os.path.join(self.output_dir, f"trace_{timestamp}.json"))]
+        print(f"Stage timings saved to: {', '.join(paths)}")
+        return paths
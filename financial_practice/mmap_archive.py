@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+"""
+Memory-Mapped Columnar Price Archive
+
+load_data returns a fully materialized pandas frame per symbol. For minute bars
+over 10+ years and thousands of symbols, that does not fit in RAM. MmapArchive
+instead stores every OHLCV column of a symbol as a raw NumPy file and
+memory-maps it on read:
+
+- A date window is located by binary search on the memory-mapped index and
+  returned as a view. Only the pages that are actually read are loaded, and
+  nothing is copied.
+- MmapArchive.load has the same signature as PriceStore.load, so
+  backtesting.load_data(symbol, start, end, store=archive) works unchanged.
+- chunked_crossover computes crossover signals over windows of a fixed
+  number of bars. The rolling sums carry over from chunk to chunk
+  (signal_kernels.CrossoverStream), so the result is bit-identical to one
+  pass over the whole history; test_mmap_archive.py checks it on tied prices.
+
+Layout: <root>/<SYMBOL>/Date.i8 (int64 nanoseconds), <Column>.f8 (float64)
+and meta.json with the committed bar count. Appends write the column files
+first and meta.json last, so an interrupted append is ignored and truncated on
+the next write.
+
+Dependencies:
+- numpy, pandas
+"""
+
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from price_store import OHLCV_COLUMNS, NoDataError, get_default_store
+
+
+class MmapArchive:
+    """
+    Per-symbol memory-mapped OHLCV column files with zero-copy date windows.
+
+    Parameters:
+    -----------
+    root : str
+        Archive directory (created if missing)
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._maps = {}
+        os.makedirs(root, exist_ok=True)
+
+    def symbols(self):
+        """Symbols with at least one archived bar."""
+        return sorted(name for name in os.listdir(self.root) if self.length(name) > 0)
+
+    def length(self, symbol):
+        """Number of committed bars of symbol (0 if it is not archived)."""
+        meta_path = os.path.join(self.root, symbol.upper(), 'meta.json')
+        if not os.path.exists(meta_path):
+            return 0
+        with open(meta_path) as f:
+            return json.load(f)['length']
+
+    def append(self, symbol, frame):
+        """
+        Append OHLCV bars after the last archived bar.
+
+        Bars at or before the last archived timestamp are skipped, so
+        overlapping downloads can be appended as they are. Only the new bars
+        are written; existing data is never rewritten.
+
+        Parameters:
+        -----------
+        symbol : str
+            Ticker symbol
+        frame : pd.DataFrame
+            Bars indexed by timestamp with OHLCV columns (see price_store.normalize_ohlcv)
+
+        Returns:
+        --------
+        int
+            Number of bars appended
+        """
+        symbol = symbol.upper()
+        symbol_dir = os.path.join(self.root, symbol)
+        os.makedirs(symbol_dir, exist_ok=True)
+        length = self.length(symbol)
+
+        index = pd.DatetimeIndex(frame.index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        timestamps = index.as_unit('ns').asi8
+        order = np.argsort(timestamps, kind='stable')
+        timestamps = timestamps[order]
+        if length:
+            keep = timestamps > self._map(symbol, 'Date', length)[-1].astype(np.int64)
+            order, timestamps = order[keep], timestamps[keep]
+        if not len(timestamps):
+            return 0
+
+        columns = {'Date': timestamps}
+        for column in OHLCV_COLUMNS:
+            values = frame[column].to_numpy(dtype=np.float64) if column in frame else np.full(len(frame), np.nan)
+            columns[column] = values[order]
+        for column, values in columns.items():
+            path = self._path(symbol, column)
+            # Drop the tail of an interrupted append before writing after it
+            if os.path.exists(path):
+                os.truncate(path, length * 8)
+            with open(path, 'ab') as f:
+                f.write(np.ascontiguousarray(values).tobytes())
+
+        with open(os.path.join(symbol_dir, 'meta.json'), 'w') as f:
+            json.dump({'length': length + len(timestamps), 'columns': list(columns)}, f)
+        self._maps.pop(symbol, None)
+        return len(timestamps)
+
+    def import_from_store(self, symbols, start, end, store=None):
+        """
+        Copy bars from a PriceStore into the archive.
+
+        Returns:
+        --------
+        dict
+            {symbol: error message} for symbols that could not be loaded
+        """
+        store = store or get_default_store()
+        frames, errors = store.load_many(symbols, start, end)
+        for symbol, frame in frames.items():
+            self.append(symbol, frame)
+        return errors
+
+    def window_bounds(self, symbol, start=None, end=None):
+        """Positional [first, last) bounds of the bars in [start, end)."""
+        symbol = symbol.upper()
+        dates = self._map(symbol, 'Date')
+        first = 0 if start is None else int(np.searchsorted(dates, np.datetime64(pd.Timestamp(start), 'ns')))
+        last = len(dates) if end is None else int(np.searchsorted(dates, np.datetime64(pd.Timestamp(end), 'ns')))
+        return first, last
+
+    def load(self, symbol, start=None, end=None, columns=OHLCV_COLUMNS):
+        """
+        Return the bars of symbol in [start, end) as a frame of memory-mapped views.
+
+        The frame is read-only and shares memory with the archive files; call
+        .copy() on it (or a slice of it) to get an in-memory frame.
+        """
+        symbol = symbol.upper()
+        first, last = self.window_bounds(symbol, start, end)
+        if first >= last:
+            raise NoDataError(f"No data found for {symbol} in the specified date range")
+        return self._window(symbol, first, last, columns)
+
+    def iter_chunks(self, symbol, start=None, end=None, chunk_bars=1_000_000, overlap=0, columns=('Close',)):
+        """
+        Yield (offset, frame) windows of at most chunk_bars new bars each.
+
+        Every window also includes the `overlap` bars before it (for
+        indicator warm-up); offset is the number of those leading bars.
+        """
+        symbol = symbol.upper()
+        first, last = self.window_bounds(symbol, start, end)
+        for chunk_start in range(first, last, chunk_bars):
+            lead_start = max(first, chunk_start - overlap)
+            chunk_end = min(chunk_start + chunk_bars, last)
+            yield chunk_start - lead_start, self._window(symbol, lead_start, chunk_end, columns)
+
+    def _window(self, symbol, first, last, columns):
+        """Frame of memory-mapped views over bars [first, last)."""
+        index = pd.DatetimeIndex(self._map(symbol, 'Date')[first:last], copy=False, name='Date')
+        return pd.DataFrame({column: self._map(symbol, column)[first:last] for column in columns},
+                            index=index, copy=False)
+
+    def _path(self, symbol, column):
+        return os.path.join(self.root, symbol, f"{column}.{'i8' if column == 'Date' else 'f8'}")
+
+    def _map(self, symbol, column, length=None):
+        """Memory-map one column, reusing the map until the next append."""
+        maps = self._maps.setdefault(symbol, {})
+        if column not in maps:
+            length = self.length(symbol) if length is None else length
+            dtype = 'datetime64[ns]' if column == 'Date' else np.float64
+            if length == 0:
+                maps[column] = np.empty(0, dtype=dtype)
+            else:
+                maps[column] = np.memmap(self._path(symbol, column), dtype=dtype, mode='r', shape=(length,))
+        return maps[column]
+
+
+def chunked_crossover(archive, symbol, fast_window, slow_window, start=None, end=None, chunk_bars=1_000_000):
+    """
+    Crossover entries/exits over an archived history, one chunk in memory at a time.
+
+    The moving averages continue across chunk boundaries with the same
+    rounding as one pass (see signal_kernels.CrossoverStream), so the signals
+    equal those of moving_average_crossover over the whole window, ties
+    included. Without Numba the kernel runs as plain Python and is slow.
+
+    Returns:
+    --------
+    tuple
+        (entries, exits) - boolean Series indexed like archive.load(symbol, start, end)
+    """
+    from signal_kernels import CrossoverStream
+
+    first, last = archive.window_bounds(symbol, start, end)
+    entries = np.zeros(last - first, dtype=np.bool_)
+    exits = np.zeros(last - first, dtype=np.bool_)
+    stream = CrossoverStream(fast_window, slow_window)
+    position = 0
+    for _, window in archive.iter_chunks(symbol, start, end, chunk_bars):
+        chunk_entries, chunk_exits, _, _ = stream.update(window['Close'].to_numpy())
+        entries[position:position + len(window)] = chunk_entries
+        exits[position:position + len(window)] = chunk_exits
+        position += len(window)
+
+    index = archive.load(symbol, start, end, columns=()).index
+    return pd.Series(entries, index=index, name=symbol), pd.Series(exits, index=index, name=symbol)
+
+
+def main():
+    """
+    Archive symbols from the price store and backtest them from memory-mapped data.
+    """
+    from backtesting import load_data, moving_average_crossover, run_backtest
+
+    symbols = [symbol.upper() for symbol in sys.argv[1:]] or ['AAPL', 'MSFT']
+    start_date = '2019-01-01'
+    end_date = '2022-01-01'
+    archive = MmapArchive(os.environ.get('MMAP_ARCHIVE_DIR', 'price_archive'))
+
+    try:
+        errors = archive.import_from_store(symbols, start_date, end_date)
+        for symbol, error in errors.items():
+            print(f"Error archiving {symbol}: {error}")
+
+        for symbol in archive.symbols():
+            if symbol not in symbols:
+                continue
+            close_prices = load_data(symbol, start_date, end_date, store=archive)['Close']
+            start = time.perf_counter()
+            entries, exits = chunked_crossover(archive, symbol, 20, 50, start_date, end_date, chunk_bars=250)
+            chunk_seconds = time.perf_counter() - start
+            reference_entries, reference_exits, _, _ = moving_average_crossover(close_prices, 20, 50)
+            identical = entries.equals(reference_entries) and exits.equals(reference_exits)
+
+            portfolio = run_backtest(close_prices, entries, exits)
+            print(f"{symbol}: {len(close_prices)} bars, chunked signals "
+                  f"{'identical' if identical else 'MISMATCH'} ({chunk_seconds * 1000:.1f} ms), "
+                  f"total return {portfolio.total_return():.2%}")
+    except Exception as e:
+        print(f"Error running archive backtest: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+"""
+Parameter-Grid Sweep for the Moving Average Crossover Strategy
+
+This script evaluates every (fast, slow) window pair of a parameter grid in a
+single vectorized pass instead of re-running the whole backtest pipeline once
+per pair. Each unique window's moving average is computed only once, the
+crossover signals for all pairs are built as 2-D boolean matrices, and the
+matrices are fed to one multi-column VectorBT portfolio.
+
+The result is a ranked metrics table (Sharpe ratio, total return, maximum
+drawdown, win rate and trade count), one row per window pair.
+
+Dependencies:
+- vectorbt, pandas, numpy (see backtesting.py)
+"""
+
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+from backtesting import load_data, run_backtest
+
+
+def build_parameter_grid(fast_windows, slow_windows):
+    """
+    Build the list of valid (fast, slow) window pairs.
+
+    Pairs where the fast window is not strictly shorter than the slow window
+    are dropped, since they do not describe a crossover strategy.
+
+    Parameters:
+    -----------
+    fast_windows : iterable of int
+        Candidate window sizes for the fast moving average
+    slow_windows : iterable of int
+        Candidate window sizes for the slow moving average
+
+    Returns:
+    --------
+    list of tuple
+        Valid (fast_window, slow_window) pairs
+    """
+    return [(int(fast), int(slow))
+            for fast in fast_windows
+            for slow in slow_windows
+            if fast < slow]
+
+
+def compute_moving_averages(close_prices, windows):
+    """
+    Compute the rolling mean of the close prices once per unique window.
+
+    Parameters:
+    -----------
+    close_prices : pd.Series
+        Series of closing prices
+    windows : iterable of int
+        Window sizes to compute
+
+    Returns:
+    --------
+    pd.DataFrame
+        One column per window, indexed like close_prices
+    """
+    # pandas rolling is used so the values match moving_average_crossover exactly
+    return pd.DataFrame(
+        {window: close_prices.rolling(window=window).mean() for window in sorted(set(windows))},
+        index=close_prices.index
+    )
+
+
+def crossover_signal_matrix(ma_table, pairs):
+    """
+    Build entry and exit signal matrices for many window pairs at once.
+
+    The signals follow the same rules as moving_average_crossover, but are
+    derived from the sign of (fast MA - slow MA) so only one float matrix is
+    allocated per chunk instead of four shifted copies.
+
+    Parameters:
+    -----------
+    ma_table : pd.DataFrame
+        Moving averages, one column per window (see compute_moving_averages)
+    pairs : list of tuple
+        (fast_window, slow_window) pairs, one output column each
+
+    Returns:
+    --------
+    tuple
+        (entries, exits) - Boolean DataFrames with a (fast_window, slow_window) column index
+    """
+    column_lookup = {window: i for i, window in enumerate(ma_table.columns)}
+    fast_idx = np.array([column_lookup[fast] for fast, _ in pairs])
+    slow_idx = np.array([column_lookup[slow] for _, slow in pairs])
+
+    ma_values = ma_table.to_numpy(dtype=np.float64)
+    diff = ma_values[:, fast_idx] - ma_values[:, slow_idx]
+
+    # Previous bar's difference; the first row has no history, so NaN makes
+    # every comparison False just like Series.shift(1) does
+    prev_diff = np.empty_like(diff)
+    prev_diff[0] = np.nan
+    prev_diff[1:] = diff[:-1]
+
+    entries = (diff > 0) & (prev_diff <= 0)
+    exits = (diff < 0) & (prev_diff >= 0)
+
+    columns = pd.MultiIndex.from_tuples(pairs, names=['fast_window', 'slow_window'])
+    return (pd.DataFrame(entries, index=ma_table.index, columns=columns),
+            pd.DataFrame(exits, index=ma_table.index, columns=columns))
+
+
+def summarize_portfolio(portfolio):
+    """
+    Collect the ranking metrics of a multi-column portfolio into one table.
+
+    Parameters:
+    -----------
+    portfolio : vbt.Portfolio
+        Multi-column portfolio object from run_backtest
+
+    Returns:
+    --------
+    pd.DataFrame
+        One row per portfolio column (or group, for grouped portfolios)
+    """
+    # Single-column portfolios return scalars; indexing by the wrapper's
+    # columns gives a one-row table in that case as well
+    metrics = pd.DataFrame({
+        'sharpe_ratio': portfolio.sharpe_ratio(),
+        'total_return': portfolio.total_return(),
+        'max_drawdown': portfolio.max_drawdown(),
+        'win_rate': portfolio.trades.win_rate(),
+        'trade_count': portfolio.trades.count(),
+    }, index=portfolio.wrapper.get_columns())
+    # A pair that never trades has zero volatility and an infinite Sharpe
+    # ratio; it is undefined rather than best, so keep it out of the ranking
+    metrics['sharpe_ratio'] = metrics['sharpe_ratio'].replace([np.inf, -np.inf], np.nan)
+    return metrics
+
+
+def run_parameter_sweep(close_prices, fast_windows, slow_windows, initial_cash=10000,
+                        sort_by='sharpe_ratio', chunk_size=2000):
+    """
+    Backtest every (fast, slow) window pair of a grid and rank the results.
+
+    Pairs are processed in chunks of chunk_size columns so the signal matrices
+    stay within a bounded amount of memory on long price histories; each chunk
+    is still a single vectorized portfolio simulation.
+
+    Parameters:
+    -----------
+    close_prices : pd.Series or pd.DataFrame
+        Closing prices of a single symbol
+    fast_windows : iterable of int
+        Candidate window sizes for the fast moving average
+    slow_windows : iterable of int
+        Candidate window sizes for the slow moving average
+    initial_cash : float
+        Initial capital for every backtest
+    sort_by : str
+        Metric column to rank by (descending)
+    chunk_size : int
+        Maximum number of window pairs simulated at once
+
+    Returns:
+    --------
+    pd.DataFrame
+        Ranked metrics table with fast_window and slow_window columns
+    """
+    # yfinance returns a one-column DataFrame for data['Close']; broadcasting
+    # needs a plain Series
+    if isinstance(close_prices, pd.DataFrame):
+        close_prices = close_prices.iloc[:, 0]
+
+    pairs = build_parameter_grid(fast_windows, slow_windows)
+    if not pairs:
+        raise ValueError("Parameter grid is empty: every fast window must be shorter than a slow window")
+
+    print(f"Sweeping {len(pairs)} window pairs over {len(close_prices)} bars...")
+    ma_table = compute_moving_averages(close_prices, [w for pair in pairs for w in pair])
+
+    results = []
+    for start in range(0, len(pairs), chunk_size):
+        chunk = pairs[start:start + chunk_size]
+        entries, exits = crossover_signal_matrix(ma_table, chunk)
+        portfolio = run_backtest(close_prices, entries, exits, initial_cash)
+        results.append(summarize_portfolio(portfolio))
+
+    metrics = pd.concat(results)
+    metrics.index = pd.MultiIndex.from_tuples(metrics.index, names=['fast_window', 'slow_window'])
+    return metrics.sort_values(sort_by, ascending=False, na_position='last').reset_index()
+
+
+def main():
+    """
+    Run a parameter sweep over a default grid and save the ranked table.
+    """
+    symbol = 'AAPL'
+    start_date = '2019-01-01'
+    end_date = '2022-01-01'
+    initial_cash = 10000
+    fast_windows = range(5, 55, 5)
+    slow_windows = range(20, 210, 10)
+
+    try:
+        data = load_data(symbol, start_date, end_date)
+        metrics = run_parameter_sweep(data['Close'], fast_windows, slow_windows, initial_cash)
+
+        print("\n==== Top 10 Window Pairs ====")
+        print(metrics.head(10).to_string(index=False))
+
+        sweep_file = f"{symbol}_parameter_sweep_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        metrics.to_csv(sweep_file, index=False)
+        print(f"\nFull sweep results saved to: {sweep_file}")
+    except Exception as e:
+        print(f"Error running parameter sweep: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+"""
+Portfolio-Level Multi-Asset Backtest with Shared Cash
+
+run_backtest simulates every symbol with its own cash, so looping over symbols
+and adding up the equity curves overstates the capital and ignores that one
+position's cash is no longer available to another. Here all symbols are one
+VectorBT group with cash sharing: a single cash pool is allocated across the
+whole close-price matrix in one vectorized simulation.
+
+Positions are sized by target weights of the portfolio value:
+
+- From signals: every symbol whose crossover entry is active gets an equal
+  share, and the portfolio is rebalanced whenever that set changes.
+- From explicit weights: any (bars x symbols) weight matrix, e.g. a fixed
+  allocation.
+
+In both cases weights are also re-applied on a schedule (e.g. monthly) to
+undo drift. Sells are executed before buys on every bar, so freed cash can be
+reinvested on the same bar.
+
+Dependencies:
+- vectorbt, pandas, numpy (see backtesting.py)
+"""
+
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from backtesting import import_vectorbt, moving_average_crossover
+from universe_backtest import load_universe
+
+# Period aliases accepted by rebalance_schedule
+REBALANCE_FREQUENCIES = ('W', 'M', 'Q', 'Y')
+
+
+def signal_weights(entries, exits, close_prices=None):
+    """
+    Equal target weights across every symbol that is currently in a position.
+
+    Parameters:
+    -----------
+    entries, exits : pd.DataFrame
+        Boolean signal matrices (bars x symbols)
+    close_prices : pd.DataFrame, optional
+        Symbols without a price on a bar (e.g. before listing) get no weight
+
+    Returns:
+    --------
+    pd.DataFrame
+        Target weights summing to 1 on bars with any open position, else 0
+    """
+    # An entry opens and an exit closes; bars without a signal keep the state
+    state = pd.DataFrame(np.where(entries, 1.0, np.where(exits, 0.0, np.nan)),
+                         index=entries.index, columns=entries.columns)
+    in_position = state.ffill().fillna(0.0)
+    if close_prices is not None:
+        in_position = in_position.where(close_prices.notna(), 0.0)
+    n_positions = in_position.sum(axis=1)
+    return in_position.div(n_positions.where(n_positions > 0), axis=0).fillna(0.0)
+
+
+def rebalance_schedule(index, frequency='M'):
+    """
+    Mark the first bar of every period as a rebalance bar.
+
+    Parameters:
+    -----------
+    index : pd.DatetimeIndex
+        Bars of the simulation
+    frequency : str or None
+        One of REBALANCE_FREQUENCIES; None only marks the first bar
+
+    Returns:
+    --------
+    pd.Series
+        Boolean mask aligned with index
+    """
+    if frequency is None:
+        periods = pd.Series(0, index=index)
+    else:
+        if frequency not in REBALANCE_FREQUENCIES:
+            raise ValueError(f"Unknown rebalance frequency {frequency!r}, "
+                             f"expected one of {REBALANCE_FREQUENCIES}")
+        periods = pd.Series(index.to_period(frequency), index=index)
+    return periods != periods.shift()
+
+
+def run_portfolio_backtest(close_prices, target_weights, rebalance='M', initial_cash=10000, fees=0.001,
+                           rebalance_on_change=True):
+    """
+    Simulate one cash-sharing portfolio that trades toward target weights.
+
+    Parameters:
+    -----------
+    close_prices : pd.DataFrame
+        Wide close-price matrix (bars x symbols)
+    target_weights : pd.DataFrame
+        Target fraction of portfolio value per symbol and bar; rows may sum
+        to less than 1, the rest is held as cash
+    rebalance : str or None
+        Scheduled rebalance frequency (see rebalance_schedule)
+    initial_cash : float
+        Capital shared by all symbols
+    fees : float
+        Trading fee per order as a fraction of its value
+    rebalance_on_change : bool
+        Also rebalance on every bar where the target weights change
+
+    Returns:
+    --------
+    vbt.Portfolio
+        Portfolio with all symbols in one group
+    """
+    target_weights = target_weights.reindex_like(close_prices).fillna(0.0)
+    rebalance_bars = rebalance_schedule(close_prices.index, rebalance)
+    if rebalance_on_change:
+        rebalance_bars |= target_weights.ne(target_weights.shift()).any(axis=1)
+    # NaN size means no order, so weights only act on rebalance bars
+    size = target_weights.where(rebalance_bars, axis=0)
+    # A symbol cannot be traded on bars without a price
+    size = size.where(close_prices.notna())
+    print(f"Running shared-cash backtest over {close_prices.shape[1]} symbols, "
+          f"{int(rebalance_bars.sum())} rebalance bars...")
+
+    vbt = import_vectorbt()
+    return vbt.Portfolio.from_orders(
+        close_prices,
+        size,
+        size_type='targetpercent',
+        group_by=True,
+        cash_sharing=True,
+        call_seq='auto',  # sell before buy so freed cash is reusable on the same bar
+        init_cash=initial_cash,
+        fees=fees,
+        freq='1D'
+    )
+
+
+def run_signal_portfolio(close_prices, entries, exits, rebalance='M', initial_cash=10000, fees=0.001):
+    """
+    Shared-cash backtest of signal matrices with equal weights across open positions.
+
+    Returns:
+    --------
+    vbt.Portfolio
+        See run_portfolio_backtest
+    """
+    weights = signal_weights(entries, exits, close_prices)
+    return run_portfolio_backtest(close_prices, weights, rebalance, initial_cash, fees)
+
+
+def main():
+    """
+    Run the crossover strategy on a basket of symbols with one shared cash pool.
+    """
+    symbols = [symbol.upper() for symbol in sys.argv[1:]] or ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'JPM', 'KO']
+    start_date = '2019-01-01'
+    end_date = '2022-01-01'
+    initial_cash = 10000
+
+    try:
+        close_prices, _ = load_universe(symbols, start_date, end_date)
+        entries, exits, _, _ = moving_average_crossover(close_prices, 20, 50)
+        portfolio = run_signal_portfolio(close_prices, entries, exits, initial_cash=initial_cash)
+
+        print("\n==== Shared-Cash Portfolio ====")
+        print(portfolio.stats().to_string())
+        allocation = portfolio.asset_value(group_by=False).iloc[-1] / portfolio.value().iloc[-1]
+        print("\nFinal allocation:")
+        print(allocation.to_string(float_format='{:.2%}'.format))
+
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output = f"portfolio_equity_{timestamp}.csv"
+        portfolio.value().to_csv(output)
+        print(f"Portfolio equity curve saved to: {output}")
+    except Exception as e:
+        print(f"Error running portfolio backtest: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    main()
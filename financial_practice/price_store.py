@@ -0,0 +1,417 @@
+#!/usr/bin/env python
+"""
+Local On-Disk OHLCV Price Store
+
+A caching layer shared by backtesting.py and financial_analysis.py so the same
+price history is not downloaded again on every run.
+
+- Each symbol is stored as one columnar file (Parquet or Feather) together with
+  the date range it is known to cover.
+- Requests that fall inside the covered range never touch the network; requests
+  that extend past it only fetch the missing leading/trailing ranges.
+- A range is only recorded as covered once bars for it were received. An
+  empty download for a range with NYSE trading days (weekends and full-day
+  exchange holidays excluded) counts as a failed fetch.
+- The total cache size is bounded: least-recently-used symbols are evicted once
+  the limit is exceeded.
+- The data source is pluggable. YFinanceSource is the default; CSVSource reads
+  fixture files so backtests can run without any network access.
+
+Environment variables:
+- PRICE_STORE_DIR: cache directory (default: ~/.cache/financial_practice/prices)
+- PRICE_STORE_MAX_MB: cache size limit in megabytes (default: 512)
+- PRICE_STORE_OFFLINE_DIR: directory of <SYMBOL>.csv fixtures; when set, the
+  default store uses CSVSource instead of yfinance
+
+Dependencies:
+- pandas, pyarrow (for Parquet/Feather)
+- yfinance (only imported when YFinanceSource actually downloads)
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.holiday import (AbstractHolidayCalendar, GoodFriday, Holiday, USLaborDay,
+                                    USMartinLutherKingJr, USMemorialDay, USPresidentsDay, USThanksgivingDay,
+                                    nearest_workday, sunday_to_monday)
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+class NoDataError(ValueError):
+    """The source has no bars for the symbol in the requested range (e.g. an unknown symbol)."""
+
+
+def normalize_ohlcv(df):
+    """
+    Bring a downloaded price frame into the store's canonical layout.
+
+    yf.download returns (Price, Ticker) MultiIndex columns and Ticker.history
+    returns a timezone-aware index with extra Dividends/Stock Splits columns;
+    both are reduced to a tz-naive 'Date' index with plain OHLCV columns.
+    """
+    df = df.copy()
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+    df = df[[col for col in OHLCV_COLUMNS if col in df.columns]]
+    index = pd.to_datetime(df.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    df.index = index.normalize()
+    df.index.name = 'Date'
+    return df[~df.index.duplicated(keep='last')].sort_index()
+
+
+class NYSEHolidayCalendar(AbstractHolidayCalendar):
+    """Full-day NYSE holidays (unscheduled closures are not included)."""
+
+    rules = [
+        # Unlike the federal holiday, a Saturday New Year's Day is not moved to Friday
+        Holiday('New Years Day', month=1, day=1, observance=sunday_to_monday),
+        USMartinLutherKingJr,
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday('Juneteenth', month=6, day=19, start_date='2022-01-01', observance=nearest_workday),
+        Holiday('Independence Day', month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday('Christmas Day', month=12, day=25, observance=nearest_workday),
+    ]
+
+
+@functools.lru_cache(maxsize=1)
+def _holidays():
+    return NYSEHolidayCalendar().holidays('1970-01-01', '2100-12-31').values.astype('datetime64[D]')
+
+
+def _expects_bars(start, end):
+    """
+    Whether [start, end) contains a trading day before today, i.e. a day whose
+    daily bar should already have been published.
+    """
+    last_end = min(pd.Timestamp(end), pd.Timestamp.now().normalize())
+    start = pd.Timestamp(start)
+    if last_end <= start:
+        return False
+    return np.busday_count(start.date(), last_end.date(), holidays=_holidays()) > 0
+
+
+class YFinanceSource:
+    """Download daily OHLCV bars from Yahoo Finance."""
+
+    def fetch(self, symbol, start, end):
+        """Return bars for symbol in [start, end) as a normalized frame."""
+        import yfinance as yf
+        data = yf.download(symbol, start=start, end=end, progress=False)
+        if data is None or data.empty:
+            return pd.DataFrame(columns=OHLCV_COLUMNS)
+        return normalize_ohlcv(data)
+
+    def fetch_many(self, symbols, start, end):
+        """Download several symbols in one threaded request; returns {symbol: frame}."""
+        import yfinance as yf
+        data = yf.download(symbols, start=start, end=end, group_by='ticker',
+                           threads=True, progress=False)
+        frames = {}
+        if data is None or data.empty:
+            return frames
+        for symbol in symbols:
+            if symbol in data.columns.get_level_values(0):
+                frame = normalize_ohlcv(data[symbol]).dropna(how='all')
+                if not frame.empty:
+                    frames[symbol] = frame
+        return frames
+
+
+class CSVSource:
+    """Read OHLCV bars from <directory>/<SYMBOL>.csv fixture files (offline)."""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def fetch(self, symbol, start, end):
+        """Return bars for symbol in [start, end) from the fixture file."""
+        path = os.path.join(self.directory, f"{symbol.upper()}.csv")
+        if not os.path.exists(path):
+            raise NoDataError(f"No offline price fixture for {symbol}: {path}")
+        data = normalize_ohlcv(pd.read_csv(path, index_col=0, parse_dates=True))
+        return data[(data.index >= pd.Timestamp(start)) & (data.index < pd.Timestamp(end))]
+
+
+class PriceStore:
+    """
+    Symbol-keyed OHLCV cache with incremental fetching and LRU eviction.
+
+    Parameters:
+    -----------
+    cache_dir : str
+        Directory holding one data file per symbol plus an index.json
+    source : object
+        Any object with a fetch(symbol, start, end) method returning OHLCV bars
+    max_bytes : int
+        Size limit for all cached data files together
+    file_format : str
+        'parquet' or 'feather'
+    refresh_seconds : float
+        How long data fetched up to today is considered fresh; within this
+        window, requests ending in the future do not re-fetch today's bar
+    """
+
+    def __init__(self, cache_dir, source=None, max_bytes=512 * 1024 ** 2, file_format='parquet',
+                 refresh_seconds=900):
+        if file_format not in ('parquet', 'feather'):
+            raise ValueError(f"Unsupported file format: {file_format}")
+        self.cache_dir = cache_dir
+        self.source = source or YFinanceSource()
+        self.max_bytes = max_bytes
+        self.file_format = file_format
+        self.refresh_seconds = refresh_seconds
+        # GUI and screener callers fetch from worker threads. _lock keeps the
+        # index and data files consistent within one process and is never held
+        # during a download; per-symbol locks stop two threads from fetching
+        # the same symbol at once while different symbols download in parallel
+        self._lock = threading.RLock()
+        self._symbol_locks = {}
+        os.makedirs(cache_dir, exist_ok=True)
+        self._index_path = os.path.join(cache_dir, 'index.json')
+        self._index = self._read_index()
+
+    def load(self, symbol, start, end, before_fetch=None):
+        """
+        Return OHLCV bars for symbol in [start, end), fetching only what is missing.
+
+        If the source fails while extending an existing cache entry, the cached
+        part is returned with a warning instead of failing the whole request.
+        Raises NoDataError if the symbol has no bars in the range; any other
+        source error (e.g. an OSError for a failed download) is raised as is.
+
+        before_fetch, if given, is called before every request to the source
+        (e.g. a rate limiter's wait), so cache hits are not throttled.
+        """
+        return self._load(symbol, start, end, flush=True, before_fetch=before_fetch)
+
+    def _load(self, symbol, start, end, flush, before_fetch=None):
+        """load(); with flush=False, eviction and the index write are left to the caller."""
+        symbol = symbol.upper()
+        start = pd.Timestamp(start).normalize()
+        # Never mark the future as covered, otherwise bars published later
+        # would be considered cached forever
+        covered_end = min(pd.Timestamp(end).normalize(), pd.Timestamp.now().normalize())
+
+        with self._symbol_lock(symbol):
+            with self._lock:
+                entry = self._index.get(symbol)
+                cached = self._read_data(symbol) if entry else None
+
+            if cached is None:
+                missing = [(start, pd.Timestamp(end))]
+            else:
+                cached_start, cached_end = pd.Timestamp(entry['start']), pd.Timestamp(entry['end'])
+                missing = []
+                if start < cached_start:
+                    missing.append((start, cached_start))
+                recently_refreshed = (cached_end >= covered_end and
+                                      time.time() - entry.get('fetched_at', 0) < self.refresh_seconds)
+                if pd.Timestamp(end) > cached_end and not recently_refreshed:
+                    missing.append((cached_end, pd.Timestamp(end)))
+
+            if missing:
+                cached, complete = self._fetch_missing(symbol, missing, cached, before_fetch)
+                if complete:
+                    new_start = min([start] + ([pd.Timestamp(entry['start'])] if entry else []))
+                    new_end = max([covered_end] + ([pd.Timestamp(entry['end'])] if entry else []))
+                else:
+                    # Keep the old coverage so the failed range is retried next time
+                    new_start, new_end = pd.Timestamp(entry['start']), pd.Timestamp(entry['end'])
+                with self._lock:
+                    self._write_data(symbol, cached, new_start, new_end, flush)
+            else:
+                with self._lock:
+                    # The entry may have been evicted by another thread meanwhile
+                    if symbol in self._index:
+                        self._index[symbol]['last_access'] = time.time()
+                        if flush:
+                            self._write_index()
+
+        window = cached[(cached.index >= start) & (cached.index < pd.Timestamp(end))]
+        if window.empty:
+            raise NoDataError(f"No data found for {symbol} in the specified date range")
+        return window.copy()
+
+    def load_many(self, symbols, start, end):
+        """
+        Load several symbols, downloading all uncached ones in a single bulk request.
+
+        Failures are collected per symbol instead of aborting the whole call.
+        The index is written once for the whole batch rather than once per
+        symbol, which would be quadratic in the number of symbols.
+
+        Returns:
+        --------
+        tuple
+            ({symbol: OHLCV frame}, {symbol: error message})
+        """
+        symbols = [symbol.upper() for symbol in symbols]
+        fetch_many = getattr(self.source, 'fetch_many', None)
+        with self._lock:
+            cold = [symbol for symbol in symbols if symbol not in self._index]
+        if fetch_many and len(cold) > 1:
+            try:
+                bulk = fetch_many(cold, start, end)
+            except Exception as e:
+                print(f"Warning: bulk download failed ({str(e)}); falling back to per-symbol loads")
+                bulk = {}
+            covered_end = min(pd.Timestamp(end).normalize(), pd.Timestamp.now().normalize())
+            with self._lock:
+                for symbol, data in bulk.items():
+                    self._write_data(symbol, data, pd.Timestamp(start).normalize(), covered_end, flush=False)
+
+        frames, errors = {}, {}
+        try:
+            for symbol in symbols:
+                try:
+                    frames[symbol] = self._load(symbol, start, end, flush=False)
+                except Exception as e:
+                    errors[symbol] = str(e)
+        finally:
+            with self._lock:
+                self._evict(keep=set(symbols))
+                self._write_index()
+        return frames, errors
+
+    def clear(self, symbol=None):
+        """Remove one symbol, or the whole cache when symbol is None."""
+        with self._lock:
+            symbols = [symbol.upper()] if symbol else list(self._index)
+            for sym in symbols:
+                self._remove(sym)
+            self._write_index()
+
+    def _symbol_lock(self, symbol):
+        with self._lock:
+            return self._symbol_locks.setdefault(symbol, threading.Lock())
+
+    def _fetch_missing(self, symbol, ranges, cached, before_fetch=None):
+        """
+        Fetch the missing ranges; returns (merged data, whether every fetch succeeded).
+
+        A range containing past trading days that comes back empty is never
+        recorded as covered. Without any cached bars it raises NoDataError (the
+        symbol most likely does not exist); when extending a cached symbol it
+        is a failed download and the cached part is kept.
+        """
+        parts = [] if cached is None else [cached]
+        complete = True
+        for range_start, range_end in ranges:
+            try:
+                if before_fetch is not None:
+                    before_fetch()
+                part = self.source.fetch(symbol, range_start, range_end)
+                # yf.download reports unknown symbols, network errors and rate
+                # limits alike by returning an empty frame; caching that as
+                # covered would hide the range until the cache is cleared
+                if part.empty and _expects_bars(range_start, range_end):
+                    if cached is None:
+                        raise NoDataError(f"No data found for {symbol} from {range_start:%Y-%m-%d} "
+                                          f"to {range_end:%Y-%m-%d}")
+                    raise OSError(f"no bars received for {range_start:%Y-%m-%d} to {range_end:%Y-%m-%d}")
+                parts.append(part)
+            except Exception as e:
+                if cached is None:
+                    raise
+                complete = False
+                print(f"Warning: could not refresh {symbol} ({str(e)}); using cached data")
+        parts = [part for part in parts if not part.empty]
+        if not parts:
+            empty = pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([], name='Date'))
+            return empty, complete
+        combined = pd.concat(parts)
+        return combined[~combined.index.duplicated(keep='last')].sort_index(), complete
+
+    def _path(self, symbol):
+        return os.path.join(self.cache_dir, f"{symbol}.{self.file_format}")
+
+    def _read_data(self, symbol):
+        path = self._path(symbol)
+        if not os.path.exists(path):
+            return None
+        if self.file_format == 'parquet':
+            return pd.read_parquet(path)
+        return pd.read_feather(path).set_index('Date')
+
+    def _write_data(self, symbol, data, start, end, flush=True):
+        path = self._path(symbol)
+        if self.file_format == 'parquet':
+            data.to_parquet(path)
+        else:
+            data.reset_index().to_feather(path)
+        self._index[symbol] = {
+            'start': start.strftime('%Y-%m-%d'),
+            'end': end.strftime('%Y-%m-%d'),
+            'bytes': os.path.getsize(path),
+            'last_access': time.time(),
+            'fetched_at': time.time(),
+        }
+        if flush:
+            self._evict(keep={symbol})
+            self._write_index()
+
+    def _evict(self, keep):
+        """Drop least-recently-used symbols outside keep until the cache fits max_bytes."""
+        total = sum(entry['bytes'] for entry in self._index.values())
+        by_age = sorted(self._index.items(), key=lambda item: item[1]['last_access'])
+        for sym, entry in by_age:
+            if total <= self.max_bytes:
+                break
+            if sym not in keep:
+                total -= entry['bytes']
+                self._remove(sym)
+
+    def _remove(self, symbol):
+        self._index.pop(symbol, None)
+        if os.path.exists(self._path(symbol)):
+            os.remove(self._path(symbol))
+
+    def _read_index(self):
+        if not os.path.exists(self._index_path):
+            return {}
+        try:
+            with open(self._index_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            # A corrupt index only costs a re-download, never a crash
+            return {}
+
+    def _write_index(self):
+        tmp_path = self._index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self._index_path)
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_default_store():
+    """
+    Return the process-wide PriceStore configured from environment variables.
+    """
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            cache_dir = os.environ.get(
+                'PRICE_STORE_DIR',
+                os.path.join(os.path.expanduser('~'), '.cache', 'financial_practice', 'prices')
+            )
+            offline_dir = os.environ.get('PRICE_STORE_OFFLINE_DIR')
+            source = CSVSource(offline_dir) if offline_dir else YFinanceSource()
+            max_bytes = int(float(os.environ.get('PRICE_STORE_MAX_MB', 512)) * 1024 ** 2)
+            _default_store = PriceStore(cache_dir, source=source, max_bytes=max_bytes)
+        return _default_store
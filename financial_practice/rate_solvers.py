@@ -0,0 +1,332 @@
+#!/usr/bin/env python
+"""
+Vectorized Rate Solvers: NPV, IRR and Rate from Payment
+
+financial_calculator.py goes from a rate to a value. The solvers here go the
+other way: they find the rate that explains known cash flows, for millions of
+independent problems in one call.
+
+- npv / npv_profile: net present value of each cash-flow row at one or many
+  discount rates (Horner's scheme, one pass per period).
+- irr: internal rate of return of each cash-flow row.
+- rate_from_payment: the per-period rate at which
+  calculate_annuity_payment(principal, rate, periods) equals a given payment.
+
+Both inverse solvers run the same safeguarded Newton iteration. Each problem
+keeps a bracket [lower, upper] around its root, and a Newton step that leaves
+the bracket (or is not finite) becomes a bisection step, so every problem with
+a sign change in the bracket converges. Only unconverged problems are
+evaluated in later iterations. Results carry per-problem convergence flags and
+iteration counts.
+
+Cash flows are (problems x periods) arrays with the flow at time 0 in the
+first column (not discounted, as in numpy_financial.npv); pad shorter rows
+with NaN. A row whose flows change sign once has at most one IRR (Descartes'
+rule of signs). With several sign changes a row can have several IRRs, or an
+even number of them with no sign change of the NPV across the whole bracket.
+irr scans those rows on a grid of rates first and iterates in the
+sign-changing sub-bracket nearest the guess. Roots closer together than the
+grid spacing, or where the NPV touches zero without changing sign, can still
+be missed (NaN, not converged).
+
+Usage:
+python rate_solvers.py     # solves random problems and prints throughput
+
+Dependencies:
+- numpy
+"""
+
+import time
+
+import numpy as np
+
+from vectorized_calculator import annuity_payments
+
+
+def _cash_flow_matrix(cash_flows):
+    """(problems x periods) float array with NaN padding treated as no flow."""
+    return np.nan_to_num(np.atleast_2d(np.asarray(cash_flows, dtype=np.float64)), nan=0.0)
+
+
+def npv(rate, cash_flows):
+    """
+    Net present value of every cash-flow row at its discount rate.
+
+    Parameters:
+        rate (float or np.ndarray): One rate per period, shared or one per row.
+        cash_flows (array-like): (problems x periods) flows, time 0 first.
+
+    Returns:
+        np.ndarray: One NPV per row.
+    """
+    flows = _cash_flow_matrix(cash_flows)
+    discount = 1 / (1 + np.asarray(rate, dtype=np.float64))
+    value = np.zeros(np.broadcast_shapes(discount.shape, flows.shape[:1]))
+    for t in range(flows.shape[1] - 1, -1, -1):
+        value = value * discount + flows[:, t]
+    return value
+
+
+def npv_profile(rates, cash_flows):
+    """
+    NPV of every cash-flow row at each of several discount rates.
+
+    Parameters:
+        rates (array-like): Discount rates per period, shared by all rows.
+        cash_flows (array-like): (problems x periods) flows, time 0 first.
+
+    Returns:
+        np.ndarray: (problems x rates) NPVs.
+    """
+    flows = _cash_flow_matrix(cash_flows)
+    discount = 1 / (1 + np.asarray(rates, dtype=np.float64).ravel())
+    value = np.zeros((flows.shape[0], len(discount)))
+    for t in range(flows.shape[1] - 1, -1, -1):
+        value *= discount
+        value += flows[:, t, None]
+    return value
+
+
+def _safeguarded_newton(objective, lower, upper, guess, tol, max_iter):
+    """
+    Find a root of objective inside [lower, upper] for every problem.
+
+    objective(index, rate) returns (value, derivative) for the problems in
+    index at the given rates.
+
+    Returns:
+        dict: 'rate' (NaN without a sign change in the bracket), 'converged'
+        and 'iterations' arrays.
+    """
+    n_problems = len(guess)
+    everything = np.arange(n_problems)
+    lower = np.broadcast_to(np.asarray(lower, dtype=np.float64), (n_problems,)).copy()
+    upper = np.broadcast_to(np.asarray(upper, dtype=np.float64), (n_problems,)).copy()
+    lower_sign = np.sign(objective(everything, lower)[0])
+    upper_sign = np.sign(objective(everything, upper)[0])
+
+    rate = np.full(n_problems, np.nan)
+    converged = np.zeros(n_problems, dtype=bool)
+    iterations = np.zeros(n_problems, dtype=np.int64)
+
+    # A bound that is itself a root is solved without iterating
+    for bound, sign in ((lower, lower_sign), (upper, upper_sign)):
+        exact = (sign == 0) & ~converged
+        rate[exact], converged[exact] = bound[exact], True
+
+    active = np.flatnonzero((lower_sign * upper_sign < 0) & ~converged)
+    current = np.clip(np.asarray(guess, dtype=np.float64)[active], lower[active], upper[active])
+    for _ in range(max_iter):
+        if not len(active):
+            break
+        value, derivative = objective(active, current)
+        iterations[active] += 1
+
+        # Shrink the bracket to the side that still contains the sign change
+        lo, hi = lower[active], upper[active]
+        below = np.sign(value) == lower_sign[active]
+        lo = np.where(below, current, lo)
+        hi = np.where(below, hi, current)
+        lower[active], upper[active] = lo, hi
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            candidate = current - value / derivative
+        # Comparisons with NaN are False, so non-finite steps bisect too
+        inside = (candidate >= lo) & (candidate <= hi)
+        candidate = np.where(inside, candidate, 0.5 * (lo + hi))
+
+        scale = 1 + np.abs(current)
+        done = (value == 0) | (np.abs(candidate - current) <= tol * scale) | (hi - lo <= tol * scale)
+        candidate = np.where(value == 0, current, candidate)
+        rate[active] = candidate
+        converged[active[done]] = True
+        active, current = active[~done], candidate[~done]
+
+    return {'rate': rate, 'converged': converged, 'iterations': iterations}
+
+
+def _irr_objective(flows):
+    """
+    NPV and its derivative in a form that does not overflow for long flows.
+
+    For rates >= 0 the flows are discounted by x = 1/(1+r) <= 1. For rates
+    below zero that would overflow, so the NPV is scaled by (1+r)^(T-1) and
+    evaluated as a polynomial in y = 1+r < 1 instead. The positive scale
+    keeps the sign (and the roots) unchanged.
+    """
+    n_periods = flows.shape[1]
+
+    def objective(index, rate):
+        rows = flows[index]
+        negative = rate < 0
+        z = np.where(negative, 1 + rate, 1 / (1 + rate))
+        value = np.zeros(len(index))
+        slope = np.zeros(len(index))
+        for step in range(n_periods):
+            coefficient = np.where(negative, rows[:, step], rows[:, n_periods - 1 - step])
+            slope = slope * z + value
+            value = value * z + coefficient
+        # d/dr of the x-polynomial is p'(x) * -x^2; of the y-polynomial p'(y)
+        return value, np.where(negative, slope, -slope * z * z)
+
+    return objective
+
+
+def _sign_changes(flows):
+    """Number of sign changes along each row, ignoring zero flows."""
+    changes = np.zeros(len(flows), dtype=np.int64)
+    last = np.zeros(len(flows))
+    for column in flows.T:
+        sign = np.sign(column)
+        changes += sign * last < 0
+        last = np.where(sign != 0, sign, last)
+    return changes
+
+
+def _nearest_bracket(objective, index, lower, upper, guess, n_points):
+    """
+    Scan [lower, upper] on n_points rates (evenly spaced in log(1 + r)) and
+    return the sub-bracket with a sign change of the objective nearest guess.
+
+    Problems without a sign change on the grid keep [lower, upper].
+    """
+    log_lower, log_upper = np.log1p(lower), np.log1p(upper)
+    best_lower, best_upper = lower.copy(), upper.copy()
+    best_distance = np.full(len(index), np.inf)
+    previous_rate = lower
+    previous_sign = np.sign(objective(index, lower)[0])
+    for k in range(1, n_points):
+        rate = upper if k == n_points - 1 else np.expm1(log_lower + (log_upper - log_lower) * k / (n_points - 1))
+        sign = np.sign(objective(index, rate)[0])
+        # Zero when the guess lies inside the sub-bracket
+        distance = np.maximum(0, np.maximum(previous_rate - guess, guess - rate))
+        better = (previous_sign * sign <= 0) & (distance < best_distance)
+        best_lower = np.where(better, previous_rate, best_lower)
+        best_upper = np.where(better, rate, best_upper)
+        best_distance = np.where(better, distance, best_distance)
+        previous_rate, previous_sign = rate, sign
+    return best_lower, best_upper
+
+
+def irr(cash_flows, guess=0.1, lower=-0.99, upper=10.0, tol=1e-10, max_iter=100, scan_points=64):
+    """
+    Internal rate of return of every cash-flow row.
+
+    Parameters:
+        cash_flows (array-like): (problems x periods) flows, time 0 first.
+        guess (float or np.ndarray): Starting rate(s) per period.
+        lower, upper (float or np.ndarray): Bracket searched for the root
+            (lower > -1).
+        tol (float): Relative tolerance on the rate.
+        max_iter (int): Iteration limit.
+        scan_points (int): Grid size used to locate a sign change near the
+            guess for rows whose flows change sign more than once.
+
+    Returns:
+        dict: 'rate' per period (NaN where no sign change of the NPV was
+        found in the bracket, and for rows without a nonzero flow, whose NPV
+        is zero at every rate), 'converged' and 'iterations' arrays.
+    """
+    flows = _cash_flow_matrix(cash_flows)
+    n_problems = flows.shape[0]
+    guess = np.broadcast_to(np.asarray(guess, dtype=np.float64), (n_problems,))
+    lower = np.broadcast_to(np.asarray(lower, dtype=np.float64), (n_problems,)).copy()
+    upper = np.broadcast_to(np.asarray(upper, dtype=np.float64), (n_problems,)).copy()
+    objective = _irr_objective(flows)
+
+    # An all-zero row would count as solved at the lower bound; a NaN bracket
+    # leaves it unsolved instead
+    empty = ~flows.any(axis=1)
+    lower[empty] = upper[empty] = np.nan
+
+    # Only rows with several sign changes can have several roots
+    multiple = np.flatnonzero(_sign_changes(flows) > 1)
+    if len(multiple) and scan_points > 1:
+        lower[multiple], upper[multiple] = _nearest_bracket(objective, multiple, lower[multiple], upper[multiple],
+                                                            guess[multiple], scan_points)
+    return _safeguarded_newton(objective, lower, upper, guess, tol, max_iter)
+
+
+def rate_from_payment(principal, payment, periods, guess=0.01, lower=-0.99, upper=10.0, tol=1e-12,
+                      max_iter=100):
+    """
+    Rate per period at which calculate_annuity_payment(principal, rate, periods) == payment.
+
+    Solves payment * (1 - (1+r)^-n) / r - principal = 0, which decreases in r.
+
+    Parameters:
+        principal (array-like): Amounts annuitized.
+        payment (array-like): Payments per period.
+        periods (array-like): Numbers of periods (positive).
+        guess (float or np.ndarray): Starting rate(s) per period.
+        lower, upper (float or np.ndarray): Bracket searched for the root.
+        tol (float): Relative tolerance on the rate.
+        max_iter (int): Iteration limit.
+
+    Returns:
+        dict: 'rate' (NaN where no rate in the bracket fits, or every rate
+        does because principal and payment are both zero), 'converged' and
+        'iterations' arrays.
+    """
+    principal, payment, periods = np.broadcast_arrays(*(np.atleast_1d(np.asarray(values, dtype=np.float64))
+                                                        for values in (principal, payment, periods)))
+    periods = np.where((periods > 0) & ((principal != 0) | (payment != 0)), periods, np.nan)
+
+    def objective(index, rate):
+        n = periods[index]
+        small = np.abs(rate) < 1e-7
+        safe_rate = np.where(small, 1.0, rate)
+        with np.errstate(over='ignore', invalid='ignore'):
+            discount = np.exp(-n * np.log1p(safe_rate))
+            factor = -np.expm1(-n * np.log1p(safe_rate)) / safe_rate
+            slope = (n * discount / (1 + safe_rate) - factor) / safe_rate
+        # Series expansion around r = 0, where the closed forms cancel
+        factor = np.where(small, n - n * (n + 1) / 2 * rate, factor)
+        slope = np.where(small, -n * (n + 1) / 2, slope)
+        return payment[index] * factor - principal[index], payment[index] * slope
+
+    guess = np.broadcast_to(np.asarray(guess, dtype=np.float64), principal.shape)
+    return _safeguarded_newton(objective, lower, upper, guess, tol, max_iter)
+
+
+def _report(name, result, n_problems, seconds):
+    converged = result['converged']
+    print(f"{name:<18} {n_problems:,} problems in {seconds:.2f} s ({n_problems / seconds:,.0f}/s), "
+          f"{converged.mean():.2%} converged, iterations mean {result['iterations'].mean():.1f} "
+          f"max {result['iterations'].max()}")
+
+
+def main():
+    """
+    Solve seeded random IRR and rate-from-payment problems and check the roots.
+    """
+    rng = np.random.default_rng(42)
+
+    n_problems = 1_000_000
+    principal = rng.uniform(10_000, 500_000, n_problems)
+    true_rate = rng.choice([0.0, 0.001, 0.004, 0.008, 0.02], n_problems)
+    periods = rng.choice([12, 60, 180, 360], n_problems)
+    payment = annuity_payments(principal, true_rate, periods)
+    start = time.perf_counter()
+    result = rate_from_payment(principal, payment, periods)
+    _report('rate_from_payment', result, n_problems, time.perf_counter() - start)
+    print(f"  largest rate error: {np.abs(result['rate'] - true_rate).max():.2e}")
+
+    n_problems, n_periods = 1_000_000, 10
+    flows = rng.uniform(50, 400, (n_problems, n_periods))
+    flows[:, 0] = -rng.uniform(500, 2000, n_problems)
+    start = time.perf_counter()
+    result = irr(flows)
+    _report('irr', result, n_problems, time.perf_counter() - start)
+    solved = result['converged']
+    residual = np.abs(npv(result['rate'][solved], flows[solved])) / np.abs(flows[solved, 0])
+    print(f"  largest |NPV at IRR| / initial outlay: {residual.max():.2e}")
+
+    start = time.perf_counter()
+    profile = npv_profile(np.linspace(0, 0.2, 21), flows)
+    seconds = time.perf_counter() - start
+    print(f"{'npv_profile':<18} {n_problems:,} x {profile.shape[1]} rates in {seconds:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
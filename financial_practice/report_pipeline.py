@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+"""
+Headless Batch Report Pipeline
+
+backtesting.main() always renders several PNGs and an HTML tearsheet, which in
+nightly batch runs takes longer than the backtest itself. This pipeline renders
+only what the requested report level needs:
+
+- 'metrics': key metrics of every symbol exported as JSON and CSV (symbols
+  that failed are listed with their error); nothing is rendered and
+  matplotlib is never touched by the pipeline.
+- 'charts': metrics plus the result charts and QuantStats heatmap/drawdowns.
+- 'html': charts plus the full QuantStats HTML tearsheet.
+
+Rendering is submitted to a pool of worker processes as soon as a symbol is
+added, so the main process keeps backtesting instead of blocking on
+plt.savefig. Each symbol writes to its own subdirectory because the
+QuantStats file names do not include the symbol.
+
+Usage:
+python report_pipeline.py AAPL MSFT --level charts --output-dir reports
+"""
+
+import argparse
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+REPORT_LEVELS = ('metrics', 'charts', 'html')
+
+
+def _render_symbol(chart_data, returns, benchmark_returns, output_dir):
+    """Worker task: render every chart (and the tearsheet if requested) for one symbol."""
+    from backtesting import render_quantstats_charts, render_quantstats_html, render_result_charts
+
+    outputs = render_result_charts(chart_data, output_dir)
+    outputs += render_quantstats_charts(returns, output_dir)
+    if benchmark_returns is not None:
+        outputs.append(render_quantstats_html(returns, benchmark_returns, output_dir))
+    return outputs
+
+
+class ReportPipeline:
+    """
+    Collects backtest results and produces reports at the requested level.
+
+    Parameters:
+    -----------
+    level : str
+        One of REPORT_LEVELS
+    output_dir : str
+        Root directory for all report files
+    max_workers : int, optional
+        Rendering processes; 1 renders in the current process
+        (default: one per CPU core)
+    benchmark_symbol : str
+        Benchmark for the HTML tearsheet
+    """
+
+    def __init__(self, level='metrics', output_dir='reports', max_workers=None, benchmark_symbol='SPY'):
+        if level not in REPORT_LEVELS:
+            raise ValueError(f"Unknown report level {level!r}, expected one of {REPORT_LEVELS}")
+        self.level = level
+        self.output_dir = output_dir
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.benchmark_symbol = benchmark_symbol
+        self._metrics = {}
+        self._errors = {}
+        self._futures = {}
+        self._outputs = {}
+        self._executor = None
+        self._benchmark_cache = {}
+        os.makedirs(output_dir, exist_ok=True)
+
+    def add(self, symbol, portfolio, close_prices, fast_ma, slow_ma, start_date=None, end_date=None):
+        """
+        Record one symbol's metrics and schedule its rendering if the level needs it.
+        """
+        from backtesting import extract_chart_data, extract_metrics, extract_returns
+
+        self._metrics[symbol] = extract_metrics(portfolio)
+        if self.level == 'metrics':
+            return
+
+        returns = extract_returns(portfolio, symbol)
+        chart_data = extract_chart_data(portfolio, close_prices, fast_ma, slow_ma, symbol)
+        benchmark_returns = None
+        if self.level == 'html':
+            benchmark_returns = self._benchmark_returns(start_date, end_date)
+
+        symbol_dir = os.path.join(self.output_dir, symbol)
+        os.makedirs(symbol_dir, exist_ok=True)
+        args = (chart_data, returns, benchmark_returns, symbol_dir)
+        if self.max_workers == 1:
+            self._outputs[symbol] = _render_symbol(*args)
+        else:
+            # The pool is only started once something actually needs rendering
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            self._futures[symbol] = self._executor.submit(_render_symbol, *args)
+
+    def add_error(self, symbol, error):
+        """
+        Record a symbol that could not be backtested; it is listed in the metrics files with its error.
+        """
+        self._errors[symbol] = str(error)
+
+    def close(self):
+        """
+        Wait for pending renders and write the metrics files.
+
+        Symbols recorded with add_error get an 'error' entry instead of (or,
+        if they failed after add, next to) their metrics.
+
+        Returns:
+        --------
+        dict
+            {'metrics': [json_path, csv_path], <symbol>: [chart paths] or error}
+        """
+        for symbol, future in self._futures.items():
+            try:
+                self._outputs[symbol] = future.result()
+            except Exception as e:
+                print(f"Rendering failed for {symbol}: {str(e)}")
+                self._outputs[symbol] = f"error: {str(e)}"
+        self._futures = {}
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        # NaN/inf (e.g. Sharpe on flat returns) become null; bare NaN tokens are not valid JSON
+        rows = {symbol: {name: float(value) if math.isfinite(float(value)) else None
+                         for name, value in metrics.items()}
+                for symbol, metrics in self._metrics.items()}
+        for symbol, error in self._errors.items():
+            rows.setdefault(symbol, {})['error'] = error
+        metrics_table = pd.DataFrame.from_dict(rows, orient='index')
+        metrics_table.index.name = 'symbol'
+        json_file = os.path.join(self.output_dir, f"metrics_{timestamp}.json")
+        csv_file = os.path.join(self.output_dir, f"metrics_{timestamp}.csv")
+        with open(json_file, 'w') as f:
+            json.dump(rows, f, indent=2, allow_nan=False)
+        metrics_table.to_csv(csv_file)
+        print(f"Metrics for {len(self._metrics)} symbols ({len(self._errors)} failed) "
+              f"saved to: {json_file}, {csv_file}")
+
+        return {'metrics': [json_file, csv_file], **self._outputs}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _benchmark_returns(self, start_date, end_date):
+        from backtesting import load_benchmark_returns
+
+        key = (start_date, end_date)
+        if key not in self._benchmark_cache:
+            self._benchmark_cache[key] = load_benchmark_returns(self.benchmark_symbol, start_date, end_date)
+        return self._benchmark_cache[key]
+
+
+def main():
+    """
+    Backtest the crossover strategy for the given symbols and build batch reports.
+    """
+    parser = argparse.ArgumentParser(description="Headless batch reports for the MA crossover backtest")
+    parser.add_argument('symbols', nargs='+', help="Ticker symbols to backtest")
+    parser.add_argument('--level', choices=REPORT_LEVELS, default='metrics')
+    parser.add_argument('--output-dir', default='reports')
+    parser.add_argument('--start-date', default='2019-01-01')
+    parser.add_argument('--end-date', default='2022-01-01')
+    parser.add_argument('--fast-window', type=int, default=20)
+    parser.add_argument('--slow-window', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    from backtesting import load_data, moving_average_crossover, run_backtest
+
+    with ReportPipeline(args.level, args.output_dir, args.workers) as pipeline:
+        for symbol in args.symbols:
+            try:
+                close_prices = load_data(symbol, args.start_date, args.end_date)['Close']
+                entries, exits, fast_ma, slow_ma = moving_average_crossover(
+                    close_prices, args.fast_window, args.slow_window)
+                portfolio = run_backtest(close_prices, entries, exits)
+                pipeline.add(symbol, portfolio, close_prices, fast_ma, slow_ma,
+                             args.start_date, args.end_date)
+            except Exception as e:
+                # One bad symbol must not abort a nightly batch
+                print(f"Error processing {symbol}: {str(e)}")
+                pipeline.add_error(symbol, e)
+
+
+if __name__ == "__main__":
+    main()
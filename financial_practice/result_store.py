@@ -0,0 +1,313 @@
+#!/usr/bin/env python
+"""
+Persistent Result Store for Backtest Campaigns
+
+backtesting.main() only prints its metrics, and a long sweep that crashes
+halfway loses everything. ResultStore keeps one SQLite row per run, keyed by
+strategy name, parameters, symbol and a hash of the input data:
+
+- A run whose key is already stored is skipped, so re-running an interrupted
+  campaign resumes where it stopped. A changed price history gets a new hash
+  and is recomputed.
+- Every result is committed as soon as it is computed (WAL journal), so a
+  crash loses at most the run in progress.
+- query() returns past runs as a DataFrame with the parameters and metrics
+  expanded into columns. Filtering and ordering by a metric happen in SQL.
+
+Usage:
+python result_store.py run AAPL MSFT --fast 10 20 --slow 50 100
+python result_store.py query --order-by sharpe_ratio --limit 20
+
+Environment variables:
+- RESULT_STORE_PATH: database file (default: backtest_results.sqlite)
+
+Dependencies:
+- sqlite3 (standard library), pandas
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import numbers
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    strategy TEXT NOT NULL,
+    params TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    data_hash TEXT NOT NULL,
+    status TEXT NOT NULL,
+    metrics TEXT,
+    error TEXT,
+    elapsed_seconds REAL,
+    created_at TEXT NOT NULL,
+    UNIQUE (strategy, params, symbol, data_hash)
+);
+CREATE INDEX IF NOT EXISTS runs_symbol ON runs (symbol);
+"""
+
+
+def data_hash(data):
+    """
+    Content hash of a price frame (values and index).
+
+    Returns:
+    --------
+    str
+        16 hex characters; equal frames always hash equally
+    """
+    row_hashes = pd.util.hash_pandas_object(data, index=True).to_numpy()
+    return hashlib.sha1(row_hashes.tobytes()).hexdigest()[:16]
+
+
+def params_key(params):
+    """
+    Canonical JSON of a parameter dict, independent of key order.
+
+    Numbers are normalized so equal values share a key: integral floats
+    become ints (the backtesting CLI parses --initial-cash as 10000.0, a
+    campaign passes 10000) and NumPy scalars become Python numbers.
+    """
+    return json.dumps({name: _canonical_number(value) for name, value in params.items()}, sort_keys=True)
+
+
+def _canonical_number(value):
+    """Python int for integral numbers, float for other reals; anything else unchanged."""
+    if isinstance(value, bool) or not isinstance(value, numbers.Real):
+        return value
+    if isinstance(value, numbers.Integral) or float(value).is_integer():
+        return int(value)
+    return float(value)
+
+
+def _clean_metrics(metrics):
+    """Plain floats for JSON; NaN/inf become null, which SQLite's JSON functions accept."""
+    cleaned = {}
+    for name, value in metrics.items():
+        value = float(value)
+        cleaned[name] = value if math.isfinite(value) else None
+    return cleaned
+
+
+class ResultStore:
+    """
+    SQLite-backed store of backtest results keyed by strategy, parameters,
+    symbol and data hash.
+
+    Parameters:
+    -----------
+    path : str
+        Database file (created if missing)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # Campaigns may record results from worker threads
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(SCHEMA)
+
+    def get(self, strategy, params, symbol, data_key):
+        """
+        Return the stored metrics of a successful run, or None.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT metrics FROM runs WHERE strategy = ? AND params = ? AND symbol = ? "
+                "AND data_hash = ? AND status = 'done'",
+                (strategy, params_key(params), symbol, data_key)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, strategy, params, symbol, data_key, metrics=None, error=None, elapsed_seconds=None):
+        """
+        Record one run (replacing an earlier run with the same key) and commit it.
+        """
+        status = 'error' if error is not None else 'done'
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO runs (strategy, params, symbol, data_hash, status, metrics, error, "
+                "elapsed_seconds, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (strategy, params_key(params), symbol, data_key, status,
+                 json.dumps(_clean_metrics(metrics)) if metrics is not None else None,
+                 error, elapsed_seconds, datetime.now().isoformat(timespec='seconds')))
+
+    def run(self, strategy, params, symbol, data, compute):
+        """
+        Return stored metrics for these inputs, or compute and store them.
+
+        Parameters:
+        -----------
+        strategy : str
+            Strategy name
+        params : dict
+            Strategy parameters (JSON-serializable)
+        symbol : str
+            Ticker symbol
+        data : pd.DataFrame or str
+            Input price frame, or its precomputed data_hash
+        compute : callable
+            Called without arguments on a cache miss; returns a metrics dict
+
+        Returns:
+        --------
+        tuple
+            (metrics, cached) - cached is True if the run was skipped
+        """
+        data_key = data if isinstance(data, str) else data_hash(data)
+        metrics = self.get(strategy, params, symbol, data_key)
+        if metrics is not None:
+            return metrics, True
+
+        start = time.perf_counter()
+        try:
+            metrics = compute()
+        except Exception as e:
+            # Failed runs are recorded for inspection but retried next time
+            self.put(strategy, params, symbol, data_key, error=str(e),
+                     elapsed_seconds=time.perf_counter() - start)
+            raise
+        self.put(strategy, params, symbol, data_key, metrics, elapsed_seconds=time.perf_counter() - start)
+        return _clean_metrics(metrics), False
+
+    def query(self, strategy=None, symbol=None, status='done', order_by=None, ascending=False, limit=None):
+        """
+        Past runs as a DataFrame with parameters and metrics as columns.
+
+        Parameters:
+        -----------
+        strategy, symbol : str, optional
+            Only runs of this strategy / symbol
+        status : str or None
+            'done', 'error' or None for both
+        order_by : str, optional
+            Metric name to sort by (evaluated in SQL)
+        ascending : bool
+            Sort direction for order_by
+        limit : int, optional
+            Maximum number of rows
+
+        Returns:
+        --------
+        pd.DataFrame
+            One row per run
+        """
+        conditions, values = [], []
+        for column, value in (('strategy', strategy), ('symbol', symbol), ('status', status)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                values.append(value)
+        sql = "SELECT * FROM runs"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        if order_by:
+            sql += f" ORDER BY json_extract(metrics, ?) IS NULL, json_extract(metrics, ?) " \
+                   f"{'ASC' if ascending else 'DESC'}"
+            values += [f"$.{order_by}"] * 2
+        if limit:
+            sql += " LIMIT ?"
+            values.append(limit)
+
+        with self._lock:
+            runs = pd.read_sql_query(sql, self._connection, params=values)
+        params = pd.json_normalize([json.loads(p) for p in runs['params']]) if len(runs) else pd.DataFrame()
+        metrics = pd.json_normalize([json.loads(m) if m else {} for m in runs['metrics']]) if len(runs) \
+            else pd.DataFrame()
+        return pd.concat([runs.drop(columns=['params', 'metrics']), params, metrics], axis=1)
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def get_default_result_store():
+    """Result store at RESULT_STORE_PATH (default: backtest_results.sqlite)."""
+    return ResultStore(os.environ.get('RESULT_STORE_PATH', 'backtest_results.sqlite'))
+
+
+def run_campaign(store, symbols, fast_windows, slow_windows, start_date, end_date, initial_cash=10000):
+    """
+    Backtest every (symbol, fast, slow) combination, skipping stored runs.
+
+    Returns:
+    --------
+    dict
+        Counts of 'computed', 'cached' and 'failed' runs
+    """
+    from backtesting import extract_metrics, load_data, moving_average_crossover, run_backtest
+    from parameter_sweep import build_parameter_grid
+
+    counts = {'computed': 0, 'cached': 0, 'failed': 0}
+    pairs = build_parameter_grid(fast_windows, slow_windows)
+    for symbol in symbols:
+        try:
+            data = load_data(symbol, start_date, end_date)
+        except Exception as e:
+            print(f"Error loading {symbol}: {str(e)}")
+            counts['failed'] += len(pairs)
+            continue
+        data_key = data_hash(data)
+        for fast_window, slow_window in pairs:
+            params = {'fast_window': fast_window, 'slow_window': slow_window,
+                      'start_date': start_date, 'end_date': end_date, 'initial_cash': initial_cash}
+
+            def compute():
+                entries, exits, _, _ = moving_average_crossover(data['Close'], fast_window, slow_window)
+                return extract_metrics(run_backtest(data['Close'], entries, exits, initial_cash))
+
+            try:
+                _, cached = store.run('ma_crossover', params, symbol, data_key, compute)
+                counts['cached' if cached else 'computed'] += 1
+            except Exception as e:
+                print(f"Error backtesting {symbol} {fast_window}/{slow_window}: {str(e)}")
+                counts['failed'] += 1
+    return counts
+
+
+def main():
+    """
+    Run a resumable crossover campaign or query stored results.
+    """
+    parser = argparse.ArgumentParser(description="Persistent, resumable backtest results")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    run_parser = subparsers.add_parser('run', help="Backtest a grid, skipping stored runs")
+    run_parser.add_argument('symbols', nargs='+')
+    run_parser.add_argument('--fast', type=int, nargs='+', default=[10, 20])
+    run_parser.add_argument('--slow', type=int, nargs='+', default=[50, 100])
+    run_parser.add_argument('--start-date', default='2019-01-01')
+    run_parser.add_argument('--end-date', default='2022-01-01')
+    query_parser = subparsers.add_parser('query', help="List stored runs")
+    query_parser.add_argument('--symbol')
+    query_parser.add_argument('--order-by', default='sharpe_ratio')
+    query_parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    store = get_default_result_store()
+    try:
+        if args.command == 'run':
+            counts = run_campaign(store, args.symbols, args.fast, args.slow, args.start_date, args.end_date)
+            print(f"Campaign finished: {counts['computed']} computed, {counts['cached']} skipped, "
+                  f"{counts['failed']} failed")
+        else:
+            results = store.query(symbol=args.symbol, order_by=args.order_by, limit=args.limit)
+            print(results.drop(columns=['id', 'status', 'error']).to_string(index=False))
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
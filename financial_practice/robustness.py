@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+"""
+Monte Carlo Robustness Analysis for Backtest Returns
+
+calculate_metrics reports a single Sharpe ratio and drawdown from a single
+path. This script resamples the strategy returns it produces to obtain their
+distributions instead:
+
+- Block bootstrap: paths are rebuilt from randomly drawn blocks of
+  consecutive returns (wrapping around the end), which keeps short-range
+  autocorrelation such as volatility clusters intact.
+- Trade-order shuffle: the in-market stretches (trades) and the flat stretches
+  between them are put in a random order. The compounded return and the
+  Sharpe ratio do not depend on the order, so this isolates how lucky the
+  observed drawdown was.
+
+Each chunk of trials is one (trials x bars) matrix, and the full metrics set
+of metrics_kernel.py (CAGR, Sharpe, Sortino, max drawdown, ...) is computed on
+it in one vectorized pass. Chunks are sized to a memory budget and
+run on a process pool. Every chunk gets its own seed derived from the master
+seed, so results do not depend on the number of workers.
+
+Dependencies:
+- numpy, pandas (vectorbt/quantstats only for the example in main)
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from metrics_kernel import STAT_COLUMNS, compute_stats, stats_arrays
+
+RESAMPLING_METHODS = ('bootstrap', 'shuffle')
+
+
+def bootstrap_paths(returns, n_trials, block_size, rng):
+    """
+    Circular block bootstrap: (n_trials, bars) paths built from random blocks.
+    """
+    n_bars = len(returns)
+    n_blocks = -(-n_bars // block_size)
+    starts = rng.integers(0, n_bars, size=(n_trials, n_blocks, 1))
+    index = (starts + np.arange(block_size)) % n_bars
+    return returns[index.reshape(n_trials, -1)[:, :n_bars]]
+
+
+def trade_segments(in_market):
+    """
+    Split bars into alternating in-market and flat stretches.
+
+    Returns:
+    --------
+    tuple
+        (starts, lengths) of every stretch, in bar order
+    """
+    in_market = np.asarray(in_market, dtype=bool)
+    starts = np.flatnonzero(np.r_[True, in_market[1:] != in_market[:-1]])
+    lengths = np.diff(np.r_[starts, len(in_market)])
+    return starts, lengths
+
+
+def shuffled_paths(returns, segment_starts, segment_lengths, n_trials, rng):
+    """
+    (n_trials, bars) paths with the stretches of returns in random order.
+    """
+    n_bars = len(returns)
+    n_segments = len(segment_starts)
+    order = np.argsort(rng.random((n_trials, n_segments)), axis=1)
+
+    # Output position -> shuffled segment via one searchsorted over all rows:
+    # shifting row k by k * n_bars makes the cumulative ends globally sorted
+    lengths = segment_lengths[order]
+    ends = np.cumsum(lengths, axis=1) + np.arange(n_trials)[:, None] * n_bars
+    positions = np.arange(n_trials * n_bars)
+    slot = np.searchsorted(ends.ravel(), positions, side='right')
+    within = positions - (ends.ravel()[slot] - lengths.ravel()[slot])
+    source = segment_starts[order.ravel()[slot]] + within
+    return returns[source.reshape(n_trials, n_bars)]
+
+
+def _run_chunk(returns, method, n_trials, block_size, segments, seed, periods_per_year):
+    """Worker task: resample one chunk of trials and return its metrics."""
+    rng = np.random.default_rng(seed)
+    if method == 'bootstrap':
+        paths = bootstrap_paths(returns, n_trials, block_size, rng)
+    else:
+        paths = shuffled_paths(returns, *segments, n_trials, rng)
+    # Paths are rows here; the kernel reduces along the bar axis of the transposed view
+    return pd.DataFrame(stats_arrays(paths.T, periods_per_year), columns=STAT_COLUMNS)
+
+
+def run_robustness(returns, method='bootstrap', n_trials=5000, block_size=20, in_market=None, seed=42,
+                   max_workers=None, max_chunk_bytes=256 * 1024 ** 2, periods_per_year=252):
+    """
+    Distribution of the metrics_kernel.py metrics over resampled paths.
+
+    Parameters:
+    -----------
+    returns : pd.Series
+        Strategy returns as produced by calculate_metrics
+    method : str
+        'bootstrap' or 'shuffle' (see module docstring)
+    n_trials : int
+        Number of resampled paths
+    block_size : int
+        Bars per bootstrap block
+    in_market : pd.Series, optional
+        Boolean mask of bars with an open position for 'shuffle'
+        (default: bars with a non-zero return)
+    seed : int
+        Master seed; results are reproducible for any max_workers
+    max_workers : int, optional
+        Worker processes; 1 runs in the current process
+    max_chunk_bytes : int
+        Memory budget for one (trials x bars) chunk matrix
+    periods_per_year : int
+        Bars per year used for annualization
+
+    Returns:
+    --------
+    pd.DataFrame
+        One row per trial with STAT_COLUMNS (see metrics_kernel.py)
+    """
+    if method not in RESAMPLING_METHODS:
+        raise ValueError(f"Unknown resampling method {method!r}, expected one of {RESAMPLING_METHODS}")
+    values = pd.Series(returns).fillna(0.0).to_numpy(dtype=np.float64)
+    if len(values) < 2:
+        raise ValueError("At least two returns are needed for resampling")
+
+    segments = None
+    if method == 'shuffle':
+        mask = values != 0 if in_market is None else pd.Series(in_market).to_numpy(dtype=bool)
+        segments = trade_segments(mask)
+
+    # Several temporaries of the chunk's size are alive at once (paths,
+    # filled returns, equity, peaks, ...), so the budget is split between them
+    chunk_trials = max(1, min(n_trials, max_chunk_bytes // (6 * 8 * len(values))))
+    chunk_sizes = [min(chunk_trials, n_trials - start) for start in range(0, n_trials, chunk_trials)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    tasks = [(values, method, size, block_size, segments, chunk_seed, periods_per_year)
+             for size, chunk_seed in zip(chunk_sizes, seeds)]
+    print(f"Running {n_trials} {method} trials over {len(values)} bars in {len(tasks)} chunks...")
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(tasks) == 1:
+        results = [_run_chunk(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(tasks))) as executor:
+            results = list(executor.map(_run_chunk, *zip(*tasks)))
+    return pd.concat(results, ignore_index=True)
+
+
+def summarize_distribution(trials, observed=None, quantiles=(0.05, 0.25, 0.5, 0.75, 0.95)):
+    """
+    Quantiles of every metric, next to the observed value if given.
+
+    Parameters:
+    -----------
+    trials : pd.DataFrame
+        Output of run_robustness
+    observed : pd.Series, optional
+        Metrics of the original path (e.g. a row of compute_stats)
+
+    Returns:
+    --------
+    pd.DataFrame
+        One row per metric, one column per quantile (plus 'observed')
+    """
+    summary = trials.quantile(list(quantiles)).T
+    summary.columns = [f"p{round(q * 100)}" for q in quantiles]
+    if observed is not None:
+        summary.insert(0, 'observed', pd.Series(observed))
+    return summary
+
+
+def main():
+    """
+    Bootstrap and shuffle the returns of the default crossover backtest.
+    """
+    from backtesting import calculate_metrics, load_data, moving_average_crossover, run_backtest
+
+    symbol = 'AAPL'
+    start_date = '2019-01-01'
+    end_date = '2022-01-01'
+
+    try:
+        close_prices = load_data(symbol, start_date, end_date)['Close']
+        entries, exits, _, _ = moving_average_crossover(close_prices, 20, 50)
+        portfolio = run_backtest(close_prices, entries, exits)
+        returns = calculate_metrics(portfolio, symbol)
+        in_market = portfolio.position_mask()
+        observed = compute_stats(returns).iloc[0]
+
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        for method in RESAMPLING_METHODS:
+            trials = run_robustness(returns, method, in_market=in_market)
+            print(f"\n==== {method.title()} Distribution ====")
+            print(summarize_distribution(trials, observed).to_string(float_format='{:.4f}'.format))
+            trials.to_csv(f"{symbol}_robustness_{method}_{timestamp}.csv", index=False)
+        print(f"\nRobustness trials saved with timestamp {timestamp}")
+    except Exception as e:
+        print(f"Error running robustness analysis: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+#!/usr/bin/env python
+"""
+Compiled Signal Kernels for the Moving Average Crossover Strategy
+
+moving_average_crossover in backtesting.py builds two rolling means, four
+shifted Series and four boolean temporaries per call; in large sweeps those
+allocations dominate the run time. The kernel here computes both moving
+averages and the crossover entries/exits in a single pass over a contiguous
+float64 array, writing straight into preallocated outputs.
+
+- With Numba installed, the pass is JIT-compiled (and cached on disk). The
+  rolling means repeat pandas' compensated running sum operation for
+  operation, so they are bit-identical to rolling(...).mean(). A simpler
+  running or cumulative sum rounds differently, and wherever the fast and
+  slow averages tie (frequent with tick-rounded prices) the signal flips.
+- Without Numba, pandas computes the averages and NumPy the signals.
+
+The pandas implementation in backtesting.py stays the reference;
+test_signal_kernels.py checks that the signals are identical on tick-rounded
+prices. Running this script times both.
+
+CrossoverStream runs the same kernel over a history chunk by chunk (see
+mmap_archive.chunked_crossover).
+
+Dependencies:
+- numpy
+- numba (optional, for the compiled kernel)
+"""
+
+import math
+import time
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+def _crossover_numpy(close, fast_window, slow_window):
+    """
+    Fallback without Numba: pandas computes the moving averages, NumPy the signals.
+
+    Rebuilding the rolling mean from cumulative sums would be faster, but its
+    rounding differs from pandas, which flips signals wherever the two
+    averages tie (common with tick-rounded prices).
+    """
+    import pandas as pd
+
+    frame = pd.DataFrame(close)
+    fast_ma = frame.rolling(fast_window).mean().to_numpy()
+    slow_ma = frame.rolling(slow_window).mean().to_numpy()
+    diff = fast_ma - slow_ma
+    entries = np.zeros(close.shape, dtype=np.bool_)
+    exits = np.zeros(close.shape, dtype=np.bool_)
+    # NaN in either bar makes both comparisons False, matching Series.shift(1)
+    entries[1:] = (diff[1:] > 0) & (diff[:-1] <= 0)
+    exits[1:] = (diff[1:] < 0) & (diff[:-1] >= 0)
+    return entries, exits, fast_ma, slow_ma
+
+
+# Running state of one rolling mean, laid out like pandas' roll_mean locals
+(STATE_NOBS, STATE_NEG_CT, STATE_SUM, STATE_COMPENSATION_ADD, STATE_COMPENSATION_REMOVE,
+ STATE_SAME_VALUES, STATE_PREV_VALUE) = range(7)
+STATE_SIZE = 7
+
+
+def _rolling_mean(values, window, first, state, out):
+    """
+    pandas' rolling(window).mean() for one column, operation for operation.
+
+    Like pandas' roll_mean, the window sum is updated with Kahan-compensated
+    adds and removes (separate compensation terms), a window of identical
+    values returns that value exactly, and the sign of a mean whose values
+    all share one sign is enforced. The results are bit-identical, so ties
+    between two averages compare equal exactly when they do in pandas.
+
+    Bars values[first:] are processed and written to out[first:]. With
+    first > 0 the mean continues from state (which values[:first] produced),
+    so a series can be processed in chunks; state is updated in place.
+    """
+    nobs = int(state[STATE_NOBS])
+    neg_ct = int(state[STATE_NEG_CT])
+    sum_x = state[STATE_SUM]
+    compensation_add = state[STATE_COMPENSATION_ADD]
+    compensation_remove = state[STATE_COMPENSATION_REMOVE]
+    num_consecutive_same_value = int(state[STATE_SAME_VALUES])
+    prev_value = state[STATE_PREV_VALUE]
+    for t in range(first, len(values)):
+        if t == 0 or window == 1:
+            # First window, or no overlap with the previous one: start over
+            nobs = 0
+            neg_ct = 0
+            sum_x = compensation_add = compensation_remove = 0.0
+            num_consecutive_same_value = 0
+            prev_value = values[t]
+        elif t >= window:
+            old = values[t - window]
+            if not np.isnan(old):
+                nobs -= 1
+                y = -old - compensation_remove
+                total = sum_x + y
+                compensation_remove = total - sum_x - y
+                sum_x = total
+                if math.copysign(1.0, old) < 0:
+                    neg_ct -= 1
+
+        value = values[t]
+        if not np.isnan(value):
+            nobs += 1
+            y = value - compensation_add
+            total = sum_x + y
+            compensation_add = total - sum_x - y
+            sum_x = total
+            if math.copysign(1.0, value) < 0:
+                neg_ct += 1
+            if value == prev_value:
+                num_consecutive_same_value += 1
+            else:
+                num_consecutive_same_value = 1
+            prev_value = value
+
+        if nobs >= window:
+            result = sum_x / nobs
+            if num_consecutive_same_value >= nobs:
+                result = prev_value
+            elif neg_ct == 0 and result < 0:
+                result = 0.0
+            elif neg_ct == nobs and result > 0:
+                result = 0.0
+            out[t] = result
+        else:
+            out[t] = np.nan
+
+    state[STATE_NOBS] = nobs
+    state[STATE_NEG_CT] = neg_ct
+    state[STATE_SUM] = sum_x
+    state[STATE_COMPENSATION_ADD] = compensation_add
+    state[STATE_COMPENSATION_REMOVE] = compensation_remove
+    state[STATE_SAME_VALUES] = num_consecutive_same_value
+    state[STATE_PREV_VALUE] = prev_value
+
+
+def _crossover(close, fast_window, slow_window, first, states, prev_diff):
+    """
+    Moving averages and crossover signals over a (columns, bars) array.
+
+    Columns are the leading axis so each inner loop walks contiguous memory.
+    Infinite prices count as missing, as in pandas' rolling functions. Bars
+    before `first` only feed the window removes of a continued series (see
+    _rolling_mean); states (columns x 2 x STATE_SIZE) and prev_diff (the
+    previous bar's fast - slow difference per column) are updated in place.
+    """
+    n_cols, n_bars = close.shape
+    fast_ma = np.full((n_cols, n_bars), np.nan)
+    slow_ma = np.full((n_cols, n_bars), np.nan)
+    entries = np.zeros((n_cols, n_bars), dtype=np.bool_)
+    exits = np.zeros((n_cols, n_bars), dtype=np.bool_)
+    values = np.empty(n_bars)
+
+    for col in range(n_cols):
+        for t in range(n_bars):
+            price = close[col, t]
+            values[t] = np.nan if np.isinf(price) else price
+        _rolling_mean(values, fast_window, first, states[col, 0], fast_ma[col])
+        _rolling_mean(values, slow_window, first, states[col, 1], slow_ma[col])
+
+        previous = prev_diff[col]
+        for t in range(first, n_bars):
+            diff = fast_ma[col, t] - slow_ma[col, t]
+            # Comparisons with NaN are False, so warm-up bars never signal
+            entries[col, t] = diff > 0 and previous <= 0
+            exits[col, t] = diff < 0 and previous >= 0
+            previous = diff
+        prev_diff[col] = previous
+    return entries, exits, fast_ma, slow_ma
+
+
+if NUMBA_AVAILABLE:
+    _rolling_mean = njit(cache=True)(_rolling_mean)
+    _crossover_compiled = njit(cache=True)(_crossover)
+else:
+    _crossover_compiled = _crossover
+
+
+def crossover_kernel(close, fast_window, slow_window):
+    """
+    Compute moving averages and crossover signals without intermediate Series.
+
+    Parameters:
+    -----------
+    close : np.ndarray
+        1-D (bars,) or 2-D (bars, columns) array of closing prices
+    fast_window : int
+        Window size for the fast moving average
+    slow_window : int
+        Window size for the slow moving average
+
+    Returns:
+    --------
+    tuple
+        (entries, exits, fast_ma, slow_ma) arrays shaped like close
+    """
+    close = np.asarray(close, dtype=np.float64)
+    one_dimensional = close.ndim == 1
+    close = close.reshape(len(close), -1)
+
+    if NUMBA_AVAILABLE:
+        # The compiled kernel works column-major; transposing back returns views
+        n_cols = close.shape[1]
+        outputs = _crossover_compiled(np.ascontiguousarray(close.T), int(fast_window), int(slow_window), 0,
+                                      np.zeros((n_cols, 2, STATE_SIZE)), np.full(n_cols, np.nan))
+        outputs = tuple(output.T for output in outputs)
+    else:
+        outputs = _crossover_numpy(close, int(fast_window), int(slow_window))
+
+    if one_dimensional:
+        return tuple(output[:, 0] for output in outputs)
+    return outputs
+
+
+class CrossoverStream:
+    """
+    crossover_kernel fed one chunk of bars at a time.
+
+    The rolling sums carry over between chunks instead of restarting, so the
+    concatenated outputs are bit-identical to one crossover_kernel call over
+    the whole history (and so to the pandas reference). Only the last
+    max(fast_window, slow_window) bars are kept between updates. Without
+    Numba the kernel runs as plain Python, which is correct but slow.
+
+    Parameters:
+    -----------
+    fast_window : int
+        Window size for the fast moving average
+    slow_window : int
+        Window size for the slow moving average
+    """
+
+    def __init__(self, fast_window, slow_window):
+        self.fast_window = int(fast_window)
+        self.slow_window = int(slow_window)
+        self._tail = None
+        self._states = None
+        self._prev_diff = None
+
+    def update(self, close):
+        """
+        Process the next bars and return (entries, exits, fast_ma, slow_ma) for them.
+
+        close is 1-D (bars,) or 2-D (bars, columns), with the same columns on
+        every call.
+        """
+        close = np.asarray(close, dtype=np.float64)
+        one_dimensional = close.ndim == 1
+        close = np.ascontiguousarray((close[:, None] if one_dimensional else close).T)
+        if self._tail is None:
+            n_cols = close.shape[0]
+            self._tail = np.empty((n_cols, 0))
+            self._states = np.zeros((n_cols, 2, STATE_SIZE))
+            self._prev_diff = np.full(n_cols, np.nan)
+
+        history = np.concatenate([self._tail, close], axis=1)
+        first = self._tail.shape[1]
+        outputs = _crossover_compiled(history, self.fast_window, self.slow_window, first,
+                                      self._states, self._prev_diff)
+        self._tail = history[:, -max(self.fast_window, self.slow_window):].copy()
+
+        outputs = tuple(output[:, first:].T for output in outputs)
+        if one_dimensional:
+            return tuple(output[:, 0] for output in outputs)
+        return outputs
+
+
+def main():
+    """
+    Time the kernel against the pandas reference on seeded synthetic prices.
+    """
+    import pandas as pd
+    from backtesting import moving_average_crossover
+
+    rng = np.random.default_rng(42)
+    n_bars, n_cols = 100_000, 20
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (n_bars, n_cols)), axis=0)).round(2)
+    prices[:500, 0] = np.nan  # a late listing
+    close_prices = pd.DataFrame(prices, index=pd.date_range('1990-01-01', periods=n_bars))
+
+    print(f"Kernel backend: {'numba' if NUMBA_AVAILABLE else 'pandas + numpy'}")
+    crossover_kernel(prices[:100], 20, 50)  # trigger JIT compilation before timing
+
+    for fast_window, slow_window in [(5, 20), (20, 50), (50, 200)]:
+        start = time.perf_counter()
+        moving_average_crossover(close_prices, fast_window, slow_window)
+        pandas_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        crossover_kernel(prices, fast_window, slow_window)
+        kernel_seconds = time.perf_counter() - start
+
+        print(f"({fast_window}, {slow_window}): pandas {pandas_seconds * 1000:.1f} ms, "
+              f"kernel {kernel_seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
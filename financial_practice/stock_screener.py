@@ -0,0 +1,200 @@
+"""
+Multi-Ticker Stock Screener
+
+Analyzes a whole watchlist instead of the single ticker handled by
+StockAnalysisGUI.run_analysis. Price and earnings data are fetched
+concurrently through a bounded thread pool with a shared rate limiter (so
+hundreds of tickers do not trip Yahoo's throttling), and ROI, volatility, the
+20-day moving average and the dynamic P/E ratio of every ticker are collected
+into one sortable table.
+
+ScreenerWindow shows the table in Tk. Worker threads only push rows onto a
+queue; the Tk thread drains it in batches with root.after, so hundreds of
+finished tickers cause a handful of UI updates instead of one callback each.
+"""
+
+import queue
+import threading
+import time
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from tkinter import ttk
+
+import numpy as np
+import pandas as pd
+
+from financial_analysis import (compute_dynamic_pe_ratio, compute_moving_average, compute_roi,
+                                compute_volatility, fetch_eps_history, fetch_stock_data)
+
+SCREENER_COLUMNS = ['Ticker', 'Close', 'ROI', 'Volatility', 'MA_20', 'P/E Ratio', 'Error']
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter spacing calls at least 1 / rate seconds apart.
+    """
+
+    def __init__(self, rate_per_second):
+        self.interval = 1.0 / rate_per_second if rate_per_second else 0.0
+        self._lock = threading.Lock()
+        self._next_time = 0.0
+
+    def wait(self):
+        """Block until the caller may issue its next request."""
+        with self._lock:
+            now = time.monotonic()
+            sleep_for = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.interval
+        if sleep_for > 0:
+            time.sleep(sleep_for)
+
+
+def unique_tickers(tickers):
+    """Upper-cased, stripped ticker symbols without blanks or duplicates, in input order."""
+    return list(dict.fromkeys(t.upper().strip() for t in tickers if t.strip()))
+
+
+def analyze_ticker(ticker, period, rate_limiter):
+    """
+    Fetch one ticker's data and compute its screener metrics.
+
+    Missing earnings data only leaves the P/E ratio empty (with the reason in
+    the 'Error' field); any other failure is reported in the 'Error' field
+    instead of being raised. The rate limiter is only waited on before actual
+    downloads, not for data served from the price store or ticker cache.
+
+    Returns:
+        dict: One screener row keyed by SCREENER_COLUMNS.
+    """
+    row = dict.fromkeys(SCREENER_COLUMNS, np.nan)
+    row['Ticker'] = ticker
+    row['Error'] = ''
+    try:
+        stock_df, _ = fetch_stock_data(ticker, period, before_request=rate_limiter.wait)
+        try:
+            eps_df = fetch_eps_history(ticker, before_request=rate_limiter.wait)
+            stock_df = compute_dynamic_pe_ratio(stock_df, eps_df)
+            row['P/E Ratio'] = stock_df['P/E Ratio'].iloc[-1]
+        except Exception as e:
+            row['Error'] = f"P/E ratio unavailable: {e}"
+        stock_df = compute_moving_average(stock_df, window=20)
+        row['Close'] = stock_df['Close'].iloc[-1]
+        row['ROI'] = compute_roi(stock_df)
+        row['Volatility'] = compute_volatility(stock_df)
+        row['MA_20'] = stock_df['MA_20'].iloc[-1]
+    except Exception as e:
+        row['Error'] = str(e)
+    return row
+
+
+def screen_tickers(tickers, period="1y", max_workers=8, requests_per_second=5.0, on_result=None):
+    """
+    Analyze a watchlist concurrently and return one table sorted by ROI.
+
+    Parameters:
+        tickers (list): Ticker symbols to screen.
+        period (str): Time period to fetch data (e.g., '1y', '6mo').
+        max_workers (int): Maximum number of concurrent fetch threads.
+        requests_per_second (float): Shared request budget across all threads.
+        on_result (callable): Optional callback receiving each finished row;
+            it runs on a worker thread.
+
+    Returns:
+        DataFrame: One row per ticker with SCREENER_COLUMNS.
+    """
+    tickers = unique_tickers(tickers)
+    rate_limiter = RateLimiter(requests_per_second)
+    rows = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(analyze_ticker, ticker, period, rate_limiter) for ticker in tickers]
+        for future in as_completed(futures):
+            row = future.result()
+            rows.append(row)
+            if on_result is not None:
+                on_result(row)
+    table = pd.DataFrame(rows, columns=SCREENER_COLUMNS)
+    return table.sort_values('ROI', ascending=False, na_position='last').reset_index(drop=True)
+
+
+class ScreenerWindow:
+    """Tk window that screens a watchlist in the background and streams results."""
+
+    POLL_INTERVAL_MS = 200
+
+    def __init__(self, root_window, tickers, period="1y"):
+        self.root = root_window
+        # Count the tickers screen_tickers will actually analyze so progress reaches 100%
+        tickers = unique_tickers(tickers)
+        self.total = len(tickers)
+        self.rows = []
+        self._results = queue.Queue()
+        self._done = threading.Event()
+        self._sort_descending = {}
+
+        self.window = tk.Toplevel(root_window)
+        self.window.title("Stock Screener")
+        self.window.geometry("800x500")
+
+        self.status = tk.StringVar(value=f"Screening 0 / {self.total} tickers...")
+        ttk.Label(self.window, textvariable=self.status).pack(pady=5)
+        self.progress = ttk.Progressbar(self.window, maximum=max(self.total, 1), length=400)
+        self.progress.pack(pady=5)
+
+        self.tree = ttk.Treeview(self.window, columns=SCREENER_COLUMNS, show='headings')
+        for column in SCREENER_COLUMNS:
+            self.tree.heading(column, text=column, command=lambda c=column: self.sort_by(c))
+            self.tree.column(column, width=100, anchor='e' if column not in ('Ticker', 'Error') else 'w')
+        self.tree.pack(fill='both', expand=True, padx=10, pady=10)
+
+        thread = threading.Thread(
+            target=self._run,
+            args=(tickers, period)
+        )
+        thread.daemon = True
+        thread.start()
+        self.window.after(self.POLL_INTERVAL_MS, self._drain)
+
+    def _run(self, tickers, period):
+        try:
+            screen_tickers(tickers, period, on_result=self._results.put)
+        finally:
+            self._done.set()
+
+    def _drain(self):
+        """Insert every row finished since the last poll in one batch."""
+        if not self.window.winfo_exists():
+            return
+        batch = []
+        while True:
+            try:
+                batch.append(self._results.get_nowait())
+            except queue.Empty:
+                break
+        for row in batch:
+            self.rows.append(row)
+            self.tree.insert('', 'end', values=self._format(row))
+        self.progress['value'] = len(self.rows)
+        if self._done.is_set() and self._results.empty():
+            self.status.set(f"Screened {len(self.rows)} tickers")
+            self.sort_by('ROI', descending=True)
+        else:
+            self.status.set(f"Screening {len(self.rows)} / {self.total} tickers...")
+            self.window.after(self.POLL_INTERVAL_MS, self._drain)
+
+    def sort_by(self, column, descending=None):
+        """Re-sort the table by a column; clicking a heading again flips the order."""
+        if descending is None:
+            descending = not self._sort_descending.get(column, False)
+        self._sort_descending[column] = descending
+        table = pd.DataFrame(self.rows, columns=SCREENER_COLUMNS)
+        table = table.sort_values(column, ascending=not descending, na_position='last')
+        self.tree.delete(*self.tree.get_children())
+        for row in table.to_dict('records'):
+            self.tree.insert('', 'end', values=self._format(row))
+
+    @staticmethod
+    def _format(row):
+        formats = {'Close': '{:.2f}', 'ROI': '{:.2%}', 'Volatility': '{:.2%}',
+                   'MA_20': '{:.2f}', 'P/E Ratio': '{:.2f}'}
+        return [formats[c].format(row[c]) if c in formats and pd.notnull(row[c]) else
+                ('' if c in formats else row[c]) for c in SCREENER_COLUMNS]
@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+"""
+Streaming Indicators for Live Price Updates
+
+compute_moving_average, compute_volatility and compute_roi in
+financial_analysis.py recompute over the whole DataFrame on every call. For
+intraday monitoring, StreamingIndicators keeps a small running state per symbol
+and updates it in O(1) per bar:
+
+- moving average: ring buffer of the last `window` closes plus a running sum
+- volatility: Welford's online mean/variance of the bar-to-bar returns
+- ROI: first and latest close
+
+State is held in NumPy arrays with one row per symbol, so a single update call
+advances thousands of symbols at once. The values match the batch functions
+on the same closes; the state can be seeded from history first.
+
+Usage:
+python streaming_indicators.py AAPL MSFT    # replay history and compare with the batch functions
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+
+class StreamingIndicators:
+    """
+    O(1)-per-bar moving average, volatility and ROI for a set of symbols.
+
+    Parameters:
+        symbols (list): Symbols to track; one state row each.
+        window (int): Moving average window, as in compute_moving_average.
+        annualize (bool): Annualize volatility with sqrt(252), as in compute_volatility.
+    """
+
+    def __init__(self, symbols, window=20, annualize=True):
+        self.symbols = list(symbols)
+        self.window = window
+        self.annualize = annualize
+        self._rows = {symbol: row for row, symbol in enumerate(self.symbols)}
+        n = len(self.symbols)
+        self._buffer = np.full((n, window), np.nan)
+        self._position = np.zeros(n, dtype=np.int64)
+        self._count = np.zeros(n, dtype=np.int64)
+        self._sum = np.zeros(n)
+        self._first = np.full(n, np.nan)
+        self._last = np.full(n, np.nan)
+        self._n_returns = np.zeros(n, dtype=np.int64)
+        self._mean_return = np.zeros(n)
+        self._m2 = np.zeros(n)
+
+    @classmethod
+    def from_history(cls, close_history, window=20, annualize=True):
+        """
+        Create indicators for every column of a closing-price DataFrame and seed them.
+        """
+        indicators = cls(close_history.columns, window, annualize)
+        indicators.seed(close_history)
+        return indicators
+
+    def seed(self, close_history):
+        """
+        Replace the state of the given symbols with what their history implies.
+
+        Parameters:
+            close_history (DataFrame): Closing prices, one column per symbol.
+                NaN bars (e.g. before a listing) are skipped, as in update.
+        """
+        close_history = close_history.astype(float)
+        rows = np.array([self._rows[symbol] for symbol in close_history.columns], dtype=np.int64)
+        values = close_history.to_numpy()
+        valid = ~np.isnan(values)
+
+        self._first[rows] = close_history.bfill().iloc[0].to_numpy()
+        self._last[rows] = close_history.ffill().iloc[-1].to_numpy()
+
+        # Returns are measured from the previous valid close, as update does
+        returns = close_history.ffill().pct_change().where(valid)
+        self._n_returns[rows] = returns.count().to_numpy()
+        self._mean_return[rows] = returns.mean().fillna(0.0).to_numpy()
+        self._m2[rows] = (returns.var(ddof=0) * returns.count()).fillna(0.0).to_numpy()
+
+        self._buffer[rows] = np.nan
+        for column, row in enumerate(rows):
+            tail = values[valid[:, column], column][-self.window:]
+            self._buffer[row, :len(tail)] = tail
+            self._position[row] = len(tail) % self.window
+            self._count[row] = valid[:, column].sum()
+            self._sum[row] = tail.sum()
+
+    def update(self, prices):
+        """
+        Append one bar for any subset of symbols.
+
+        Parameters:
+            prices (dict, Series or array): New closes keyed by symbol, or an
+                array aligned with self.symbols. Missing or NaN prices leave
+                that symbol unchanged.
+        """
+        if isinstance(prices, (dict, pd.Series)):
+            rows = np.array([self._rows[symbol] for symbol in prices.keys()], dtype=np.int64)
+            new = np.asarray(list(prices.values()) if isinstance(prices, dict) else prices.to_numpy(),
+                             dtype=float)
+        else:
+            new = np.asarray(prices, dtype=float)
+            rows = np.arange(len(new))
+        has_price = ~np.isnan(new)
+        rows, new = rows[has_price], new[has_price]
+
+        # Ring buffer: swap the oldest close out of the running sum
+        position = self._position[rows]
+        full = self._count[rows] >= self.window
+        self._sum[rows] += new - np.where(full, self._buffer[rows, position], 0.0)
+        self._buffer[rows, position] = new
+        self._position[rows] = (position + 1) % self.window
+        self._count[rows] += 1
+        # Re-sum once per lap so floating-point drift cannot accumulate;
+        # this costs O(window) every window bars, O(1) amortized
+        wrapped = rows[self._position[rows] == 0]
+        self._sum[wrapped] = self._buffer[wrapped].sum(axis=1)
+
+        # Welford update of the return mean and sum of squared deviations
+        previous = self._last[rows]
+        has_previous = ~np.isnan(previous)
+        return_rows = rows[has_previous]
+        returns = new[has_previous] / previous[has_previous] - 1
+        self._n_returns[return_rows] += 1
+        delta = returns - self._mean_return[return_rows]
+        self._mean_return[return_rows] += delta / self._n_returns[return_rows]
+        self._m2[return_rows] += delta * (returns - self._mean_return[return_rows])
+
+        self._first[rows] = np.where(np.isnan(self._first[rows]), new, self._first[rows])
+        self._last[rows] = new
+
+    @property
+    def moving_average(self):
+        """Current moving average per symbol; NaN until `window` closes were seen."""
+        return np.where(self._count >= self.window, self._sum / self.window, np.nan)
+
+    @property
+    def volatility(self):
+        """Sample standard deviation of the returns, annualized if requested."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            variance = np.where(self._n_returns > 1, self._m2 / (self._n_returns - 1), np.nan)
+        volatility = np.sqrt(np.maximum(variance, 0.0))
+        return volatility * np.sqrt(252) if self.annualize else volatility
+
+    @property
+    def roi(self):
+        """(latest close - first close) / first close per symbol."""
+        return (self._last - self._first) / self._first
+
+    def snapshot(self):
+        """
+        Return the current indicator values of every symbol.
+
+        Returns:
+            DataFrame: Indexed by symbol with Close, MA_<window>, ROI and Volatility.
+        """
+        return pd.DataFrame({
+            'Close': self._last,
+            f'MA_{self.window}': self.moving_average,
+            'ROI': self.roi,
+            'Volatility': self.volatility,
+        }, index=pd.Index(self.symbols, name='Ticker'))
+
+
+def main():
+    """
+    Seed on the first half of each symbol's history, stream the rest bar by
+    bar and compare the final values with the batch functions.
+    """
+    from financial_analysis import (compute_moving_average, compute_roi, compute_volatility,
+                                    fetch_stock_data)
+
+    symbols = [symbol.upper() for symbol in sys.argv[1:]] or ['AAPL', 'MSFT']
+    try:
+        closes = pd.DataFrame({symbol: fetch_stock_data(symbol, '5y')[0].set_index('Date')['Close']
+                               for symbol in symbols})
+        split = len(closes) // 2
+        indicators = StreamingIndicators.from_history(closes.iloc[:split])
+
+        start = time.perf_counter()
+        for bar in closes.iloc[split:].to_numpy():
+            indicators.update(bar)
+        elapsed = time.perf_counter() - start
+        print(f"Streamed {len(closes) - split} bars x {len(symbols)} symbols "
+              f"in {elapsed * 1000:.1f} ms ({elapsed / (len(closes) - split) * 1e6:.1f} us per update)")
+
+        print("\n==== Streaming ====")
+        print(indicators.snapshot().to_string())
+        print("\n==== Batch ====")
+        for symbol in symbols:
+            df = closes[[symbol]].dropna().rename(columns={symbol: 'Close'})
+            df = compute_moving_average(df, window=indicators.window)
+            print(f"{symbol}: MA_{indicators.window} {df[f'MA_{indicators.window}'].iloc[-1]:.4f}, "
+                  f"ROI {compute_roi(df):.4%}, Volatility {compute_volatility(df):.4%}")
+    except Exception as e:
+        print(f"Error streaming indicators: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    main()
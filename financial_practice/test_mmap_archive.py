@@ -0,0 +1,72 @@
+"""
+Equivalence tests: mmap_archive.chunked_crossover against one
+crossover_kernel pass and the pandas reference in
+backtesting.moving_average_crossover.
+
+Prices are rounded to a tick so the averages tie often; chunks that restart
+their rolling sums round differently and flip signals at those ties.
+
+Run with: python -m pytest -q financial_practice
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import signal_kernels
+from backtesting import moving_average_crossover
+from mmap_archive import MmapArchive, chunked_crossover
+
+BACKENDS = ['python'] + (['numba'] if signal_kernels.NUMBA_AVAILABLE else [])
+
+
+def tick_rounded_bars(n_bars, tick=0.01, seed=0):
+    """Minute bars of a random walk rounded to tick, with a halt and a gap."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, n_bars)))
+    close = np.round(close / tick) * tick
+    close[n_bars // 3:n_bars // 3 + 40] = close[n_bars // 3]
+    close[n_bars // 2:n_bars // 2 + 3] = np.nan
+    return pd.DataFrame({'Close': close}, index=pd.date_range('2020-01-02 09:30', periods=n_bars, freq='min'))
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, monkeypatch):
+    if request.param == 'python':
+        rolling_mean = getattr(signal_kernels._rolling_mean, 'py_func', signal_kernels._rolling_mean)
+        monkeypatch.setattr(signal_kernels, '_rolling_mean', rolling_mean)
+        monkeypatch.setattr(signal_kernels, '_crossover_compiled', signal_kernels._crossover)
+    return request.param
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = MmapArchive(str(tmp_path))
+    archive.append('TICK', tick_rounded_bars(3000))
+    return archive
+
+
+@pytest.mark.parametrize('chunk_bars', [7, 50, 999, 5000])
+@pytest.mark.parametrize('fast_window, slow_window', [(5, 20), (20, 50)])
+def test_chunked_matches_one_pass_and_pandas(backend, archive, chunk_bars, fast_window, slow_window):
+    close = archive.load('TICK')['Close'].copy()
+    reference_entries, reference_exits, _, _ = moving_average_crossover(close, fast_window, slow_window)
+    one_pass_entries, one_pass_exits, _, _ = signal_kernels.crossover_kernel(close.to_numpy(), fast_window, slow_window)
+    entries, exits = chunked_crossover(archive, 'TICK', fast_window, slow_window, chunk_bars=chunk_bars)
+
+    assert entries.index.equals(close.index)
+    np.testing.assert_array_equal(entries.to_numpy(), one_pass_entries)
+    np.testing.assert_array_equal(exits.to_numpy(), one_pass_exits)
+    np.testing.assert_array_equal(entries.to_numpy(), reference_entries.to_numpy())
+    np.testing.assert_array_equal(exits.to_numpy(), reference_exits.to_numpy())
+
+
+def test_stream_moving_averages_match_pandas(backend):
+    close = tick_rounded_bars(2000, seed=1)['Close']
+    stream = signal_kernels.CrossoverStream(5, 20)
+    # Uneven chunks, including empty ones and ones shorter than either window
+    bounds = [0, 0, 3, 4, 30, 30, 700, 1337, 2000]
+    outputs = [stream.update(close.to_numpy()[a:b]) for a, b in zip(bounds, bounds[1:])]
+    fast_ma, slow_ma = (np.concatenate([output[i] for output in outputs]) for i in (2, 3))
+    np.testing.assert_array_equal(fast_ma, close.rolling(5).mean().to_numpy())
+    np.testing.assert_array_equal(slow_ma, close.rolling(20).mean().to_numpy())
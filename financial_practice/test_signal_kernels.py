@@ -0,0 +1,67 @@
+"""
+Equivalence tests: signal_kernels.crossover_kernel against the pandas
+reference in backtesting.moving_average_crossover.
+
+Prices are rounded to a tick so the fast and slow averages tie often; a
+kernel whose rolling sums round differently from pandas flips signals there.
+
+Run with: python -m pytest -q financial_practice
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import signal_kernels
+from backtesting import moving_average_crossover
+
+BACKENDS = ['numpy'] + (['numba'] if signal_kernels.NUMBA_AVAILABLE else [])
+
+
+def tick_rounded_prices(n_bars, n_cols, tick=0.01, seed=0):
+    """Random-walk closes rounded to tick, with a late listing and a gap."""
+    rng = np.random.default_rng(seed)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (n_bars, n_cols)), axis=0))
+    prices = np.round(prices / tick) * tick
+    prices[:n_bars // 10, 0] = np.nan
+    prices[n_bars // 2:n_bars // 2 + 3, -1] = np.nan
+    return pd.DataFrame(prices, index=pd.date_range('2000-01-01', periods=n_bars))
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, monkeypatch):
+    monkeypatch.setattr(signal_kernels, 'NUMBA_AVAILABLE', request.param == 'numba')
+    return request.param
+
+
+def assert_same_signals(close_prices, fast_window, slow_window):
+    expected = moving_average_crossover(close_prices, fast_window, slow_window)
+    actual = signal_kernels.crossover_kernel(close_prices.to_numpy(), fast_window, slow_window)
+    for name, reference, output in zip(('entries', 'exits', 'fast_ma', 'slow_ma'), expected, actual):
+        np.testing.assert_array_equal(output, reference.to_numpy(), err_msg=name)
+
+
+@pytest.mark.parametrize('fast_window, slow_window', [(5, 20), (20, 50), (1, 3)])
+def test_tick_rounded_prices_match_pandas(backend, fast_window, slow_window):
+    assert_same_signals(tick_rounded_prices(2000, 50), fast_window, slow_window)
+
+
+def test_long_history_matches_pandas(backend):
+    # Running sums drift over long series; 200k bars of cent ticks
+    assert_same_signals(tick_rounded_prices(200_000, 2, seed=1), 5, 20)
+
+
+def test_flat_and_negative_prices_match_pandas(backend):
+    close_prices = tick_rounded_prices(1000, 4, tick=0.5, seed=2) - 100
+    close_prices.iloc[200:400, 1] = 7.3  # a halted stock: both averages equal
+    close_prices.iloc[600, 2] = np.inf
+    assert_same_signals(close_prices, 3, 7)
+
+
+def test_one_dimensional_input(backend):
+    close = tick_rounded_prices(500, 1)[0]
+    expected = moving_average_crossover(close, 5, 20)
+    actual = signal_kernels.crossover_kernel(close.to_numpy(), 5, 20)
+    for reference, output in zip(expected, actual):
+        assert output.shape == (500,)
+        np.testing.assert_array_equal(output, reference.to_numpy())
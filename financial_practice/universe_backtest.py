@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+"""
+Multi-Symbol Universe Backtesting
+
+Runs the moving average crossover strategy across a universe of tickers
+instead of the single symbol in backtesting.main().
+
+- Prices for the whole universe are loaded in bulk through the price store.
+- Symbols are backtested as wide DataFrames (one column per symbol), either in
+  the current process or sharded into chunks across a ProcessPoolExecutor.
+- A bad ticker never aborts the run: download failures and backtest failures
+  are recorded in the summary's 'error' column.
+
+Symbols are grouped by their first available date before backtesting, so a
+stock listed halfway through the range is measured from its listing date
+rather than diluted by the bars before it existed.
+
+Dependencies:
+- vectorbt, pandas, numpy (see backtesting.py)
+"""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import pandas as pd
+
+from backtesting import moving_average_crossover, run_backtest
+from parameter_sweep import summarize_portfolio
+from price_store import get_default_store
+
+
+def load_universe(symbols, start_date, end_date, store=None):
+    """
+    Load closing prices for a list of symbols into one wide DataFrame.
+
+    Parameters:
+    -----------
+    symbols : list of str
+        Ticker symbols to load
+    start_date : str
+        Start date in 'YYYY-MM-DD' format
+    end_date : str
+        End date in 'YYYY-MM-DD' format
+    store : PriceStore, optional
+        Price store to load from (default: the shared store)
+
+    Returns:
+    --------
+    tuple
+        (close_prices, errors) - wide close DataFrame and {symbol: error message}
+    """
+    store = store or get_default_store()
+    print(f"Loading {len(symbols)} symbols from {start_date} to {end_date}...")
+    frames, errors = store.load_many(symbols, start_date, end_date)
+    close_prices = pd.DataFrame({symbol: frame['Close'] for symbol, frame in frames.items()})
+    print(f"Successfully loaded {close_prices.shape[1]} symbols, {len(errors)} failed")
+    return close_prices, errors
+
+
+def backtest_chunk(close_prices, fast_window, slow_window, initial_cash):
+    """
+    Backtest every column of a wide close-price frame in one vectorized run.
+
+    If the vectorized run fails, each symbol is retried on its own so only the
+    offending ticker is marked as failed.
+
+    Returns:
+    --------
+    tuple
+        (metrics, errors) - per-symbol metrics DataFrame and {symbol: error message}
+    """
+    try:
+        entries, exits, _, _ = moving_average_crossover(close_prices, fast_window, slow_window)
+        portfolio = run_backtest(close_prices, entries, exits, initial_cash)
+        return summarize_portfolio(portfolio), {}
+    except Exception:
+        if close_prices.shape[1] == 1:
+            raise
+
+    results, errors = [], {}
+    for symbol in close_prices.columns:
+        try:
+            metrics, _ = backtest_chunk(close_prices[[symbol]], fast_window, slow_window, initial_cash)
+            results.append(metrics)
+        except Exception as e:
+            errors[symbol] = str(e)
+    return (pd.concat(results) if results else pd.DataFrame()), errors
+
+
+def shard_universe(close_prices, chunk_size):
+    """
+    Split a wide close-price frame into chunks of symbols sharing a start date.
+
+    Each chunk is trimmed to its common first valid date, so leading NaNs of
+    recently listed symbols do not count as flat returns.
+
+    Returns:
+    --------
+    list of pd.DataFrame
+        Column chunks of at most chunk_size symbols
+    """
+    if close_prices.empty:
+        return []
+    first_valid = close_prices.apply(lambda col: col.first_valid_index())
+    chunks = []
+    for start, group in first_valid.dropna().groupby(first_valid.dropna()):
+        group_prices = close_prices.loc[start:, group.index]
+        for i in range(0, group_prices.shape[1], chunk_size):
+            chunks.append(group_prices.iloc[:, i:i + chunk_size])
+    return chunks
+
+
+def run_universe_backtest(symbols, start_date, end_date, fast_window=20, slow_window=50,
+                          initial_cash=10000, max_workers=None, chunk_size=100, store=None):
+    """
+    Backtest the crossover strategy for every symbol of a universe.
+
+    Parameters:
+    -----------
+    symbols : list of str
+        Ticker symbols to backtest
+    start_date, end_date : str
+        Date range in 'YYYY-MM-DD' format
+    fast_window, slow_window : int
+        Moving average windows
+    initial_cash : float
+        Initial capital per symbol
+    max_workers : int, optional
+        Worker processes; 1 runs every chunk in the current process
+        (default: one per CPU core)
+    chunk_size : int
+        Symbols per vectorized chunk
+    store : PriceStore, optional
+        Price store to load from
+
+    Returns:
+    --------
+    pd.DataFrame
+        One row per symbol with metrics and an 'error' column
+    """
+    close_prices, errors = load_universe(symbols, start_date, end_date, store)
+    chunks = shard_universe(close_prices, chunk_size)
+    for symbol in close_prices.columns[close_prices.isna().all()]:
+        errors[symbol] = "No valid prices in the specified date range"
+
+    max_workers = max_workers or os.cpu_count() or 1
+    print(f"Backtesting {close_prices.shape[1]} symbols in {len(chunks)} chunks "
+          f"with {min(max_workers, max(len(chunks), 1))} worker(s)...")
+
+    results = []
+    if max_workers == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            metrics, chunk_errors = backtest_chunk(chunk, fast_window, slow_window, initial_cash)
+            results.append(metrics)
+            errors.update(chunk_errors)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(backtest_chunk, chunk, fast_window, slow_window, initial_cash): chunk
+                for chunk in chunks
+            }
+            for future in as_completed(futures):
+                try:
+                    metrics, chunk_errors = future.result()
+                    results.append(metrics)
+                    errors.update(chunk_errors)
+                except Exception as e:
+                    # A crashed worker only loses its own chunk
+                    for symbol in futures[future].columns:
+                        errors[symbol] = str(e)
+
+    summary = pd.concat(results) if results else pd.DataFrame(columns=['sharpe_ratio'])
+    summary = summary.reindex(summary.index.union(pd.Index(list(errors))))
+    summary.index.name = 'symbol'
+    summary['error'] = pd.Series(errors, dtype=object)
+    return summary.sort_values('sharpe_ratio', ascending=False, na_position='last')
+
+
+def main():
+    """
+    Run the universe backtest for symbols given on the command line.
+    """
+    symbols = sys.argv[1:] or ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'META', 'NVDA', 'JPM', 'XOM', 'KO', 'PG']
+    start_date = '2019-01-01'
+    end_date = '2022-01-01'
+
+    try:
+        summary = run_universe_backtest(symbols, start_date, end_date)
+        print("\n==== Universe Summary ====")
+        print(summary.to_string())
+
+        summary_file = f"universe_summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        summary.to_csv(summary_file)
+        print(f"\nUniverse summary saved to: {summary_file}")
+    except Exception as e:
+        print(f"Error running universe backtest: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+"""
+Walk-Forward Optimization for the Moving Average Crossover Strategy
+
+A single in-sample backtest cannot tell whether the chosen windows overfit.
+This script rolls a train window and the test window that follows it across
+the price history: the window pair with the best Sharpe ratio on each train
+slice is evaluated on the next, unseen test slice, and the test slices are
+chained into one out-of-sample equity curve.
+
+Rolling means are causal, so every window's moving average is computed once
+over the full history and each fold only slices it. Later folds therefore
+reuse the statistics warmed up on earlier data instead of recomputing them
+(and losing slow_window bars of warm-up) per fold. Folds are independent and
+run in parallel worker processes.
+
+Dependencies:
+- vectorbt, pandas, numpy (see backtesting.py)
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+from backtesting import load_data, run_backtest
+from parameter_sweep import (build_parameter_grid, compute_moving_averages,
+                             crossover_signal_matrix, summarize_portfolio)
+
+
+def make_folds(n_bars, train_bars, test_bars, step_bars=None):
+    """
+    Build rolling (train_start, train_end, test_end) positional fold boundaries.
+
+    Parameters:
+    -----------
+    n_bars : int
+        Length of the price history
+    train_bars : int
+        Bars per train slice
+    test_bars : int
+        Bars per test slice
+    step_bars : int, optional
+        Distance between fold starts (default: test_bars, so test slices tile)
+
+    Returns:
+    --------
+    list of tuple
+        (train_start, train_end, test_end) with train = [train_start, train_end)
+        and test = [train_end, test_end)
+    """
+    step_bars = step_bars or test_bars
+    folds = []
+    train_start = 0
+    while train_start + train_bars + test_bars <= n_bars:
+        train_end = train_start + train_bars
+        folds.append((train_start, train_end, train_end + test_bars))
+        train_start += step_bars
+    if not folds:
+        raise ValueError(f"History of {n_bars} bars is too short for one fold "
+                         f"({train_bars} train + {test_bars} test bars)")
+    return folds
+
+
+def run_fold(close_prices, ma_table, pairs, train_bars, initial_cash, sort_by='sharpe_ratio'):
+    """
+    Optimize on the train part of a fold and evaluate on its test part.
+
+    Parameters:
+    -----------
+    close_prices : pd.Series
+        Closing prices covering exactly train + test bars of this fold
+    ma_table : pd.DataFrame
+        Moving averages for the same bars, computed on the full history
+    pairs : list of tuple
+        Candidate (fast_window, slow_window) pairs
+    train_bars : int
+        Number of leading bars used for optimization
+    initial_cash : float
+        Initial capital for the train and test backtests
+    sort_by : str
+        Metric that selects the best pair
+
+    Returns:
+    --------
+    dict
+        Best pair, in/out-of-sample metrics, test returns and stage timings
+    """
+    fold_start = time.perf_counter()
+    entries, exits = crossover_signal_matrix(ma_table.iloc[:train_bars], pairs)
+    train_metrics = summarize_portfolio(
+        run_backtest(close_prices.iloc[:train_bars], entries, exits, initial_cash)
+    )
+    scores = train_metrics[sort_by]
+    # Without any defined score (e.g. no pair traded), fall back to the first pair
+    fast_window, slow_window = scores.idxmax() if scores.notna().any() else pairs[0]
+    optimize_seconds = time.perf_counter() - fold_start
+
+    evaluate_start = time.perf_counter()
+    entries, exits = crossover_signal_matrix(ma_table.iloc[train_bars:], [(fast_window, slow_window)])
+    test_portfolio = run_backtest(close_prices.iloc[train_bars:], entries.iloc[:, 0],
+                                  exits.iloc[:, 0], initial_cash)
+    test_metrics = summarize_portfolio(test_portfolio).iloc[0]
+
+    return {
+        'fast_window': fast_window,
+        'slow_window': slow_window,
+        f'train_{sort_by}': train_metrics.loc[(fast_window, slow_window), sort_by],
+        'test_sharpe_ratio': test_metrics['sharpe_ratio'],
+        'test_total_return': test_metrics['total_return'],
+        'test_max_drawdown': test_metrics['max_drawdown'],
+        'test_returns': test_portfolio.returns(),
+        'optimize_seconds': optimize_seconds,
+        'evaluate_seconds': time.perf_counter() - evaluate_start,
+    }
+
+
+def run_walk_forward(close_prices, fast_windows, slow_windows, train_bars=504, test_bars=126,
+                     step_bars=None, initial_cash=10000, max_workers=None):
+    """
+    Run a walk-forward optimization and stitch the out-of-sample results.
+
+    Parameters:
+    -----------
+    close_prices : pd.Series or pd.DataFrame
+        Closing prices of a single symbol
+    fast_windows, slow_windows : iterable of int
+        Candidate window sizes (see parameter_sweep.build_parameter_grid)
+    train_bars, test_bars : int
+        Bars per train and test slice (default: ~2 years / ~6 months of days)
+    step_bars : int, optional
+        Distance between fold starts (default: test_bars)
+    initial_cash : float
+        Starting capital of the out-of-sample equity curve
+    max_workers : int, optional
+        Worker processes for the folds; 1 runs them in the current process
+
+    Returns:
+    --------
+    tuple
+        (equity_curve, folds) - out-of-sample equity Series and a per-fold
+        DataFrame with the chosen windows, metrics and timings
+    """
+    if isinstance(close_prices, pd.DataFrame):
+        close_prices = close_prices.iloc[:, 0]
+
+    pairs = build_parameter_grid(fast_windows, slow_windows)
+    if not pairs:
+        raise ValueError("Parameter grid is empty: every fast window must be shorter than a slow window")
+    folds = make_folds(len(close_prices), train_bars, test_bars, step_bars)
+    print(f"Walk-forward over {len(folds)} folds, {len(pairs)} window pairs each...")
+
+    ma_table = compute_moving_averages(close_prices, [w for pair in pairs for w in pair])
+    fold_args = [
+        (close_prices.iloc[start:end], ma_table.iloc[start:end], pairs, split - start, initial_cash)
+        for start, split, end in folds
+    ]
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(folds) == 1:
+        results = [run_fold(*args) for args in fold_args]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(run_fold, *zip(*fold_args)))
+
+    # Overlapping test slices (step_bars < test_bars) keep the newest fold's returns
+    oos_returns = pd.concat([result.pop('test_returns') for result in results])
+    oos_returns = oos_returns[~oos_returns.index.duplicated(keep='last')]
+    equity_curve = initial_cash * (1 + oos_returns).cumprod()
+    equity_curve.name = 'Out-of-Sample Equity'
+
+    fold_table = pd.DataFrame(results)
+    fold_table.insert(0, 'train_start', [close_prices.index[start] for start, _, _ in folds])
+    fold_table.insert(1, 'test_start', [close_prices.index[split] for _, split, _ in folds])
+    fold_table.insert(2, 'test_end', [close_prices.index[end - 1] for _, _, end in folds])
+    return equity_curve, fold_table
+
+
+def main():
+    """
+    Run a walk-forward optimization on a default symbol and grid.
+    """
+    symbol = 'AAPL'
+    start_date = '2012-01-01'
+    end_date = '2022-01-01'
+    initial_cash = 10000
+
+    try:
+        data = load_data(symbol, start_date, end_date)
+        equity_curve, folds = run_walk_forward(data['Close'], range(5, 55, 5), range(20, 210, 10),
+                                               initial_cash=initial_cash)
+
+        print("\n==== Walk-Forward Folds ====")
+        print(folds.to_string(index=False))
+        print(f"\nOut-of-sample total return: {equity_curve.iloc[-1] / initial_cash - 1:.2%}")
+
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        equity_curve.to_csv(f"{symbol}_walk_forward_equity_{timestamp}.csv")
+        folds.to_csv(f"{symbol}_walk_forward_folds_{timestamp}.csv", index=False)
+        print(f"Walk-forward results saved with timestamp {timestamp}")
+    except Exception as e:
+        print(f"Error running walk-forward optimization: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    main()